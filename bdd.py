@@ -0,0 +1,389 @@
+"""The goal in this module is to represent formulas as reduced ordered binary decision diagrams (ROBDDs).
+
+For a fixed order of the atoms, every boolean function has exactly one ROBDD, so two formulas built in the same
+manager are logically equivalent if and only if they are the same edge (an int), and a formula is valid if and
+only if it is the edge TRUE. For example:
+
+manager = BDD()
+f = manager.from_formula(Implies(Atom('p'), Atom('q')))
+g = manager.from_formula(Or(Not(Atom('p')), Atom('q')))
+f == g                      # True
+manager.satcount(f)         # 3
+
+Nodes are stored in three parallel lists (level, low, high) and are created once, through a unique table.
+An edge is 2 * node + c, where c = 1 complements the function of the node. With complement edges, negation
+takes constant time and a function and its negation share all their nodes; the high edge of a node is never
+complemented, which keeps the representation canonical. Node 0 is the terminal, so TRUE = 0 and FALSE = 1.
+
+All operations are built on ite (if-then-else), whose results are memoised in a direct-mapped cache of fixed
+size: a new entry overwrites the one in its slot, so memory stays bounded on long runs. The diagrams are walked
+with explicit stacks, so the number of atoms is not bounded by the recursion limit of Python.
+"""
+
+from formula import Atom, Not, Implies, And, Or
+from functions import preorder
+
+TRUE, FALSE = 0, 1
+
+
+def static_order(formula):
+    """Returns the atoms of formula in the order in which a depth-first, left-to-right walk first meets them.
+    Atoms that occur close to each other in the formula end up close in the order, which usually keeps
+    the ROBDD small (for example, on chains of conjunctions of related constraints)."""
+    order = {}
+    for node in preorder(formula, memo=True):
+        if isinstance(node, Atom):
+            order.setdefault(node, None)
+    return list(order)
+
+
+class BDD:
+    def __init__(self, order=(), cache_size=1 << 16):
+        self.level = [None]  # level of each node; the terminal is below every variable
+        self.low = [None]
+        self.high = [None]
+        self.unique = {}
+        self.atoms = []  # atoms[i] is the atom at level i
+        self.levels = {}  # inverse map, from atoms to levels
+        self.cache_size = cache_size
+        self.cache = [None] * cache_size
+        for atom in order:
+            self.add_atom(atom)
+
+    def __len__(self):
+        """Returns the number of nodes, including the terminal."""
+        return len(self.level)
+
+    def add_atom(self, atom):
+        """Places atom after all the atoms already in the order, if it is not there yet, and returns its level."""
+        if atom not in self.levels:
+            self.levels[atom] = len(self.atoms)
+            self.atoms.append(atom)
+        return self.levels[atom]
+
+    def _top(self, edge):
+        level = self.level[edge >> 1]
+        return len(self.atoms) if level is None else level
+
+    def _cofactors(self, edge, level):
+        # (low, high) cofactors of edge with respect to the atom at level
+        node = edge >> 1
+        if self.level[node] != level:
+            return edge, edge
+        c = edge & 1
+        return self.low[node] ^ c, self.high[node] ^ c
+
+    def node(self, level, low, high):
+        """Returns the edge of the function (atom at level ? high : low), creating a node only if needed."""
+        if low == high:
+            return low
+        if high & 1:
+            return self.node(level, low ^ 1, high ^ 1) ^ 1
+        key = (level, low, high)
+        index = self.unique.get(key)
+        if index is None:
+            index = len(self.level)
+            self.level.append(level)
+            self.low.append(low)
+            self.high.append(high)
+            self.unique[key] = index
+        return 2 * index
+
+    def var(self, atom):
+        """Returns the edge of an atom, adding it to the end of the order if needed."""
+        return self.node(self.add_atom(atom), FALSE, TRUE)
+
+    def ite(self, f, g, h):
+        """Returns the edge of (f ∧ g) ∨ (¬f ∧ h)."""
+        # the recursive calls on the cofactors are frames (f, g, h) of an explicit stack; once both are
+        # done, a frame (key, slot, level, complement) combines their results, which are on results
+        results = []
+        stack = [(f, g, h)]
+        while stack:
+            frame = stack.pop()
+            if len(frame) == 4:
+                key, slot, level, complement = frame
+                high = results.pop()
+                low = results.pop()
+                result = self.node(level, low, high)
+                self.cache[slot] = (key, result)
+                results.append(result ^ complement)
+                continue
+            f, g, h = frame
+            if f == TRUE:
+                results.append(g)
+                continue
+            if f == FALSE:
+                results.append(h)
+                continue
+            if g == f:
+                g = TRUE
+            elif g == f ^ 1:
+                g = FALSE
+            if h == f:
+                h = FALSE
+            elif h == f ^ 1:
+                h = TRUE
+            if g == h:
+                results.append(g)
+                continue
+            if g == TRUE and h == FALSE:
+                results.append(f)
+                continue
+            if g == FALSE and h == TRUE:
+                results.append(f ^ 1)
+                continue
+            # normalization: f is a regular edge and so is g, so that equal calls share a cache entry
+            if f & 1:
+                f, g, h = f ^ 1, h, g
+            complement = g & 1
+            if complement:
+                g, h = g ^ 1, h ^ 1
+            key = (f, g, h)
+            slot = hash(key) % self.cache_size
+            entry = self.cache[slot]
+            if entry is not None and entry[0] == key:
+                results.append(entry[1] ^ complement)
+                continue
+            level = min(self._top(f), self._top(g), self._top(h))
+            f0, f1 = self._cofactors(f, level)
+            g0, g1 = self._cofactors(g, level)
+            h0, h1 = self._cofactors(h, level)
+            stack.append((key, slot, level, complement))
+            stack.append((f1, g1, h1))
+            stack.append((f0, g0, h0))
+        return results[0]
+
+    def conjoin(self, f, g):
+        return self.ite(f, g, FALSE)
+
+    def disjoin(self, f, g):
+        return self.ite(f, TRUE, g)
+
+    def implies(self, f, g):
+        return self.ite(f, g, TRUE)
+
+    def from_formula(self, formula):
+        """Returns the edge of a formula. Atoms that are not in the order yet are appended in the
+        order given by static_order(formula). Each node object of formula is converted once.
+
+        Nested conjunctions (and disjunctions) are converted as one n-ary operation whose operands are
+        combined from the one whose top atom is the lowest in the order up: adding an operand above all the
+        others then creates few nodes, while combining in the order of the formula can rebuild the whole
+        diagram for every operand (on a chain built by and_all, the total work would be quadratic)."""
+        for atom in static_order(formula):
+            self.add_atom(atom)
+        edges = {}  # edge of each node object, by id
+        operands = {}
+        stack = [formula]
+        while stack:
+            node = stack[-1]
+            if id(node) in edges:
+                stack.pop()
+                continue
+            if isinstance(node, Atom):
+                edges[id(node)] = self.var(node)
+                stack.pop()
+                continue
+            if id(node) not in operands:
+                if isinstance(node, (And, Or)):
+                    operands[id(node)] = _operands(node)
+                elif isinstance(node, Not):
+                    operands[id(node)] = [node.inner]
+                elif isinstance(node, Implies):
+                    operands[id(node)] = [node.left, node.right]
+                else:
+                    raise TypeError(f'unsupported formula: {node}')
+            missing = [operand for operand in operands[id(node)] if id(operand) not in edges]
+            if missing:
+                stack.extend(reversed(missing))
+                continue
+            stack.pop()
+            values = [edges[id(operand)] for operand in operands.pop(id(node))]
+            if isinstance(node, Not):
+                edges[id(node)] = values[0] ^ 1
+            elif isinstance(node, Implies):
+                edges[id(node)] = self.implies(*values)
+            else:
+                values.sort(key=self._top, reverse=True)
+                operation = self.conjoin if isinstance(node, And) else self.disjoin
+                result = values[0]
+                for value in values[1:]:
+                    result = operation(value, result)
+                edges[id(node)] = result
+        return edges[id(formula)]
+
+    def to_formula(self, f):
+        """Returns a formula equivalent to edge f, as nested if-then-else on the atoms.
+        The constant edges are returned as the Python values True and False, since formulas have no constants."""
+        if f in (TRUE, FALSE):
+            return f == TRUE
+        formulas = {}  # formula of each non-terminal node; each node is converted once
+
+        def formula(edge):
+            return Not(formulas[edge >> 1]) if edge & 1 else formulas[edge >> 1]
+
+        stack = [f >> 1]
+        while stack:
+            node = stack[-1]
+            if node in formulas:
+                stack.pop()
+                continue
+            children = [self.high[node], self.low[node]]
+            missing = [child >> 1 for child in children if child >> 1 and child >> 1 not in formulas]
+            if missing:
+                stack.extend(reversed(missing))
+                continue
+            stack.pop()
+            atom = self.atoms[self.level[node]]
+            branches = []
+            for literal, child in zip((atom, Not(atom)), children):
+                if child == TRUE:
+                    branches.append(literal)
+                elif child != FALSE:
+                    branches.append(And(literal, formula(child)))
+            formulas[node] = branches[0] if len(branches) == 1 else Or(*branches)
+        return formula(f)
+
+    def is_equivalent(self, f, g):
+        """Returns True if the formulas f and g are logically equivalent."""
+        return self.from_formula(f) == self.from_formula(g)
+
+    def is_valid(self, formula):
+        """Returns True if formula is valid."""
+        return self.from_formula(formula) == TRUE
+
+    def restrict(self, f, assignment):
+        """Returns the edge of f with the atoms of assignment (a dictionary from atoms to truth values)
+        replaced by their values."""
+        values = {self.levels[atom]: value for atom, value in assignment.items() if atom in self.levels}
+        memo = {0: TRUE}  # restriction of each node
+        stack = [f >> 1]
+        while stack:
+            node = stack[-1]
+            if node in memo:
+                stack.pop()
+                continue
+            level = self.level[node]
+            if level in values:
+                children = [self.high[node] if values[level] else self.low[node]]
+            else:
+                children = [self.low[node], self.high[node]]
+            missing = [child >> 1 for child in children if child >> 1 not in memo]
+            if missing:
+                stack.extend(reversed(missing))
+                continue
+            stack.pop()
+            edges = [memo[child >> 1] ^ (child & 1) for child in children]
+            memo[node] = edges[0] if len(edges) == 1 else self.node(level, *edges)
+        return memo[f >> 1] ^ (f & 1)
+
+    def exists(self, f, atoms):
+        """Returns the edge of the existential quantification of f over the given atoms."""
+        quantified = {self.levels[atom] for atom in atoms if atom in self.levels}
+        memo = {TRUE: TRUE, FALSE: FALSE}
+        stack = [f]
+        while stack:
+            edge = stack[-1]
+            if edge in memo:
+                stack.pop()
+                continue
+            level = self.level[edge >> 1]
+            low, high = self._cofactors(edge, level)
+            missing = [child for child in (low, high) if child not in memo]
+            if missing:
+                stack.extend(reversed(missing))
+                continue
+            stack.pop()
+            if level in quantified:
+                memo[edge] = self.disjoin(memo[low], memo[high])
+            else:
+                memo[edge] = self.node(level, memo[low], memo[high])
+        return memo[f]
+
+    def forall(self, f, atoms):
+        """Returns the edge of the universal quantification of f over the given atoms."""
+        return self.exists(f ^ 1, atoms) ^ 1
+
+    def satcount(self, f, num_atoms=None):
+        """Returns the number of assignments to the atoms of the order (or to the first num_atoms of them,
+        which must include all atoms of f) that satisfy f."""
+        n = len(self.atoms) if num_atoms is None else num_atoms
+        counts = {0: 1}  # models of each node over the atoms from its level to the end of the order
+        stack = [f >> 1]
+        while stack:
+            node = stack[-1]
+            if node in counts:
+                stack.pop()
+                continue
+            children = (self.low[node], self.high[node])
+            missing = [child >> 1 for child in children if child >> 1 not in counts]
+            if missing:
+                stack.extend(reversed(missing))
+                continue
+            stack.pop()
+            level = self.level[node]
+            total = 0
+            for child in children:
+                below = counts[child >> 1]
+                if child & 1:
+                    below = 2 ** (n - self._level_or(child, n)) - below
+                total += below * 2 ** (self._level_or(child, n) - level - 1)
+            counts[node] = total
+
+        top = self._level_or(f, n)
+        result = counts[f >> 1]
+        if f & 1:
+            result = 2 ** (n - top) - result
+        return result * 2 ** top
+
+    def _level_or(self, edge, n):
+        level = self.level[edge >> 1]
+        return n if level is None else level
+
+    def iter_models(self, f, atoms=None):
+        """Yields the models of f as dictionaries from atoms to truth values, over the atoms of the order
+        (or the given atoms, which must include all atoms of f). Atoms on which a path does not depend
+        are expanded to both values, so every model is yielded exactly once. The diagram is walked
+        with an explicit stack."""
+        atoms = list(self.atoms if atoms is None else atoms)
+        levels = sorted(self.levels[atom] for atom in atoms if atom in self.levels)
+        free = [atom for atom in atoms if atom not in self.levels]
+        stack = [(f, 0, {})]
+        while stack:
+            edge, position, partial = stack.pop()
+            if edge == FALSE:
+                continue
+            if position == len(levels):
+                yield from _expand(partial, free)
+                continue
+            level = levels[position]
+            top = self._top(edge)
+            if top < level:
+                raise ValueError('the atoms must include all atoms of the function')
+            low, high = self._cofactors(edge, level)
+            atom = self.atoms[level]
+            stack.append((low, position + 1, {**partial, atom: False}))
+            stack.append((high, position + 1, {**partial, atom: True}))
+
+
+def _operands(formula):
+    # operands of the maximal subtree of nested formulas of the same class (And or Or) rooted at formula
+    result = []
+    stack = [formula]
+    while stack:
+        node = stack.pop()
+        if type(node) is type(formula):
+            stack.append(node.right)
+            stack.append(node.left)
+        else:
+            result.append(node)
+    return result
+
+
+def _expand(partial, free):
+    # every extension of partial to the free atoms
+    models = [partial]
+    for atom in free:
+        models = [{**model, atom: value} for model in models for value in (True, False)]
+    yield from models
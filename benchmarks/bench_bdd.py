@@ -0,0 +1,64 @@
+"""Compares the ROBDDs of bdd.py with the functions of semantics.py on validity, equivalence and model counting.
+
+The workload is the parity of n atoms written in two ways (a left-leaning and a right-leaning chain of
+exclusive ors built from And, Or and Not), which are equivalent but have different structure; parity is
+hard for truth tables (2 ** n rows) and for SAT solvers, but its ROBDD has 2n nodes in any order.
+
+Run it from the root of the project with: python -m benchmarks.bench_bdd
+"""
+
+import time
+
+from formula import Atom, Not, And, Or, Implies
+from semantics import is_valid, is_logical_equivalence, truth_table
+from bdd import BDD
+
+
+def xor(a, b):
+    return Or(And(a, Not(b)), And(Not(a), b))
+
+
+def parity(atoms, left=True):
+    result = atoms[0] if left else atoms[-1]
+    for atom in (atoms[1:] if left else reversed(atoms[:-1])):
+        result = xor(result, atom) if left else xor(atom, result)
+    return result
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def count_rows(formula):
+    return sum(1 for row in truth_table(formula) if row[formula])
+
+
+def bdd_valid(f1, f2):
+    return BDD().is_valid(And(Implies(f1, f2), Implies(f2, f1)))
+
+
+def bdd_equivalent(f1, f2):
+    return BDD().is_equivalent(f1, f2)
+
+
+def bdd_count(formula):
+    manager = BDD()
+    return manager.satcount(manager.from_formula(formula))
+
+
+if __name__ == '__main__':
+    for n in (8, 12, 16):
+        atoms = [Atom(f'x{i}') for i in range(n)]
+        f1, f2 = parity(atoms), parity(atoms, left=False)
+        both = And(Implies(f1, f2), Implies(f2, f1))
+        print(f'parity of {n} atoms')
+        for name, function, args in (('semantics.is_valid', is_valid, (both,)),
+                                     ('bdd is_valid', bdd_valid, (f1, f2)),
+                                     ('semantics.is_logical_equivalence', is_logical_equivalence, (f1, f2)),
+                                     ('bdd is_equivalent', bdd_equivalent, (f1, f2)),
+                                     ('truth_table model count', count_rows, (f1,)),
+                                     ('bdd satcount', bdd_count, (f1,))):
+            result, seconds = timed(function, *args)
+            print(f'  {name:34} {seconds:9.4f} s   result: {result}')
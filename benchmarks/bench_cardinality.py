@@ -0,0 +1,98 @@
+"""Compares the cardinality encodings of cardinality.py by size and by the time the CDCL solver takes on them.
+
+Three workloads are used:
+
+the size (clauses and auxiliary variables) of at_most_k over 50 literals, for several k;
+capacitated pigeonhole: n pigeons in m holes with capacity k, each pigeon in exactly one hole
+(satisfiable for n = m * k, unsatisfiable for n = m * k + 1);
+minesweeper: a random board in which every square without a mine is revealed, with exactly_k for each number.
+
+Encodings that would be too large for a workload (pairwise with many subsets, commander with a large k,
+product with k > 1) are skipped.
+
+Run it from the root of the project with: python -m benchmarks.bench_cardinality
+"""
+
+import random
+import time
+from math import comb
+
+from cnf import CNF
+from cardinality import ENCODINGS, at_most_k, exactly_k
+from dpll import Solver
+
+
+def supported(encoding, n, k):
+    k = min(k, n - k) if encoding != 'product' else k
+    if encoding == 'pairwise':
+        return comb(n, k + 1) <= 100000
+    if encoding == 'commander':
+        return k <= 3
+    if encoding == 'product':
+        return k <= 1
+    return True
+
+
+def solve(cnf):
+    start = time.perf_counter()
+    solver = Solver()
+    solver.add_cnf(cnf)
+    result = solver.solve()
+    return result, time.perf_counter() - start
+
+
+def pigeonhole(pigeons, holes, capacity, encoding):
+    cnf = CNF()
+    variable = [[cnf.new_variable() for h in range(holes)] for p in range(pigeons)]
+    for p in range(pigeons):
+        exactly_k(variable[p], 1, cnf, encoding if encoding != 'commander' else 'sequential')
+    for h in range(holes):
+        at_most_k([variable[p][h] for p in range(pigeons)], capacity, cnf, encoding)
+    return cnf
+
+
+def minesweeper(size, mines, encoding, seed=0):
+    rng = random.Random(seed)
+    cells = [(i, j) for i in range(size) for j in range(size)]
+    mined = set(rng.sample(cells, mines))
+    cnf = CNF()
+    variable = {cell: cnf.new_variable() for cell in cells}
+    for i, j in cells:
+        if (i, j) in mined:
+            continue
+        cnf.add_clause([-variable[(i, j)]])
+        around = [(i + di, j + dj) for di in (-1, 0, 1) for dj in (-1, 0, 1)
+                  if (di or dj) and (i + di, j + dj) in variable]
+        exactly_k([variable[cell] for cell in around], len(mined.intersection(around)), cnf, encoding)
+    return cnf
+
+
+if __name__ == '__main__':
+    print('at_most_k over 50 literals: clauses / auxiliary variables')
+    for k in (1, 3, 10, 25):
+        sizes = []
+        for encoding in ENCODINGS:
+            if supported(encoding, 50, k):
+                cnf = CNF()
+                at_most_k([cnf.new_variable() for _ in range(50)], k, cnf, encoding)
+                sizes.append(f'{encoding} {len(cnf)}/{cnf.num_vars - 50}')
+        print(f'  k = {k:2}: ' + ', '.join(sizes))
+
+    for pigeons, holes, capacity in ((40, 8, 5), (60, 6, 10), (120, 4, 30), (9, 4, 2)):
+        print(f'pigeonhole: {pigeons} pigeons, {holes} holes of capacity {capacity}')
+        for encoding in ENCODINGS:
+            if not supported(encoding, pigeons, capacity):
+                continue
+            cnf = pigeonhole(pigeons, holes, capacity, encoding)
+            result, seconds = solve(cnf)
+            print(f'  {encoding:10} clauses: {len(cnf):7}   variables: {cnf.num_vars:6}   '
+                  f'{"SAT" if result else "UNSAT":5} {seconds:8.3f} s')
+
+    print('minesweeper: 30x30 board with 150 mines')
+    for encoding in ENCODINGS:
+        if encoding == 'product':
+            continue
+        cnf = minesweeper(30, 150, encoding)
+        result, seconds = solve(cnf)
+        print(f'  {encoding:10} clauses: {len(cnf):7}   variables: {cnf.num_vars:6}   '
+              f'{"SAT" if result else "UNSAT":5} {seconds:8.3f} s')
@@ -0,0 +1,128 @@
+"""Compares the __slots__ formula nodes of formula.py with the previous dictionary-based nodes,
+whose hash was recomputed recursively on every call.
+
+Both kinds of nodes are used to build the 9x9 sudoku encoding of examples/sudoku.py (one big and_all
+chain of cell, row, column and subgrid constraints). The benchmark reports the construction time,
+the memory held by the formula and the time to collect all of its subformulas into a set.
+
+Run it from the root of the project with: python -m benchmarks.bench_formula_nodes
+"""
+
+import sys
+import time
+import tracemalloc
+
+import formula
+
+
+class OldAtom:
+    def __init__(self, name):
+        self.name = name
+
+    def __eq__(self, other):
+        return isinstance(other, OldAtom) and other.name == self.name
+
+    def __hash__(self):
+        return hash((self.name, 'atom'))
+
+
+class OldNot:
+    def __init__(self, inner):
+        self.inner = inner
+
+    def __eq__(self, other):
+        return isinstance(other, OldNot) and other.inner == self.inner
+
+    def __hash__(self):
+        return hash((hash(self.inner), 'not'))
+
+
+class OldAnd:
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+
+    def __eq__(self, other):
+        return isinstance(other, OldAnd) and other.left == self.left and other.right == self.right
+
+    def __hash__(self):
+        return hash((hash(self.left), hash(self.right), 'and'))
+
+
+class OldOr:
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+
+    def __eq__(self, other):
+        return isinstance(other, OldOr) and other.left == self.left and other.right == self.right
+
+    def __hash__(self):
+        return hash((hash(self.left), hash(self.right), 'or'))
+
+
+def chain(constructor, formulas):
+    result = formulas[0]
+    for f in formulas[1:]:
+        result = constructor(result, f)
+    return result
+
+
+def sudoku_encoding(atom, neg, conj, disj, box=3):
+    """Builds the sudoku constraints of examples/sudoku.py for a (box * box) x (box * box) grid."""
+    n = box * box
+
+    def cell(i, j, d):
+        return atom(str(i + 1) + '_' + str(j + 1) + '_' + str(d + 1))
+
+    constraints = []
+    for i in range(n):
+        for j in range(n):
+            for d1 in range(n - 1):
+                for d2 in range(d1 + 1, n):
+                    constraints.append(neg(conj(cell(i, j, d1), cell(i, j, d2))))
+    for d in range(n):
+        for k in range(n):
+            constraints.append(chain(disj, [cell(k, j, d) for j in range(n)]))
+            constraints.append(chain(disj, [cell(i, k, d) for i in range(n)]))
+            row, col = box * (k // box), box * (k % box)
+            constraints.append(chain(disj, [cell(row + i, col + j, d) for i in range(box) for j in range(box)]))
+    return chain(conj, constraints)
+
+
+def collect_subformulas(root):
+    """Adds every subformula to a set, walking the tree with an explicit stack."""
+    result = set()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node in result:
+            continue
+        result.add(node)
+        for child in ('inner', 'left', 'right'):
+            if hasattr(node, child):
+                stack.append(getattr(node, child))
+    return result
+
+
+def measure(name, atom, neg, conj, disj):
+    tracemalloc.start()
+    start = time.perf_counter()
+    root = sudoku_encoding(atom, neg, conj, disj)
+    build_time = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    start = time.perf_counter()
+    size = len(collect_subformulas(root))
+    subformulas_time = time.perf_counter() - start
+    print(f'{name:6} build: {build_time:8.3f} s   memory: {memory / 2 ** 20:8.2f} MiB   '
+          f'subformulas: {subformulas_time:8.3f} s ({size} distinct)')
+
+
+if __name__ == '__main__':
+    # the old nodes hash the and_all chain recursively
+    sys.setrecursionlimit(100000)
+    measure('old', OldAtom, OldNot, OldAnd, OldOr)
+    measure('slots', formula.Atom, formula.Not, formula.And, formula.Or)
+    with formula.interning():
+        measure('intern', formula.Atom, formula.Not, formula.And, formula.Or)
@@ -0,0 +1,62 @@
+"""Measures how many puzzles per second sudoku_solver.py solves on hard 9x9 puzzles and on larger grids.
+
+The 9x9 corpus holds well-known puzzles that are hard for human-style solving and for simple backtracking.
+The 16x16 and 25x25 puzzles are generated: a solved grid is built from the standard pattern, shuffled with
+random permutations of digits, rows inside bands, bands, columns inside stacks and stacks, and then a fraction
+of its cells is cleared. Every solution is checked with is_solution.
+
+Run it from the root of the project with: python -m benchmarks.bench_sudoku
+"""
+
+import random
+import time
+
+from sudoku_solver import solve, is_solution
+
+HARD_9X9 = [
+    '800000000003600000070090200050007000000045700000100030001000068008500010090000400',  # Arto Inkala, 2012
+    '100007090030020008009600500005300900010080002600004000300000010040000007007000300',  # AI Escargot
+    '000000039000001005003050800008090006070002000100400000009080050020000600400700000',  # Golden Nugget
+    '100000002090400050006000700050903000000070000000850040700000600030009080002000001',  # Easter Monster
+    '000000012000000003002300400001800005060070800000009000008500000900040500470006000',  # Platinum Blonde
+    '000000010400000000020000000000050407008000300001090000300400200050100000000806000',  # 17 givens
+    '000000012000035000000600070700000300000400800100000000000120000080000040050000600',  # 17 givens
+]
+
+
+def parse(text):
+    n = int(len(text) ** 0.5)
+    return [[int(text[r * n + c]) for c in range(n)] for r in range(n)]
+
+
+def generate(box, fraction, rng):
+    """Returns a grid of size box * box in which the given fraction of the cells of a random solution is cleared."""
+    n = box * box
+    digits = rng.sample(range(1, n + 1), n)
+
+    def lines():
+        bands = rng.sample(range(box), box)
+        return [band * box + line for band in bands for line in rng.sample(range(box), box)]
+
+    rows, columns = lines(), lines()
+    grid = [[digits[(box * (r % box) + r // box + c) % n] for c in columns] for r in rows]
+    for r, c in rng.sample([(r, c) for r in range(n) for c in range(n)], int(fraction * n * n)):
+        grid[r][c] = 0
+    return grid
+
+
+def run(name, grids):
+    start = time.perf_counter()
+    for grid in grids:
+        solution = solve(grid)
+        assert solution is not None and is_solution(grid, solution)
+    seconds = time.perf_counter() - start
+    print(f'{name:24} {len(grids):3} puzzles   {seconds:8.3f} s   {len(grids) / seconds:8.2f} puzzles/s')
+
+
+if __name__ == '__main__':
+    rng = random.Random(0)
+    run('hard 9x9', [parse(text) for text in HARD_9X9])
+    run('random 9x9 (60% empty)', [generate(3, 0.6, rng) for _ in range(20)])
+    run('16x16 (55% empty)', [generate(4, 0.55, rng) for _ in range(10)])
+    run('25x25 (50% empty)', [generate(5, 0.5, rng) for _ in range(5)])
@@ -0,0 +1,62 @@
+"""Measures the throughput, in megabytes of text per second, of format_formula and of the parser of syntax.py.
+
+The workloads are a random propositional formula of a few megabytes, the deep and_all chain of the 16x16 sudoku
+clauses of sudoku_solver.py and a file of many small first-order formulas, streamed with iter_formulas.
+Every parsed formula is written back and compared with the original text.
+
+Run it from the root of the project with: python -m benchmarks.bench_syntax
+"""
+
+import io
+import random
+import time
+
+import fol_formula as fol
+from formula import Atom, Not, And, Or, Implies
+from term import Con, Var, Fun
+from syntax import format_formula, parse_formula, iter_formulas
+from benchmarks import generators
+
+
+def random_formula(size, rng):
+    """Returns a random propositional formula with about size connectives, built without recursion."""
+    operands = [Atom(f'p{rng.randrange(100)}') for _ in range(size // 2 + 1)]
+    while len(operands) > 1:
+        right, left = operands.pop(), operands.pop()
+        node = rng.choice([And, Or, Implies])(left, right)
+        k = rng.randrange(len(operands) + 1)
+        operands.append(Not(node) if rng.random() < 0.2 else node)
+        operands[k], operands[-1] = operands[-1], operands[k]
+    return operands[0]
+
+
+def random_fol(rng):
+    x, y = Var('x'), Var('y')
+    terms = [x, y, Con('a'), Fun('f', [x, Con('b')]), Fun('g', [Fun('f', [y, x])])]
+    atom = lambda: fol.Atom(rng.choice('PQR'), rng.sample(terms, 2))
+    body = fol.Implies(fol.And(atom(), fol.Not(atom())), fol.Or(atom(), atom()))
+    return fol.ForAll(x, fol.Exists(y, body))
+
+
+def throughput(name, text, parse, write):
+    megabytes = len(text.encode('utf-8')) / 2 ** 20
+    start = time.perf_counter()
+    parsed = parse(text)
+    parse_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    written = write(parsed)
+    write_seconds = time.perf_counter() - start
+    assert written == text
+    print(f'{name:38} {megabytes:7.2f} MB   parse {megabytes / parse_seconds:7.2f} MB/s'
+          f'   format {megabytes / write_seconds:7.2f} MB/s')
+
+
+if __name__ == '__main__':
+    rng = random.Random(0)
+    formula = random_formula(400000, rng)
+    throughput('random formula', format_formula(formula), parse_formula, format_formula)
+    chain = generators.sudoku(4).to_formula()
+    throughput('16x16 sudoku clauses (and_all chain)', format_formula(chain), parse_formula, format_formula)
+    lines = '\n'.join(format_formula(random_fol(rng)) for _ in range(20000)) + '\n'
+    throughput('first-order file, streamed', lines, lambda text: list(iter_formulas(io.StringIO(text), fol=True)),
+               lambda formulas: ''.join(format_formula(f) + '\n' for f in formulas))
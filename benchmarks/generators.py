@@ -0,0 +1,89 @@
+"""Reproducible generators of the formulas used by the benchmark suite (see benchmarks/suite.py).
+
+Every generator is deterministic: the random ones take a seed and use their own random.Random, so the same
+arguments build the same formula on every run and on every commit. The generators that produce clauses
+write them into a CNF container (see cnf.py); cnf.to_formula() turns it into a formula.
+
+random_ksat(n, k, ratio, seed): ratio * n clauses of k distinct variables with random signs; ratio 4.26 is the
+phase transition of 3-SAT, where instances are the hardest;
+pigeonhole(holes): n + 1 pigeons in n holes, unsatisfiable and hard for resolution;
+parity(n, seed): the exclusive or of n atoms as a chain of And, Or and Not;
+sudoku(box, fraction, seed): the clauses of sudoku_solver.encode on a puzzle of side box * box;
+mines(rows, columns, density, seed): the constraints of a minesweeper board, as in examples/mines.py;
+and_chain(n) and or_chain(n): the left-leaning chains built by and_all and or_all of examples/sudoku.py.
+"""
+
+import random
+from functools import reduce
+
+from formula import Atom, Not, And, Or
+from cnf import CNF
+from cardinality import exactly_k
+from sudoku_solver import encode
+from benchmarks.bench_sudoku import generate
+
+
+def random_ksat(n, k=3, ratio=4.26, seed=0):
+    rng = random.Random(seed)
+    cnf = CNF()
+    for v in range(1, n + 1):
+        cnf.variable(Atom(f'p{v}'))
+    for _ in range(round(ratio * n)):
+        cnf.add_clause([v if rng.random() < 0.5 else -v for v in rng.sample(range(1, n + 1), k)])
+    return cnf
+
+
+def pigeonhole(holes):
+    cnf = CNF()
+    pigeons = range(holes + 1)
+
+    def placed(pigeon, hole):
+        return cnf.variable(Atom(f'{pigeon}_{hole}'))
+
+    for pigeon in pigeons:
+        cnf.add_clause([placed(pigeon, hole) for hole in range(holes)])
+    for hole in range(holes):
+        for first in pigeons:
+            for second in range(first + 1, holes + 1):
+                cnf.add_clause([-placed(first, hole), -placed(second, hole)])
+    return cnf
+
+
+def parity(n, seed=0):
+    atoms = [Atom(f'x{i}') for i in random.Random(seed).sample(range(n), n)]
+    return reduce(lambda a, b: Or(And(a, Not(b)), And(Not(a), b)), atoms)
+
+
+def sudoku(box, fraction=0.6, seed=0):
+    return encode(generate(box, fraction, random.Random(seed)))
+
+
+def mines(rows, columns, density=0.15, seed=0):
+    """Returns the CNF of a random minefield in which the squares without adjacent mines and their neighbors
+    have been revealed, as after a few clicks. As in examples/mines.py, a revealed square has no mine and
+    a revealed square with number k has exactly k mines among its neighbors."""
+    rng = random.Random(seed)
+    cells = [(i, j) for i in range(rows) for j in range(columns)]
+    mined = set(rng.sample(cells, round(density * len(cells))))
+
+    def neighbors(i, j):
+        return [(i + di, j + dj) for di in (-1, 0, 1) for dj in (-1, 0, 1)
+                if (di or dj) and 0 <= i + di < rows and 0 <= j + dj < columns]
+
+    cnf = CNF()
+    square = {cell: cnf.variable(Atom(f'{cell[0]}_{cell[1]}')) for cell in cells}
+    empty = [cell for cell in cells if cell not in mined and not any(other in mined for other in neighbors(*cell))]
+    revealed = set(empty).union(*(neighbors(*cell) for cell in empty))
+    for cell in sorted(revealed):
+        around = neighbors(*cell)
+        cnf.add_clause([-square[cell]])
+        exactly_k([square[other] for other in around], sum(other in mined for other in around), cnf)
+    return cnf
+
+
+def and_chain(n):
+    return reduce(And, [Atom(f'p{i}') for i in range(n)])
+
+
+def or_chain(n):
+    return reduce(Or, [Atom(f'p{i}') for i in range(n)])
@@ -0,0 +1,196 @@
+"""Times the transformations, evaluation and solving of the project on reproducible workloads and writes the
+results as JSON, so that runs on different commits can be compared.
+
+The workloads are built by benchmarks/generators.py: random 3-SAT at the phase transition, pigeonhole,
+parity chains, sudoku of several sizes, minesweeper boards and deep and_all/or_all chains. On each of them,
+the suite measures
+
+nnf_transform, cnf_direct_transform and cnf_tseitin_transform (from dpll.py);
+truth_value in a random interpretation and the whole truth_table (from semantics.py; only up to 16 atoms);
+solve: satisfiability_cdcl on the formula, and solve_cnf: dpll.Solver on the clauses of the generator.
+
+Each measurement is the best of --repeat runs, followed by one more run under tracemalloc for the peak memory
+(tracing slows the code down, so it is not part of the time). A failure, such as a RecursionError on the deep
+chains, is recorded as the error of that measurement instead of stopping the suite.
+cnf_direct_transform is exponential on parity, so it is only run on parity of up to 5 atoms, and or_chain stops
+at 10000 atoms, since its single long clause makes the solver quadratic.
+
+Run it from the root of the project with: python -m benchmarks.suite [--quick] [--output results.json]
+and compare two runs with: python -m benchmarks.suite --compare old.json new.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from functions import atoms
+from dpll import Solver, nnf_transform, cnf_direct_transform, cnf_tseitin_transform, satisfiability_cdcl
+from semantics import truth_value, truth_table
+from benchmarks import generators
+
+MAX_TABLE_ATOMS = 16
+MAX_DIRECT_PARITY = 5
+
+
+def workloads(quick=False):
+    """Yields triples (name, parameters, builder); builder() returns a formula or a CNF container."""
+    sizes = {
+        'random_3sat': [20, 50] if quick else [20, 50, 100],
+        'pigeonhole': [5] if quick else [5, 6, 7],
+        'parity': [5, 8] if quick else [5, 8, 12, 16],
+        'sudoku': [2, 3] if quick else [2, 3, 4],
+        'mines': [8] if quick else [8, 16, 32],
+        'and_chain': [1000] if quick else [1000, 10000, 100000],
+        'or_chain': [1000] if quick else [1000, 10000],
+    }
+    for n in sizes['random_3sat']:
+        yield 'random_3sat', {'variables': n}, lambda n=n: generators.random_ksat(n)
+    for n in sizes['pigeonhole']:
+        yield 'pigeonhole', {'holes': n}, lambda n=n: generators.pigeonhole(n)
+    for n in sizes['parity']:
+        yield 'parity', {'atoms': n}, lambda n=n: generators.parity(n)
+    for box in sizes['sudoku']:
+        yield 'sudoku', {'side': box * box}, lambda box=box: generators.sudoku(box)
+    for n in sizes['mines']:
+        yield 'mines', {'rows': n, 'columns': n}, lambda n=n: generators.mines(n, n)
+    for n in sizes['and_chain']:
+        yield 'and_chain', {'atoms': n}, lambda n=n: generators.and_chain(n)
+    for n in sizes['or_chain']:
+        yield 'or_chain', {'atoms': n}, lambda n=n: generators.or_chain(n)
+
+
+def operations(name, parameters, formula, cnf):
+    """Returns the pairs (operation, function of no arguments) that are measured on a workload."""
+    list_atoms = list(atoms(formula))
+    interpretation = {atom: value for atom, value in zip(list_atoms, _random_values(len(list_atoms)))}
+
+    def solve_cnf():
+        solver = Solver()
+        solver.add_cnf(cnf)
+        return solver.solve()
+
+    result = [('nnf_transform', lambda: nnf_transform(formula)),
+              ('cnf_tseitin_transform', lambda: cnf_tseitin_transform(formula)),
+              ('truth_value', lambda: truth_value(formula, interpretation)),
+              ('solve', lambda: satisfiability_cdcl(formula) is not False)]
+    if name != 'parity' or parameters['atoms'] <= MAX_DIRECT_PARITY:
+        result.insert(1, ('cnf_direct_transform', lambda: cnf_direct_transform(formula)))
+    if len(list_atoms) <= MAX_TABLE_ATOMS:
+        result.insert(-1, ('truth_table', lambda: sum(1 for row in truth_table(formula) if row[formula])))
+    if cnf is not None:
+        result.append(('solve_cnf', solve_cnf))
+    return result
+
+
+def _random_values(n):
+    rng = random.Random(0)
+    return [rng.random() < 0.5 for _ in range(n)]
+
+
+def measure(function, repeat):
+    """Returns a dictionary with the best time of repeat calls of function, the peak memory allocated by one more
+    call, and the value it returned (when it is a bool or an int), or the error it raised."""
+    record = {}
+    try:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            value = function()
+            times.append(time.perf_counter() - start)
+        tracemalloc.start()
+        try:
+            function()
+            record['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        record['seconds'] = min(times)
+        if isinstance(value, (bool, int)):
+            record['value'] = value
+    except (RecursionError, MemoryError) as error:
+        record['error'] = type(error).__name__
+    return record
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(quick=False, repeat=3, only=None, output=None):
+    """Runs the suite and returns its report (a dictionary); the report is also written to output, if given.
+    only restricts the workloads and operations to those whose names contain one of its strings."""
+    report = {'commit': _commit(), 'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+              'python': platform.python_version(), 'platform': platform.platform(), 'repeat': repeat, 'results': []}
+    for name, parameters, builder in workloads(quick):
+        start = time.perf_counter()
+        built = builder()
+        cnf, formula = (built, built.to_formula()) if hasattr(built, 'to_formula') else (None, built)
+        build_seconds = time.perf_counter() - start
+        label = name + ' ' + ' '.join(f'{key}={value}' for key, value in parameters.items())
+        for operation, function in operations(name, parameters, formula, cnf):
+            if only and not any(word in name or word in operation for word in only):
+                continue
+            record = dict(workload=name, parameters=parameters, operation=operation, build_seconds=build_seconds)
+            record.update(measure(function, repeat))
+            report['results'].append(record)
+            print(f'{label:28} {operation:22} {_describe(record)}', flush=True)
+    if output:
+        with open(output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=1)
+    return report
+
+
+def _describe(record):
+    if 'error' in record:
+        return record['error']
+    return f"{record['seconds']:12.6f} s {record['peak_bytes'] / 2 ** 20:10.2f} MiB"
+
+
+def _key(record):
+    return record['workload'], tuple(sorted(record['parameters'].items())), record['operation']
+
+
+def compare(old, new):
+    """Prints the ratio new / old of the time and of the peak memory of every measurement present in both
+    reports (a ratio above 1 is a slowdown)."""
+    before = {_key(record): record for record in old['results']}
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    for record in new['results']:
+        previous = before.get(_key(record))
+        if previous is None:
+            continue
+        name, parameters, operation = _key(record)
+        label = name + ' ' + ' '.join(f'{key}={value}' for key, value in parameters)
+        if 'error' in record or 'error' in previous:
+            print(f"{label:28} {operation:22} {previous.get('error', 'ok')} -> {record.get('error', 'ok')}")
+            continue
+        time_ratio = record['seconds'] / max(previous['seconds'], 1e-9)
+        memory_ratio = max(record['peak_bytes'], 1) / max(previous['peak_bytes'], 1)
+        print(f'{label:28} {operation:22} time x{time_ratio:6.2f}   memory x{memory_ratio:6.2f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks of the transformations, evaluation and solving.')
+    parser.add_argument('--quick', action='store_true', help='only the smallest instance sizes')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement (the best one is kept)')
+    parser.add_argument('--only', nargs='*', help='workloads or operations to run (substrings of their names)')
+    parser.add_argument('--output', help='file where the JSON report is written')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two JSON reports and exit')
+    args = parser.parse_args()
+    if args.compare:
+        reports = []
+        for path in args.compare:
+            with open(path, encoding='utf-8') as file:
+                reports.append(json.load(file))
+        compare(*reports)
+        sys.exit()
+    run(args.quick, args.repeat, args.only, args.output)
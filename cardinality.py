@@ -0,0 +1,229 @@
+"""The goal in this module is to encode cardinality constraints, such as "at most k of these literals are true",
+as clauses in a CNF container (see cnf.py). For example, the following piece of code requires that exactly
+two of the atoms p, q, r and s are true.
+
+cnf = exactly_k([Atom('p'), Atom('q'), Atom('r'), Atom('s')], 2)
+
+Literals are given as atoms, negated atoms or DIMACS integers. The encodings may create auxiliary variables
+in the CNF; all constraints of one problem must therefore be written into the same container, so that the
+auxiliary variables of different constraints are different. For the same reason, the variables of integer
+literals must be created in the CNF (see CNF.new_variable) before the first constraint is added.
+
+The encodings are:
+
+'pairwise': one clause for each set of k + 1 literals (no auxiliary variables, but O(n^(k+1)) clauses);
+'sequential': the sequential counter of Sinz (2005), O(nk) clauses;
+'totalizer': the totalizer of Bailleux and Boufkhad (2003), a tree of unary adders, O(nk) clauses;
+'network': a cardinality network (Asín et al., 2011), an odd-even merge sort network truncated at k + 1 outputs,
+O(n log^2 k) clauses;
+'commander': the commander encoding (Klieber and Kwon, 2007, generalized to k by Frisch and Giannaros, 2010),
+for small k;
+'product': the product encoding of Chen (2010), for k = 1 only.
+
+at_least_k is encoded as at most n - k of the negated literals. Since the commander and product encodings are
+only meant for small bounds, at_least_k uses the sequential counter instead of them, and exactly_k with
+'commander' uses the same commanders for both bounds.
+"""
+
+from itertools import combinations
+from math import ceil, isqrt
+
+from cnf import CNF
+
+ENCODINGS = ('pairwise', 'sequential', 'totalizer', 'network', 'commander', 'product')
+
+
+def at_most_k(literals, k, cnf=None, encoding='sequential'):
+    """Adds to cnf (a new CNF by default) clauses that are satisfied only if at most k of the literals
+    are true, and returns cnf."""
+    if cnf is None:
+        cnf = CNF()
+    if encoding not in ENCODINGS:
+        raise ValueError(f'unknown encoding: {encoding}')
+    literals = _literals(literals, cnf)
+    if k < 0:
+        cnf.add_clause([])
+    elif k == 0:
+        for lit in literals:
+            cnf.add_clause([-lit])
+    elif k < len(literals):
+        if encoding == 'product' and k != 1:
+            raise ValueError('the product encoding only supports k = 1')
+        _ENCODERS[encoding](literals, k, cnf)
+    return cnf
+
+
+def at_least_k(literals, k, cnf=None, encoding='sequential'):
+    """Adds to cnf (a new CNF by default) clauses that are satisfied only if at least k of the literals
+    are true, and returns cnf."""
+    if cnf is None:
+        cnf = CNF()
+    if encoding not in ENCODINGS:
+        raise ValueError(f'unknown encoding: {encoding}')
+    literals = _literals(literals, cnf)
+    if k == 1:
+        cnf.add_clause(literals)
+        return cnf
+    if encoding in ('commander', 'product'):
+        encoding = 'sequential'
+    return at_most_k([-lit for lit in literals], len(literals) - k, cnf, encoding)
+
+
+def exactly_k(literals, k, cnf=None, encoding='sequential'):
+    """Adds to cnf (a new CNF by default) clauses that are satisfied only if exactly k of the literals
+    are true, and returns cnf."""
+    if cnf is None:
+        cnf = CNF()
+    if encoding not in ENCODINGS:
+        raise ValueError(f'unknown encoding: {encoding}')
+    literals = _literals(literals, cnf)
+    if encoding == 'commander' and 0 < k < len(literals):
+        _commander(literals, k, cnf, exact=True)
+        return cnf
+    at_most_k(literals, k, cnf, encoding)
+    at_least_k(literals, k, cnf, encoding)
+    return cnf
+
+
+def _literals(literals, cnf):
+    # integer literals of the given ones; integer variables beyond cnf.num_vars are created first,
+    # so that auxiliary variables never collide with them
+    result = [lit if isinstance(lit, int) else cnf.literal(lit) for lit in literals]
+    top = max((abs(lit) for lit in result), default=0)
+    while cnf.num_vars < top:
+        cnf.new_variable()
+    return result
+
+
+def _pairwise(literals, k, cnf):
+    for subset in combinations(literals, k + 1):
+        cnf.add_clause([-lit for lit in subset])
+
+
+def _sequential(literals, k, cnf):
+    # s[i][j] is true if at least j + 1 of the first i + 1 literals are true
+    n = len(literals)
+    s = [[cnf.new_variable() for _ in range(k)] for _ in range(n - 1)]
+    cnf.add_clause([-literals[0], s[0][0]])
+    for j in range(1, k):
+        cnf.add_clause([-s[0][j]])
+    for i in range(1, n - 1):
+        x = literals[i]
+        cnf.add_clause([-x, s[i][0]])
+        cnf.add_clause([-s[i - 1][0], s[i][0]])
+        for j in range(1, k):
+            cnf.add_clause([-x, -s[i - 1][j - 1], s[i][j]])
+            cnf.add_clause([-s[i - 1][j], s[i][j]])
+        cnf.add_clause([-x, -s[i - 1][k - 1]])
+    cnf.add_clause([-literals[n - 1], -s[n - 2][k - 1]])
+
+
+def _totalizer(literals, k, cnf):
+    # each node returns its unary outputs: output i is true if at least i + 1 literals below are true
+    def count(literals):
+        if len(literals) == 1:
+            return literals
+        middle = len(literals) // 2
+        left, right = count(literals[:middle]), count(literals[middle:])
+        outputs = [cnf.new_variable() for _ in range(min(len(left) + len(right), k + 1))]
+        for a in range(len(left) + 1):
+            for b in range(len(right) + 1):
+                if a + b == 0:
+                    continue
+                clause = [outputs[min(a + b, len(outputs)) - 1]]
+                if a:
+                    clause.append(-left[a - 1])
+                if b:
+                    clause.append(-right[b - 1])
+                cnf.add_clause(clause)
+        return outputs
+
+    outputs = count(literals)
+    cnf.add_clause([-outputs[k]])
+
+
+def _network(literals, k, cnf):
+    # comparators only get the clauses that push true values up, which is enough for an upper bound
+    def comparator(a, b):
+        high, low = cnf.new_variable(), cnf.new_variable()
+        cnf.add_clause([-a, high])
+        cnf.add_clause([-b, high])
+        cnf.add_clause([-a, -b, low])
+        return [high, low]
+
+    def merge(a, b, limit):
+        # a and b are sorted (true values first); returns their first limit merged outputs
+        a, b = a[:limit], b[:limit]
+        if not a or not b:
+            return (a or b)[:limit]
+        if len(a) == 1 and len(b) == 1:
+            return comparator(a[0], b[0])[:limit]
+        odd = merge(a[0::2], b[0::2], limit)
+        even = merge(a[1::2], b[1::2], limit)
+        outputs = [odd[0]]
+        for i in range(min(len(even), len(odd) - 1)):
+            if len(outputs) >= limit:
+                break
+            outputs.extend(comparator(even[i], odd[i + 1]))
+        outputs.extend(even[len(odd) - 1:])
+        outputs.extend(odd[len(even) + 1:])
+        return outputs[:limit]
+
+    def sort(literals, limit):
+        if len(literals) == 1:
+            return literals
+        middle = len(literals) // 2
+        return merge(sort(literals[:middle], limit), sort(literals[middle:], limit), limit)
+
+    outputs = sort(literals, k + 1)
+    cnf.add_clause([-outputs[k]])
+
+
+def _at_least_binomial(literals, k, cnf):
+    for subset in combinations(literals, len(literals) - k + 1):
+        cnf.add_clause(list(subset))
+
+
+def _commander(literals, k, cnf, exact=False):
+    # groups of k + 2 literals; the k commanders of a group count (in unary) its true literals
+    group_size = k + 2
+    if len(literals) <= group_size:
+        _pairwise(literals, k, cnf)
+        if exact:
+            _at_least_binomial(literals, k, cnf)
+        return
+    commanders = []
+    for start in range(0, len(literals), group_size):
+        group = literals[start:start + group_size]
+        if len(group) <= k:
+            commanders.extend(group)
+            continue
+        local = [cnf.new_variable() for _ in range(k)]
+        extended = group + [-c for c in local]
+        _pairwise(extended, k, cnf)  # exactly k of the group and the negated commanders
+        _at_least_binomial(extended, k, cnf)
+        for j in range(1, k):
+            cnf.add_clause([-local[j], local[j - 1]])
+        commanders.extend(local)
+    _commander(commanders, k, cnf, exact)
+
+
+def _product(literals, k, cnf):
+    # literal number i is placed at (i // q, i % q) of a p x q grid and implies its row and its column
+    n = len(literals)
+    if n <= 4:
+        _pairwise(literals, 1, cnf)
+        return
+    p = ceil(n / isqrt(n))
+    q = ceil(n / p)
+    rows = [cnf.new_variable() for _ in range(p)]
+    columns = [cnf.new_variable() for _ in range(q)]
+    for i, lit in enumerate(literals):
+        cnf.add_clause([-lit, rows[i // q]])
+        cnf.add_clause([-lit, columns[i % q]])
+    _product(rows, 1, cnf)
+    _product(columns, 1, cnf)
+
+
+_ENCODERS = {'pairwise': _pairwise, 'sequential': _sequential, 'totalizer': _totalizer,
+             'network': _network, 'commander': _commander, 'product': _product}
@@ -0,0 +1,183 @@
+"""This module defines a compact container for formulas in conjunctive normal form.
+Clauses are stored as signed integer literals, as in the DIMACS format: variable 3 is the literal 3
+and its negation is -3. For example, the following piece of code creates a CNF representing
+(p v ¬q) ∧ q.
+
+cnf = CNF()
+cnf.add_clause([cnf.literal(Atom('p')), cnf.literal(Not(Atom('q')))])
+cnf.add_clause([cnf.literal(Atom('q'))])
+
+All literals are kept in one flat array('i') and clause k is literals[offsets[k]:offsets[k + 1]],
+so a CNF with millions of clauses costs four bytes per literal and eight bytes per clause.
+"""
+
+import json
+import mmap
+import os
+from array import array
+from functools import reduce
+
+from formula import Atom, Not, And, Or
+
+
+class CNF:
+    def __init__(self):
+        self.literals = array('i')
+        self.offsets = array('q', [0])
+        self.num_vars = 0
+        self.atoms = [None]  # atoms[v] is the atom of variable v, or None for auxiliary variables
+        self.variables = {}  # inverse map, from atoms to variables
+
+    def __len__(self):
+        """Returns the number of clauses."""
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        """Yields every clause as a memoryview of the literal array (no literal is copied).
+        The CNF cannot grow while one of these views is alive."""
+        view = memoryview(self.literals)
+        offsets = self.offsets
+        for k in range(len(offsets) - 1):
+            yield view[offsets[k]:offsets[k + 1]]
+
+    def clause(self, k):
+        """Returns clause k as a memoryview of the literal array."""
+        return memoryview(self.literals)[self.offsets[k]:self.offsets[k + 1]]
+
+    def new_variable(self):
+        """Creates an auxiliary variable, which is not associated with any atom, and returns it."""
+        self.num_vars += 1
+        self.atoms.append(None)
+        return self.num_vars
+
+    def variable(self, atom):
+        """Returns the variable of an atom, creating it if needed."""
+        v = self.variables.get(atom)
+        if v is None:
+            v = self.new_variable()
+            self.atoms[v] = atom
+            self.variables[atom] = v
+        return v
+
+    def literal(self, formula):
+        """Returns the integer literal of a formula of the form Atom or Not(Atom)."""
+        if isinstance(formula, Not):
+            return -self.variable(formula.inner)
+        return self.variable(formula)
+
+    def add_clause(self, literals):
+        """Appends a clause given as an iterable of integer literals."""
+        start = len(self.literals)
+        self.literals.extend(literals)
+        if len(self.literals) > start:
+            added = self.literals[start:]
+            top = max(max(added), -min(added))
+            while top > self.num_vars:
+                self.new_variable()
+        self.offsets.append(len(self.literals))
+
+    def interpretation(self, model):
+        """Converts a model over variables (for example, Solver.model) into a dictionary from atoms to truth values.
+        Auxiliary variables are left out."""
+        return {atom: model.get(v, False) for v, atom in enumerate(self.atoms) if atom is not None}
+
+    def _literal_formula(self, lit):
+        atom = self.atoms[abs(lit)]
+        if atom is None:
+            atom = Atom(f'x_{abs(lit)}')
+        return atom if lit > 0 else Not(atom)
+
+    def clause_formula(self, k):
+        """Returns clause k as a formula, that is, a disjunction of literals.
+        Auxiliary variable v is written as Atom('x_v'). Raises ValueError if the clause is empty,
+        since formula.py has no constant for false."""
+        if not self.clause(k):
+            raise ValueError(f'clause {k} is empty and cannot be written as a formula')
+        return reduce(Or, map(self._literal_formula, self.clause(k)))
+
+    def to_formula(self):
+        """Returns the CNF as a formula, that is, a conjunction of disjunctions of literals.
+        Auxiliary variable v is written as Atom('x_v'). Raises ValueError if the CNF has no clauses,
+        since formula.py has no constant for true."""
+        if not len(self):
+            raise ValueError('a CNF without clauses cannot be written as a formula')
+        return reduce(And, [self.clause_formula(k) for k in range(len(self))])
+
+    def write_dimacs(self, path):
+        """Writes the CNF to a file in DIMACS format. The names of the atoms are kept in comment lines
+        of the form 'c var <variable> <name>', where the name is a JSON string (so that it may contain spaces,
+        quotes and line breaks), which read_dimacs uses to rebuild the variable map.
+        Raises ValueError if the name of an atom is not a string."""
+        names = []
+        for v, atom in enumerate(self.atoms):
+            if atom is not None:
+                if not isinstance(atom.name, str):
+                    raise ValueError(f'the name of atom {atom!r} is not a string and cannot be written')
+                names.append(f'c var {v} {json.dumps(atom.name)}\n')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.writelines(names)
+            file.write(f'p cnf {self.num_vars} {len(self)}\n')
+            lines = []
+            for clause in self:
+                lines.append(' '.join(map(str, clause)) + ' 0\n')
+                if len(lines) == 4096:
+                    file.writelines(lines)
+                    lines.clear()
+            file.writelines(lines)
+
+    @classmethod
+    def read_dimacs(cls, path):
+        """Reads a CNF from a file in DIMACS format. The file is memory-mapped and parsed line by line,
+        so it is never loaded as a whole. A clause may span several lines, and a last clause without its
+        terminating 0 is closed at the end of the file. Parsing stops at a line starting with '%',
+        the end marker of the SATLIB benchmark files."""
+        cnf = cls()
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return cnf
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                declared_vars = 0
+                literals = cnf.literals
+                offsets = cnf.offsets
+                for line in iter(data.readline, b''):
+                    if line.startswith(b'c'):
+                        words = line.split(None, 3)
+                        if len(words) == 4 and words[1] == b'var':
+                            v = int(words[2])
+                            atom = Atom(_read_name(words[3]))
+                            while v > cnf.num_vars:
+                                cnf.new_variable()
+                            cnf.atoms[v] = atom
+                            cnf.variables[atom] = v
+                        continue
+                    if line.startswith(b'%'):
+                        break
+                    if line.startswith(b'p'):
+                        declared_vars = int(line.split()[2])
+                        continue
+                    values = array('i', map(int, line.split()))
+                    if values and values[-1] == 0 and 0 not in values[:-1]:
+                        literals.extend(values[:-1])
+                        offsets.append(len(literals))
+                        continue
+                    for value in values:
+                        if value == 0:
+                            offsets.append(len(literals))
+                        else:
+                            literals.append(value)
+                if len(literals) > offsets[-1]:
+                    offsets.append(len(literals))  # the last clause is not terminated by 0
+                if literals:
+                    declared_vars = max(declared_vars, max(literals), -min(literals))
+                while declared_vars > cnf.num_vars:
+                    cnf.new_variable()
+        return cnf
+
+
+def _read_name(text):
+    # the JSON string written by write_dimacs, or the rest of the line as it is (as in files written without JSON)
+    try:
+        name = json.loads(text)
+    except ValueError:
+        name = None
+    return name if isinstance(name, str) else text.rstrip(b'\r\n').decode('utf-8')
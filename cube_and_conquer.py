@@ -0,0 +1,183 @@
+"""The goal in this module is to split a large satisfiability problem into many small ones and solve them in parallel.
+
+Cube-and-conquer (Heule et al., 2011) has two phases:
+
+cubing: a lookahead procedure splits the search space into cubes (conjunctions of literals) that together cover
+every assignment. At each step it tries both values of the most promising variables, keeps the variable whose two
+branches propagate the most, and learns the failed literals (those whose propagation ends in a conflict);
+
+conquering: CDCL workers solve the CNF under the assumptions of each cube. A worker keeps one incremental solver
+for all its cubes, so the clauses learned on a cube help with the next ones.
+
+The CNF is satisfiable if and only if some cube is, and the run stops at the first satisfiable cube.
+The cubes are split between the workers in contiguous ranges; a worker that runs out of cubes steals the
+second half of the largest remaining range of another worker.
+"""
+
+import os
+import queue
+import time
+from collections import Counter, deque
+from multiprocessing import get_context
+
+from cnf import CNF
+from dpll import Solver
+from portfolio import share_cnf, attach_cnf
+
+
+def make_cubes(cnf, max_cubes=1024, candidates=16):
+    """Returns a list of cubes (lists of DIMACS literals) whose disjunction, together with the CNF, is equivalent
+    to the CNF. Cubes are split breadth first, so they have about the same number of decisions, until there are
+    max_cubes of them. Only the candidates unassigned variables with the most occurrences are looked ahead.
+    An empty list means that the lookahead proved the CNF unsatisfiable."""
+    solver = Solver()
+    solver.add_cnf(cnf)
+    occurrences = Counter(abs(lit) for lit in cnf.literals)
+    ranking = [v for v, _ in occurrences.most_common()]
+    done = []
+    pending = deque([[]])
+    while pending and len(done) + len(pending) < max_cubes:
+        cube = pending.popleft()
+        base = solver.implied(cube)
+        if base is None:
+            continue
+        while True:
+            assigned = {abs(lit) for lit in base}
+            variables = [v for v in ranking if v not in assigned and solver.value[2 * v] is None][:candidates]
+            best, best_score, failed = None, -1, None
+            for v in variables:
+                positive, negative = solver.implied(cube + [v]), solver.implied(cube + [-v])
+                if positive is None or negative is None:
+                    failed = (v, positive, negative)
+                    break
+                score = (len(positive) - len(base)) * (len(negative) - len(base))
+                if score > best_score:
+                    best, best_score = v, score
+            if failed is None:
+                break
+            v, positive, negative = failed
+            if positive is None and negative is None:
+                base = None
+                break
+            cube = cube + ([-v] if positive is None else [v])  # a failed literal: only the other side remains
+            base = negative if positive is None else positive
+        if base is None:
+            continue
+        if best is None:
+            done.append(cube)
+        else:
+            pending.append(cube + [best])
+            pending.append(cube + [-best])
+    return done + list(pending)
+
+
+def _take(bounds, worker, workers):
+    # index of the next cube of worker, stealing half of the largest remaining range when its own is empty
+    with bounds.get_lock():
+        head, tail = bounds[2 * worker], bounds[2 * worker + 1]
+        if head >= tail:
+            victim = max(range(workers), key=lambda k: bounds[2 * k + 1] - bounds[2 * k])
+            head, tail = bounds[2 * victim], bounds[2 * victim + 1]
+            if head >= tail:
+                return None
+            middle = (head + tail) // 2
+            bounds[2 * victim + 1] = middle
+            head = middle
+        bounds[2 * worker] = head + 1
+        bounds[2 * worker + 1] = tail
+        return head
+
+
+def _conquer(worker, workers, cnf_name, cubes_name, bounds, stop, results):
+    cnf = attach_cnf(cnf_name)
+    cubes = attach_cnf(cubes_name)
+    solver = Solver(seed=worker if worker else None)
+    solver.add_cnf(cnf)
+    solver.on_restart = lambda solver: stop.is_set()
+    while not stop.is_set():
+        index = _take(bounds, worker, workers)
+        if index is None:
+            break
+        cube = list(cubes.clause(index))
+        conflicts, decisions, start = solver.conflicts, solver.decisions, time.perf_counter()
+        result = solver.solve(cube)
+        if result is None:
+            break
+        record = {'cube': index, 'worker': worker, 'literals': len(cube), 'result': result,
+                  'conflicts': solver.conflicts - conflicts, 'decisions': solver.decisions - decisions,
+                  'seconds': time.perf_counter() - start, 'core': len(solver.core)}
+        results.put((record, solver.model if result else None))
+        if result:
+            break
+    results.put((None, worker))
+
+
+def cube_and_conquer(cnf, workers=None, max_cubes=1024, candidates=16, progress=None, timeout=None):
+    """Solves a CNF container (see cnf.py) by cube-and-conquer.
+    Returns a model (a dictionary from variables to truth values, as Solver.model) if the CNF is satisfiable,
+    False if it is unsatisfiable, or None if there was no answer within timeout seconds. Raises RuntimeError
+    if a worker exits without finishing its cubes.
+
+    If progress is given, it is called with a dictionary for every solved cube, with the keys cube (its index),
+    worker, literals (its size), result, conflicts, decisions, seconds, core (the number of its literals needed
+    for a refutation), solved (the cubes solved so far) and total (the number of cubes)."""
+    cubes = make_cubes(cnf, max_cubes, candidates)
+    if not cubes:
+        return False
+    workers = min(workers or os.cpu_count() or 1, len(cubes))
+    container = CNF()
+    for cube in cubes:
+        container.add_clause(cube)
+    context = get_context()
+    cnf_block, cubes_block = share_cnf(cnf), share_cnf(container)
+    share = len(cubes) // workers
+    bounds = context.Array('q', [value for k in range(workers)
+                                 for value in (k * share, len(cubes) if k == workers - 1 else (k + 1) * share)])
+    stop = context.Event()
+    results = context.Queue()
+    processes = [context.Process(target=_conquer, daemon=True,
+                                 args=(k, workers, cnf_block.name, cubes_block.name, bounds, stop, results))
+                 for k in range(workers)]
+    answer = None
+    solved = 0
+    finished = set()  # workers that posted their final (None, worker)
+    start = time.perf_counter()
+    try:
+        for process in processes:
+            process.start()
+        while len(finished) < workers:
+            remaining = None if timeout is None else timeout - (time.perf_counter() - start)
+            if remaining is not None and remaining <= 0:
+                break
+            try:
+                record, model = results.get(timeout=0.05 if remaining is None else min(remaining, 0.05))
+            except queue.Empty:
+                # a worker that died (an exception, or killed by the system) never posts its sentinel
+                lost = [process.exitcode for k, process in enumerate(processes)
+                        if k not in finished and process.exitcode is not None]
+                if lost and results.empty():
+                    raise RuntimeError(f'cube-and-conquer workers exited without an answer (exit codes {lost})')
+                continue
+            if record is None:
+                finished.add(model)
+                continue
+            solved += 1
+            if progress is not None:
+                progress(dict(record, solved=solved, total=len(cubes)))
+            if record['result']:
+                answer = model
+                break
+        else:
+            answer = False if solved == len(cubes) else None
+    finally:
+        stop.set()
+        for process in processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        results.close()
+        for block in (cnf_block, cubes_block):
+            block.close()
+            block.unlink()
+    return answer
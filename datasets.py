@@ -0,0 +1,232 @@
+"""The goal in this module is to load the binarized datasets of the project (such as
+iris_features_binarized_setosa_others.csv) as packed bit columns and to score formulas on them, such as the
+rules learned by rule_learning.py, without evaluating them row by row.
+
+Column f of a dataset is a sequence of 64-bit words in which bit j of word w is the value of feature f in row
+64 * w + j; the class is stored the same way, with one column per class value. A formula over atoms named after
+the features, such as Or(Atom('petal length (cm) <= 1.5'), Not(Atom('sepal width (cm) <= 2.7'))), is then
+evaluated on all rows at once by bitwise operations on the columns of its atoms, so its coverage, accuracy and
+confusion matrix cost a few operations per 64 rows.
+
+The CSV file is read as a stream, 64 rows at a time, and the columns are written to a binary sidecar file
+(the path of the CSV file with '.bits' appended). Later loads map the sidecar file into memory instead of
+parsing the CSV file again, as long as the size and the modification time of the CSV file are unchanged.
+Columns are numpy uint64 arrays when numpy is available (mapped with numpy.memmap), and Python integers
+(bit k is row k) otherwise.
+"""
+
+import csv
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+from formula import Atom, Not, And, Or, Implies
+from functions import postorder
+
+try:
+    import numpy as np
+except ImportError:  # columns are then Python integers
+    np = None
+
+MAGIC = b'LCBITS01'
+HEADER = struct.Struct('<8sqqqqqq')  # magic, rows, features, classes, words, CSV size, CSV mtime (ns)
+
+
+class Dataset:
+    """A binarized dataset stored by columns. features and classes are the names of the feature columns and
+    the class values; columns and class_columns hold their bit columns (see the module docstring)."""
+
+    def __init__(self, features, classes, num_rows, columns, class_columns):
+        self.features = features
+        self.classes = classes
+        self.num_rows = num_rows
+        self.columns = columns
+        self.class_columns = class_columns
+        self.index = {name: f for f, name in enumerate(features)}
+
+    def column(self, atom):
+        """Returns the bit column of a feature, given as an atom or as its name."""
+        name = atom.name if isinstance(atom, Atom) else atom
+        if name not in self.index:
+            raise KeyError(f'{name} is not a feature of the dataset')
+        return self.columns[self.index[name]]
+
+    def class_column(self, value):
+        """Returns the bit column of the rows whose class is value."""
+        return self.class_columns[self.classes.index(value)]
+
+    def all_rows(self):
+        """Returns the column with one bit set for every row."""
+        if np is None:
+            return (1 << self.num_rows) - 1
+        words = np.full(_words(self.num_rows), np.uint64(0xFFFFFFFFFFFFFFFF), dtype=np.uint64)
+        if self.num_rows % 64:
+            words[-1] = np.uint64((1 << self.num_rows % 64) - 1)
+        return words
+
+
+def _words(num_rows):
+    return (num_rows + 63) // 64
+
+
+def load(path, cache=True):
+    """Returns the Dataset of a binarized CSV file whose last column is the class and the others are 0/1
+    features. With cache=True, the sidecar file is used when it is up to date, and written otherwise; if it cannot
+    be written (for example, in a read-only directory), the columns are kept in memory."""
+    sidecar = path + '.bits'
+    if cache:
+        dataset = _read_sidecar(path, sidecar)
+        if dataset is not None:
+            return dataset
+    features, classes, num_rows, words = _read_csv(path)
+    if cache and _write_sidecar(path, sidecar, features, classes, num_rows, words):
+        dataset = _read_sidecar(path, sidecar)
+        if dataset is not None:
+            return dataset
+    if np is None:
+        columns = [sum(word << 64 * w for w, word in enumerate(column)) for column in words]
+    else:
+        columns = np.array(words, dtype=np.uint64).reshape(len(words), _words(num_rows))
+    return Dataset(features, classes, num_rows, columns[:len(features)], columns[len(features):])
+
+
+def _read_csv(path):
+    # returns the feature names, the class values, the number of rows and the columns as lists of words,
+    # the class columns after the feature columns
+    with open(path, newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        num_features = len(header) - 1
+        classes = []
+        words = [[] for _ in range(num_features)]
+        class_words = []
+        current = [0] * num_features
+        current_classes = []
+        num_rows = 0
+        for record in reader:
+            if not record:
+                continue
+            bit = 1 << num_rows % 64
+            for f in range(num_features):
+                if record[f].strip() == '1':
+                    current[f] |= bit
+            value = record[-1].strip()
+            if value not in classes:
+                classes.append(value)
+                class_words.append([0] * (num_rows // 64))  # the words already flushed
+                current_classes.append(0)
+            current_classes[classes.index(value)] |= bit
+            num_rows += 1
+            if num_rows % 64 == 0:
+                for column, word in zip(words + class_words, current + current_classes):
+                    column.append(word)
+                current = [0] * num_features
+                current_classes = [0] * len(classes)
+        if num_rows % 64:
+            for column, word in zip(words + class_words, current + current_classes):
+                column.append(word)
+    return header[:-1], classes, num_rows, words + class_words
+
+
+def _write_sidecar(path, sidecar, features, classes, num_rows, words):
+    # writes the sidecar file through a temporary file of its own, so that processes loading the same CSV file
+    # do not write over each other; returns False if the file could not be written
+    names = json.dumps({'features': features, 'classes': classes}).encode('utf-8')
+    names += b' ' * (-len(names) % 8)
+    try:
+        status = os.stat(path)
+        handle, temporary = tempfile.mkstemp(suffix='.tmp', prefix=os.path.basename(sidecar) + '.',
+                                             dir=os.path.dirname(sidecar) or '.')
+    except OSError:
+        return False
+    try:
+        with os.fdopen(handle, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, num_rows, len(features), len(classes), _words(num_rows),
+                                   status.st_size, status.st_mtime_ns))
+            file.write(struct.pack('<q', len(names)) + names)
+            for column in words:
+                file.write(struct.pack(f'<{len(column)}Q', *column))
+        os.replace(temporary, sidecar)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def _read_sidecar(path, sidecar):
+    # returns the Dataset of an up-to-date sidecar file, or None
+    try:
+        status = os.stat(path)
+        with open(sidecar, 'rb') as file:
+            magic, num_rows, num_features, num_classes, words, size, mtime = HEADER.unpack(file.read(HEADER.size))
+            if magic != MAGIC or size != status.st_size or mtime != status.st_mtime_ns:
+                return None
+            (length,) = struct.unpack('<q', file.read(8))
+            names = json.loads(file.read(length))
+    except (OSError, struct.error, ValueError):
+        return None
+    offset = HEADER.size + 8 + length
+    shape = (num_features + num_classes, words)
+    if np is not None:
+        columns = np.memmap(sidecar, dtype='<u8', mode='r', offset=offset, shape=shape)
+    else:
+        with open(sidecar, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            columns = [int.from_bytes(data[offset + 8 * words * c:offset + 8 * words * (c + 1)], 'little')
+                       for c in range(shape[0])]
+    return Dataset(names['features'], names['classes'], num_rows, columns[:num_features], columns[num_features:])
+
+
+def bit_column(formula, dataset):
+    """Returns the bit column of the rows of dataset where formula is true. The formula is evaluated once for
+    every distinct subformula, by bitwise operations on whole columns."""
+    rows = dataset.all_rows()
+
+    def combine(node, values):
+        if isinstance(node, Atom):
+            return dataset.column(node)
+        if isinstance(node, Not):
+            return ~values[0] & rows
+        if isinstance(node, And):
+            return values[0] & values[1]
+        if isinstance(node, Or):
+            return values[0] | values[1]
+        if isinstance(node, Implies):
+            return ~values[0] & rows | values[1]
+        raise TypeError(f'{node} is not a propositional formula')
+
+    return postorder(formula, combine, memo=True)
+
+
+def count(column):
+    """Returns the number of bits set in a column."""
+    if np is None:
+        return column.bit_count()
+    if hasattr(np, 'bitwise_count'):
+        return int(np.bitwise_count(column).sum())
+    return int(np.unpackbits(np.ascontiguousarray(column).view(np.uint8)).sum())
+
+
+def evaluate(formula, dataset, positive=None):
+    """Scores formula as a classifier of the rows of dataset whose class is positive (by default, the first
+    class of the file). Returns a dictionary with the confusion matrix (true_positives, false_positives,
+    false_negatives and true_negatives), the coverage (the fraction of rows where formula is true)
+    and the accuracy (the fraction of rows classified correctly)."""
+    if positive is None:
+        positive = dataset.classes[0]
+    predicted = bit_column(formula, dataset)
+    actual = dataset.class_column(positive)
+    rows = dataset.all_rows()
+    true_positives = count(predicted & actual)
+    false_positives = count(predicted & ~actual & rows)
+    false_negatives = count(~predicted & actual & rows)
+    true_negatives = dataset.num_rows - true_positives - false_positives - false_negatives
+    total = max(dataset.num_rows, 1)
+    return {'true_positives': true_positives, 'false_positives': false_positives,
+            'false_negatives': false_negatives, 'true_negatives': true_negatives,
+            'coverage': (true_positives + false_positives) / total,
+            'accuracy': (true_positives + true_negatives) / total}
@@ -0,0 +1,216 @@
+"""The goal in this module is to compile formulas into deterministic decomposable negation normal form (d-DNNF),
+a kind of circuit on which many queries take time linear in the size of the circuit.
+
+A formula is compiled once, and then satisfiability, model counting, conditioning and entailment of literals
+are answered by a single pass over the circuit. For example:
+
+circuit = from_formula(Implies(Atom('p'), And(Atom('q'), Atom('r'))))
+circuit.count_models()          # models over the variables of the circuit
+circuit.entails(Atom('q'), assumptions=[Atom('p')])    # True
+
+The compiler is a decision-DNNF compiler (as c2d and Dsharp): the trace of the exhaustive search of
+model_counting, where each decision on a variable x becomes an Or node with the branches x ∧ ... and ¬x ∧ ...
+(deterministic), and the components found after unit propagation become the children of an And node
+(decomposable). Every component is compiled once and shared through the component cache, so the circuit is a DAG.
+The circuit is also smooth: the branches of each Or node mention the same variables. The search is the one of
+model_counting.search, which keeps its frames on an explicit stack instead of recursing.
+"""
+
+import math
+
+from formula import Atom, Not, And, Or
+from cnf import CNF
+from dpll import tseitin_cnf
+from model_counting import condition, search
+
+LITERAL, AND, OR = 0, 1, 2
+TRUE, FALSE = 0, 1  # the nodes And() and Or(), created with every circuit
+
+
+class DNNF:
+    """A circuit whose nodes are kept in a list in which every node comes after its children.
+    Node k is nodes[k] = (kind, value), where value is a DIMACS literal for LITERAL nodes
+    and a tuple of node indices for AND and OR nodes. Equal nodes are created only once."""
+
+    def __init__(self, num_vars=0, atoms=None):
+        self.nodes = []
+        self.unique = {}
+        self.num_vars = num_vars
+        self.variables = set()  # variables that occur in the circuit
+        self.atoms = atoms if atoms is not None else [None] * (num_vars + 1)
+        self.atom_variables = {atom: v for v, atom in enumerate(self.atoms) if atom is not None}
+        self.root = FALSE
+        self.conjoin(())
+        self.disjoin(())
+
+    def __len__(self):
+        """Returns the number of nodes."""
+        return len(self.nodes)
+
+    def _node(self, kind, value):
+        key = (kind, value)
+        index = self.unique.get(key)
+        if index is None:
+            index = len(self.nodes)
+            self.nodes.append(key)
+            self.unique[key] = index
+        return index
+
+    def literal(self, lit):
+        """Returns the node of a DIMACS literal."""
+        self.variables.add(abs(lit))
+        return self._node(LITERAL, lit)
+
+    def conjoin(self, children):
+        """Returns a node for the conjunction of the given nodes, which must not share variables."""
+        children = set(children)
+        children.discard(TRUE)
+        if FALSE in children:
+            return FALSE
+        if len(children) == 1:
+            return children.pop()
+        return self._node(AND, tuple(sorted(children)))
+
+    def disjoin(self, children):
+        """Returns a node for the disjunction of the given nodes, which must not have common models."""
+        children = set(children)
+        children.discard(FALSE)
+        if TRUE in children:
+            return TRUE
+        if len(children) == 1:
+            return children.pop()
+        return self._node(OR, tuple(sorted(children)))
+
+    def _variable(self, literal):
+        # DIMACS literal of an integer literal, an atom or a negated atom
+        if isinstance(literal, int):
+            return literal
+        if isinstance(literal, Not):
+            return -self._variable(literal.inner)
+        if literal in self.atom_variables:
+            return self.atom_variables[literal]
+        raise ValueError(f'{literal} is not a variable of the circuit')
+
+    def _fold(self, leaf, conjunction, disjunction):
+        # computes a value for every node from the values of its children, in a single pass over the list
+        values = []
+        for kind, value in self.nodes:
+            if kind == LITERAL:
+                values.append(leaf(value))
+            elif kind == AND:
+                values.append(conjunction(values[child] for child in value))
+            else:
+                values.append(disjunction(values[child] for child in value))
+        return values[self.root]
+
+    def is_satisfiable(self, assumptions=()):
+        """Returns True if the circuit has a model in which all the assumptions (literals) are true."""
+        false = {-self._variable(lit) for lit in assumptions}
+        if any(-lit in false for lit in false):
+            return False
+        return self._fold(lambda lit: lit not in false, all, any)
+
+    def count_models(self, assumptions=()):
+        """Returns the number of assignments to the variables 1, ..., num_vars that satisfy the circuit
+        and the assumptions (literals)."""
+        assumptions = {self._variable(lit) for lit in assumptions}
+        if any(-lit in assumptions for lit in assumptions):
+            return 0
+        false = {-lit for lit in assumptions}
+        count = self._fold(lambda lit: 0 if lit in false else 1, math.prod, sum)
+        fixed = {abs(lit) for lit in assumptions}
+        return count * 2 ** (self.num_vars - len(self.variables | fixed))
+
+    def entails(self, literal, assumptions=()):
+        """Returns True if the literal is true in every model of the circuit in which the assumptions are true."""
+        return not self.is_satisfiable(list(assumptions) + [-self._variable(literal)])
+
+    def condition(self, literals):
+        """Returns the circuit obtained by replacing each of the literals by true and its negation by false,
+        which represents the models of the circuit where the literals hold, with their variables left free."""
+        literals = {self._variable(lit) for lit in literals}
+        result = DNNF(self.num_vars, self.atoms)
+        reachable = self._reachable()
+        mapping = {}
+        for index, (kind, value) in enumerate(self.nodes):
+            if index not in reachable:
+                continue
+            if kind == LITERAL:
+                if value in literals:
+                    mapping[index] = TRUE
+                elif -value in literals:
+                    mapping[index] = FALSE
+                else:
+                    mapping[index] = result.literal(value)
+            elif kind == AND:
+                mapping[index] = result.conjoin(mapping[child] for child in value)
+            else:
+                mapping[index] = result.disjoin(mapping[child] for child in value)
+        result.root = mapping[self.root]
+        result.variables = self.variables - {abs(lit) for lit in literals}
+        return result
+
+    def _reachable(self):
+        # indices of the nodes below the root
+        reachable = {self.root}
+        for index in range(self.root, -1, -1):
+            kind, value = self.nodes[index]
+            if index in reachable and kind != LITERAL:
+                reachable.update(value)
+        return reachable
+
+    def to_formula(self):
+        """Returns the circuit as a formula in which each node of the circuit is a single shared Formula object.
+        Auxiliary variable v is written as Atom('x_v'). A circuit that is constantly true or false is returned
+        as the Python value True or False, since formulas have no constants."""
+        if self.root in (TRUE, FALSE):
+            return self.root == TRUE
+        reachable = self._reachable()
+        formulas = {}
+        for index, (kind, value) in enumerate(self.nodes):
+            if index not in reachable:
+                continue
+            if kind == LITERAL:
+                atom = self.atoms[abs(value)] if abs(value) < len(self.atoms) else None
+                if atom is None:
+                    atom = Atom(f'x_{abs(value)}')
+                formulas[index] = atom if value > 0 else Not(atom)
+            else:
+                operator = And if kind == AND else Or
+                children = [formulas[child] for child in value]
+                formula = children[0]
+                for child in children[1:]:
+                    formula = operator(formula, child)
+                formulas[index] = formula
+        return formulas[self.root]
+
+
+def compile_clauses(clauses, num_vars, atoms=None):
+    """Compiles a list of clauses (tuples of DIMACS literals) over the variables 1, ..., num_vars
+    into a smooth decision-DNNF circuit."""
+    circuit = DNNF(num_vars, atoms)
+    clauses, assigned = condition(clauses, [])
+    if clauses is None:
+        return circuit
+
+    def combine(assigned, free, values):
+        children = [circuit.literal(lit) for lit in assigned] + values
+        # smoothing: the variables that this branch leaves free are added as (v ∨ ¬v)
+        for v in free:
+            children.append(circuit.disjoin([circuit.literal(v), circuit.literal(-v)]))
+        return circuit.conjoin(children)
+
+    circuit.root = search(clauses, assigned, (), {}, combine, circuit.disjoin, FALSE)
+    return circuit
+
+
+def compile_cnf(cnf: CNF):
+    """Compiles a CNF container (see cnf.py) into a d-DNNF circuit over its variables."""
+    return compile_clauses([tuple(clause) for clause in cnf], cnf.num_vars, list(cnf.atoms))
+
+
+def from_formula(formula):
+    """Compiles a formula into a d-DNNF circuit, through a Tseitin encoding in which every auxiliary variable
+    is equivalent to its subformula. Every model of formula has exactly one extension to the auxiliary
+    variables, so the circuit has as many models as formula, and its literals can be given as atoms."""
+    return compile_cnf(tseitin_cnf(formula, polarity=False))
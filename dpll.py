@@ -1,115 +1,887 @@
 from formula import Atom, Not, Or, Implies, And
-from functions import is_cnf, subformulas
-from functools import reduce
+from functions import is_cnf, postorder
+from cnf import CNF
+from functools import wraps
+from collections import Counter
+from contextlib import contextmanager
+import heapq
+import random
+import time
+
+
+class Statistics:
+    """Counters and timings of a solver (see Solver.statistics) or of the transformations of this module
+    (see transform_statistics). counts maps the name of an event to the number of times it happened and
+    seconds maps the name of a phase to the time spent in it; both are Counters, so the statistics of
+    several runs can be added with merge. A counter can also be read as an attribute (stats.conflicts),
+    which is 0 for a known counter that never happened; any other name raises AttributeError."""
+
+    COUNTERS = frozenset({'solves', 'decisions', 'propagations', 'conflicts', 'restarts', 'learned', 'deleted',
+                          'reductions', 'variables', 'clauses', 'learnts', 'clause_literals', 'learnt_literals',
+                          'nnf_transform', 'cnf_direct_transform', 'tseitin_cnf', 'cnf_tseitin_transform'})
+
+    def __init__(self, counts=None, seconds=None):
+        self.counts = Counter(counts or {})
+        self.seconds = Counter(seconds or {})
+
+    def __getattr__(self, name):
+        # only called for names that are not attributes; counts is looked up in __dict__, since it is
+        # missing while copy and pickle rebuild the object
+        counts = self.__dict__.get('counts', {})
+        if name in counts or name in self.COUNTERS:
+            return counts.get(name, 0)
+        raise AttributeError(f"'Statistics' object has no attribute or counter {name!r}")
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        self.seconds.update(other.seconds)
+        return self
+
+    def as_dict(self):
+        return {'counts': dict(self.counts), 'seconds': dict(self.seconds)}
+
+    def __str__(self):
+        lines = [f'{name:20} {count:12}' for name, count in self.counts.items()]
+        lines += [f'{name:20} {seconds:12.4f} s' for name, seconds in self.seconds.items()]
+        return '\n'.join(lines)
+
+
+_transform_statistics = []
+
+
+@contextmanager
+def transform_statistics(statistics=None):
+    """Records the calls of the transformations of this module (nnf_transform, cnf_direct_transform,
+    tseitin_cnf, cnf_tseitin_transform) made while the block runs, into statistics (a new Statistics
+    by default), which the block receives. For example,
+
+    with transform_statistics() as stats:
+        cnf_tseitin_transform(formula)
+    stats.counts['tseitin_cnf']     # 1
+    stats.seconds['tseitin_cnf']    # time spent in it, including the transformations it calls
+
+    Outside of such a block, a transformation only pays for one list check."""
+    if statistics is None:
+        statistics = Statistics()
+    _transform_statistics.append(statistics)
+    try:
+        yield statistics
+    finally:
+        _transform_statistics.pop()
+
+
+def _instrumented(function):
+    name = function.__name__
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        if not _transform_statistics:
+            return function(*args, **kwargs)
+        statistics = _transform_statistics[-1]
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            statistics.counts[name] += 1
+            statistics.seconds[name] += time.perf_counter() - start
+
+    return wrapper
+
 
 def remove_implies(formula):
-    if isinstance(formula, Not):
-        return Not(remove_implies(formula.inner))
-    if isinstance(formula, And):
-        return And(remove_implies(formula.left), remove_implies(formula.right))
-    if isinstance(formula, Or):
-        return Or(remove_implies(formula.left), remove_implies(formula.right))
-    if isinstance(formula, Implies):
-        return Or(Not(remove_implies(formula.left)), remove_implies(formula.right))
-    return formula
+    def combine(node, values):
+        if isinstance(node, Not):
+            return Not(values[0])
+        if isinstance(node, And):
+            return And(values[0], values[1])
+        if isinstance(node, Or):
+            return Or(values[0], values[1])
+        if isinstance(node, Implies):
+            return Or(Not(values[0]), values[1])
+        return node
+
+    return postorder(formula, combine, memo=True)
 
 def de_morgan(formula):
-    if isinstance(formula, Not):
-        if isinstance(formula.inner, (Or, And)):
-            left = de_morgan(formula.inner.left)
-            right = de_morgan(formula.inner.right)
-            if isinstance(formula.inner, Or):
-                return And(Not(left), Not(right))
-            if isinstance(formula.inner, And):
-                return Or(Not(left), Not(right))
-            return Not(de_morgan(formula.inner))
-    if isinstance(formula, And):
-        return And(de_morgan(formula.left), de_morgan(formula.right))
-    if isinstance(formula, Or):
-        return Or(de_morgan(formula.left), de_morgan(formula.right))
-    return formula
+    # de_morgan of a conjunction (disjunction) is a conjunction (disjunction) of de_morgan of its operands,
+    # so the operands of a negated one are read from the result of its inner formula
+    def combine(node, values):
+        if isinstance(node, Not):
+            if isinstance(node.inner, Or):
+                return And(Not(values[0].left), Not(values[0].right))
+            if isinstance(node.inner, And):
+                return Or(Not(values[0].left), Not(values[0].right))
+            return node
+        if isinstance(node, And):
+            return And(values[0], values[1])
+        if isinstance(node, Or):
+            return Or(values[0], values[1])
+        return node
+
+    return postorder(formula, combine, memo=True)
 
 def remove_double_negation(formula):
-    if isinstance(formula, Not):
-        if isinstance(formula.inner, Not):
-            return remove_double_negation(formula.inner.inner)
-        return Not(remove_double_negation(formula.inner))
-    if isinstance(formula, And):
-        return And(remove_double_negation(formula.left), remove_double_negation(formula.right))
-    if isinstance(formula, Or):
-        return Or(remove_double_negation(formula.left), remove_double_negation(formula.right))
-    return formula
+    def combine(node, values):
+        if isinstance(node, Not):
+            # values[0] is a negation if and only if node.inner is under an odd chain of negations
+            return values[0].inner if isinstance(values[0], Not) else Not(values[0])
+        if isinstance(node, And):
+            return And(values[0], values[1])
+        if isinstance(node, Or):
+            return Or(values[0], values[1])
+        return node
+
+    return postorder(formula, combine, memo=True)
 
 def or_distribuctive(formula):
-    if isinstance(formula, Or):
-        if isinstance(formula.left, And):
-            right = or_distribuctive(formula.right)
-            return And(
-                Or(or_distribuctive(formula.left.left), right),
-                Or(or_distribuctive(formula.left.right), right)
-            )
-        if isinstance(formula.right, And):
-            left = or_distribuctive(formula.left)
-            return And(
-                Or(left, or_distribuctive(formula.right.left)),
-                Or(left, or_distribuctive(formula.right.right))
-            )
-        return Or(or_distribuctive(formula.left), or_distribuctive(formula.right))
-    if isinstance(formula, And):
-        return And(or_distribuctive(formula.left), or_distribuctive(formula.right))
-    return formula
+    # as in de_morgan, the operands of a conjunction are read from its result
+    def combine(node, values):
+        if isinstance(node, Or):
+            if isinstance(node.left, And):
+                return And(Or(values[0].left, values[1]), Or(values[0].right, values[1]))
+            if isinstance(node.right, And):
+                return And(Or(values[0], values[1].left), Or(values[0], values[1].right))
+            return Or(values[0], values[1])
+        if isinstance(node, And):
+            return And(values[0], values[1])
+        return node
+
+    return postorder(formula, combine, memo=True)
+
+# for each connective, the connective of the result and the polarities of the operands, for a positive
+# and for a negative occurrence (see nnf_transform)
+_NNF_RULES = {
+    And: ((And, True, True), (Or, False, False)),
+    Or: ((Or, True, True), (And, False, False)),
+    Implies: ((Or, False, True), (And, True, False)),
+}
 
+@_instrumented
 def nnf_transform(formula):
-    formula = remove_implies(formula)
-    while True:
-        last = formula
-        formula = de_morgan(formula)
-        if formula == last:
-            break
-    return formula
+    """Returns a formula in negation normal form equivalent to formula: implications are removed and
+    negations are pushed down to the atoms, with double negations cancelled.
+
+    The formula is walked once, without recursion, carrying the polarity of each occurrence (whether it
+    is under an even or an odd number of negations): a node is converted once for each polarity it occurs
+    with, so subformulas shared by several parents stay shared and the result is linear in the size of
+    the formula. Connectives are rewritten by the table _NNF_RULES."""
+    results = {}  # (id(node), positive) -> result
+    stack = [(formula, True, False)]
+    while stack:
+        node, positive, expanded = stack.pop()
+        key = (id(node), positive)
+        if key in results:
+            continue
+        if isinstance(node, Not):
+            inner = (id(node.inner), not positive)
+            if inner in results:
+                results[key] = results[inner]
+            else:
+                stack.append((node, positive, True))
+                stack.append((node.inner, not positive, False))
+        elif type(node) in _NNF_RULES:
+            connective, left, right = _NNF_RULES[type(node)][0 if positive else 1]
+            if expanded:
+                results[key] = connective(results[(id(node.left), left)], results[(id(node.right), right)])
+            else:
+                stack.append((node, positive, True))
+                stack.append((node.right, right, False))
+                stack.append((node.left, left, False))
+        else:
+            results[key] = node if positive else Not(node)
+    return results[(id(formula), True)]
 
+@_instrumented
 def cnf_direct_transform(formula):
     formula = nnf_transform(formula)
-    formula = remove_double_negation(formula)
     while not is_cnf(formula):
         formula = or_distribuctive(formula)
     return formula
 
+def _flatten(formula, conjunctive, sign=True):
+    """Returns a list of pairs (subformula, sign) such that formula (negated, if sign is False) is equivalent to
+    the conjunction (or the disjunction, if conjunctive is False) of the signed subformulas, where the pair
+    (A, False) stands for (¬A). Negations are absorbed into the signs and nested connectives of the same kind
+    are merged, so, for example, _flatten(And(And(p, Not(q)), Not(Or(r, s))), True) returns
+    [(p, True), (q, False), (r, False), (s, False)]. No returned subformula is a negation."""
+    operands = []
+    stack = [(formula, sign)]
+    while stack:
+        node, sign = stack.pop()
+        if isinstance(node, Not):
+            stack.append((node.inner, not sign))
+        elif isinstance(node, And) and sign == conjunctive or isinstance(node, Or) and sign != conjunctive:
+            stack.append((node.right, sign))
+            stack.append((node.left, sign))
+        elif isinstance(node, Implies) and sign != conjunctive:
+            stack.append((node.right, sign))
+            stack.append((node.left, not sign))
+        else:
+            operands.append((node, sign))
+    return operands
+
+@_instrumented
+def tseitin_cnf(formula, cnf=None, polarity=True):
+    """Writes a Tseitin encoding of formula into a CNF container (a new one by default) and returns it.
+    The CNF is satisfiable if and only if formula is, and its models restricted to the atoms of formula
+    are models of formula.
+
+    Nested conjunctions and disjunctions are merged into n-ary gates and negations are pushed into the
+    literals, so only the And/Or/Implies nodes that are not merged get an auxiliary variable, and the
+    top-level conjunction of disjunctions becomes clauses directly. Gates are shared by all equal subformulas.
+
+    With polarity=True (the Plaisted-Greenbaum encoding), a gate only gets the clauses for the direction
+    its occurrences need: (variable -> subformula) for positive occurrences and (subformula -> variable)
+    for negative ones. With polarity=False, every gate variable is equivalent to its subformula, which
+    keeps the number of models. The formula is walked without recursion."""
+    if cnf is None:
+        cnf = CNF()
+    both = None if not polarity else True
+    gates = {}
+
+    def literal(node, sign, positive):
+        # literal that implies the signed node (positive) or is implied by it (not positive)
+        needed = positive if sign or positive is None else not positive
+        lit = cnf.variable(node) if isinstance(node, Atom) else gates[(node, needed)]
+        return lit if sign else -lit
+
+    def require(stack, operands, positive):
+        for node, sign in operands:
+            needed = positive if sign or positive is None else not positive
+            if not isinstance(node, Atom) and (node, needed) not in gates:
+                stack.append((node, needed, None))
+
+    roots = [(conjunct, sign, _flatten(conjunct, False, sign)) for conjunct, sign in _flatten(formula, True)]
+    stack = []
+    for conjunct, sign, operands in roots:
+        require(stack, operands, both)
+    while stack:
+        node, positive, operands = stack.pop()
+        if (node, positive) in gates:
+            continue
+        if operands is None:
+            operands = _flatten(node, isinstance(node, And))
+            stack.append((node, positive, operands))
+            require(stack, operands, positive)
+            continue
+        a = cnf.new_variable()
+        literals = [literal(operand, sign, positive) for operand, sign in operands]
+        if isinstance(node, And):
+            if positive is not False:
+                for lit in literals:
+                    cnf.add_clause([-a, lit])
+            if positive is not True:
+                cnf.add_clause([a] + [-lit for lit in literals])
+        else:
+            if positive is not False:
+                cnf.add_clause([-a] + literals)
+            if positive is not True:
+                for lit in literals:
+                    cnf.add_clause([a, -lit])
+        gates[(node, positive)] = a
+    for conjunct, sign, operands in roots:
+        cnf.add_clause([literal(operand, operand_sign, both) for operand, operand_sign in operands])
+    return cnf
+
 def to_cnf(formula):
-    subforms_not_atoms = list(filter(lambda x: not isinstance(x, Atom), subformulas(formula)))
-    vals = [Atom(f'x_{i}') for i in range(len(subforms_not_atoms))]
-    new_vals = dict(zip(subforms_not_atoms, vals)) 
-    print(vals, new_vals)
-    clauses = [] 
-    def get_clauses(formula):
-        if isinstance(formula, Atom):
-            return formula
-        a = new_vals[formula]
-        if isinstance(formula, Not):
-            b = get_clauses(formula.inner)
-            clauses.append(Or(Not(a), Not(b)))
-            clauses.append(Or(b, a))
-            return a
-        b = get_clauses(formula.left)
-        c = get_clauses(formula.right)
-        if isinstance(formula, And):
-            clauses.append(Or(Not(a), b))
-            clauses.append(Or(Not(a), c))
-            clauses.append(Or(a, Or(Not(b), Not(c))))
-        if isinstance(formula, Or):
-            clauses.append(Or(a, Not(b)))
-            clauses.append(Or(a, Not(c)))
-            clauses.append(Or(Not(a), Or(b, c)))
-        return a
-    get_clauses(formula)
-    new_formula = reduce(lambda x, y: And(x, y), clauses)
-    new_formula = And(new_formula, new_vals[formula])
-    return new_formula
+    return tseitin_cnf(formula).to_formula()
 
+@_instrumented
 def cnf_tseitin_transform(formula):
-    formula = nnf_transform(formula)
-    formula = remove_double_negation(formula)
-    return to_cnf(formula) 
+    return to_cnf(formula)
+
+
+def luby(i):
+    """Returns the i-th element (counting from 0) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ..."""
+    size, power = 1, 0
+    while size < i + 1:
+        power += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        power -= 1
+        i = i % size
+    return 2 ** power
+
+
+class Solver:
+    """Conflict-driven clause-learning (CDCL) SAT solver.
+
+    Variables are positive integers and literals are non-zero integers, as in the DIMACS format:
+    3 stands for variable 3 and -3 for its negation. For example,
+
+    solver = Solver()
+    solver.add_clause([1, -2])
+    solver.add_clause([2])
+    solver.solve()  # returns True
+    solver.model    # {1: True, 2: True}
+
+    The search uses two watched literals for unit propagation, first-UIP conflict analysis with
+    clause minimization, EVSIDS branching with phase saving, Luby restarts and deletion of learned
+    clauses with high literal block distance (LBD).
+
+    The solver is incremental: clauses and formulas may be added between calls to solve, which keeps
+    the clauses learned so far. Formulas are given with add_formula, and their atoms can be used
+    wherever a literal is expected:
+
+    solver = Solver()
+    solver.add_formula(Implies(Atom('p'), Atom('q')))
+    solver.push()
+    solver.add_formula(Not(Atom('q')))
+    solver.solve([Atom('p')])  # returns False, and solver.core is [variable of p]
+    solver.pop()               # forgets (¬q)
+    solver.solve([Atom('p')])  # returns True
+
+    Each scope opened by push has a selector variable s; the clauses added in the scope are stored as
+    (clause v ¬s) and s is assumed by every solve. Clauses learned from them therefore contain ¬s, and pop
+    deletes exactly those, keeping everything learned from the clauses outside the scope.
+    Selectors and the variables of atoms are created after the existing variables, so clauses written
+    with integers should only use variables created beforehand (for example, with new_var); an integer literal
+    on a selector raises ValueError.
+
+    Internally, literal v is encoded as 2 * v and literal -v as 2 * v + 1, so the negation of an
+    internal literal l is l ^ 1 and its variable is l >> 1.
+
+    The counters of the search (decisions, propagations, conflicts, restarts, learned and deleted clauses)
+    are plain attributes, always kept, and statistics() collects them together with the size of the clause
+    database. Two optional hooks report on a long solve: on_progress is called with the solver every
+    progress_interval conflicts, and profile() times the phases of the search. When they are not set,
+    the search pays for one attribute check per conflict.
+    """
+
+    PHASES = ('propagate', 'analyze', 'pick_branch_var', 'cancel_until', 'reduce_db')
+
+    def __init__(self, var_decay=0.95, restart_base=100, learnt_ratio=1 / 3, phase=False, seed=None):
+        self.var_decay = var_decay
+        self.restart_base = restart_base
+        self.learnt_ratio = learnt_ratio
+        self.default_phase = phase
+        self.random = random.Random(seed) if seed is not None else None
+        self.ok = True
+        self.num_vars = 0
+        self.clauses = []
+        self.learnts = []
+        self.lbd = {}
+        self.value = [None, None]
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.polarity = [phase]
+        self.seen = [False]
+        self.watches = [[], []]
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.order = []
+        self.var_inc = 1.0
+        self.max_learnts = 0
+        self.model = {}
+        self.core = []
+        self.assumptions = []
+        self.scopes = []
+        self.selectors = set()
+        self.cnf = None
+        self.decisions = 0
+        self.propagations = 0
+        self.conflicts = 0
+        self.restarts = 0
+        self.learned = 0
+        self.deleted = 0
+        self.reductions = 0
+        self.solves = 0
+        self.solve_seconds = 0.0
+        self.phase_seconds = None
+        self.on_restart = None
+        self.on_progress = None
+        self.progress_interval = 1000
+        self.next_progress = 0
+
+    def statistics(self):
+        """Returns a Statistics with the counters of all the solves so far, the current size of the clause
+        database (variables, clauses, learnts and their literals) and, in seconds, the time spent in solve
+        and in each phase of the search, if profile was called."""
+        counts = {'solves': self.solves, 'decisions': self.decisions, 'propagations': self.propagations,
+                  'conflicts': self.conflicts, 'restarts': self.restarts, 'learned': self.learned,
+                  'deleted': self.deleted, 'reductions': self.reductions, 'variables': self.num_vars,
+                  'clauses': len(self.clauses), 'learnts': len(self.learnts),
+                  'clause_literals': sum(map(len, self.clauses)), 'learnt_literals': sum(map(len, self.learnts))}
+        seconds = {'solve': self.solve_seconds}
+        seconds.update(self.phase_seconds or {})
+        return Statistics(counts, seconds)
+
+    def profile(self, marker=None):
+        """Starts timing the phases of the search (the methods named in PHASES, with a leading underscore).
+        The methods are replaced on this solver by timed wrappers, so a solver that is never profiled runs
+        the plain ones. If marker is given, it is called as marker(phase, True) when a phase starts and
+        marker(phase, False) when it ends; it can emit markers for an external profiler (such as perf) or
+        sample the state of the solver."""
+        if self.phase_seconds is not None:
+            return
+        self.phase_seconds = seconds = Counter()
+        for phase in self.PHASES:
+            method = getattr(self, '_' + phase)
+
+            def timed(*args, method=method, phase=phase):
+                if marker is not None:
+                    marker(phase, True)
+                start = time.perf_counter()
+                try:
+                    return method(*args)
+                finally:
+                    seconds[phase] += time.perf_counter() - start
+                    if marker is not None:
+                        marker(phase, False)
+
+            setattr(self, '_' + phase, timed)
+
+    def new_var(self):
+        """Creates a fresh variable and returns it."""
+        self.num_vars += 1
+        v = self.num_vars
+        self.value += [None, None]
+        self.level.append(0)
+        self.reason.append(None)
+        self.activity.append(self.random.random() * 1e-5 if self.random else 0.0)
+        self.polarity.append(self.default_phase)
+        self.seen.append(False)
+        self.watches += [[], []]
+        heapq.heappush(self.order, (-self.activity[v], v))
+        return v
+
+    def literal(self, literal):
+        """Returns the DIMACS literal of an integer literal, an atom or a negated atom.
+        Raises ValueError for an integer literal on the selector variable of a scope (see push), which only
+        push and pop may use."""
+        if isinstance(literal, int):
+            if self.selectors and abs(literal) in self.selectors:
+                raise ValueError(f'variable {abs(literal)} is the selector of a scope and cannot be used in a literal')
+            return literal
+        if self.cnf is None:
+            self.cnf = CNF()
+        while self.cnf.num_vars < self.num_vars:
+            self.cnf.new_variable()
+        result = self.cnf.literal(literal)
+        while self.num_vars < self.cnf.num_vars:
+            self.new_var()
+        return result
+
+    def interpretation(self):
+        """Returns the last model as a dictionary from the atoms used in add_formula to truth values."""
+        if self.cnf is None:
+            return {}
+        return self.cnf.interpretation(self.model)
+
+    def add_clause(self, literals):
+        """Adds a clause, given as an iterable of literals (integers, atoms or negated atoms), to the solver.
+        Inside a scope (see push), the clause is removed by the matching pop.
+        Returns False if the set of clauses became trivially unsatisfiable. Otherwise, it returns True."""
+        if not self.ok:
+            return False
+        self._cancel_until(0)
+        literals = [self.literal(literal) for literal in literals]
+        if self.scopes:
+            literals.append(-self.scopes[-1])
+        clause = []
+        for literal in literals:
+            while abs(literal) > self.num_vars:
+                self.new_var()
+            lit = 2 * literal if literal > 0 else -2 * literal + 1
+            if self.value[lit] is True or lit ^ 1 in clause:
+                return True
+            if self.value[lit] is None and lit not in clause:
+                clause.append(lit)
+        if not clause:
+            self.ok = False
+            return False
+        if len(clause) == 1:
+            self._enqueue(clause[0], None)
+            self.ok = self._propagate() is None
+            return self.ok
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+        return True
+
+    def add_cnf(self, cnf, start=0):
+        """Adds the clauses of a CNF container (see cnf.py), from clause number start on.
+        Its variables are used as the solver variables. Returns False if the clauses became trivially
+        unsatisfiable. Otherwise, it returns True."""
+        literals = cnf.literals
+        offsets = cnf.offsets
+        for k in range(start, len(cnf)):
+            self.add_clause(literals[offsets[k]:offsets[k + 1]])
+        while self.num_vars < cnf.num_vars:
+            self.new_var()
+        return self.ok
+
+    def add_formula(self, formula):
+        """Adds a propositional formula, through its Tseitin encoding (see tseitin_cnf).
+        Inside a scope (see push), the formula is removed by the matching pop.
+        Returns False if the set of clauses became trivially unsatisfiable. Otherwise, it returns True."""
+        if self.cnf is None:
+            self.cnf = CNF()
+        cnf = self.cnf
+        while cnf.num_vars < self.num_vars:
+            cnf.new_variable()
+        start = len(cnf)
+        tseitin_cnf(formula, cnf)
+        self.add_cnf(cnf, start)
+        # the container is only kept for its variable map
+        del cnf.literals[cnf.offsets[start]:]
+        del cnf.offsets[start + 1:]
+        return self.ok
+
+    def push(self):
+        """Opens a scope: the clauses and formulas added from now on are removed by the matching pop."""
+        selector = self.new_var()
+        self.selectors.add(selector)
+        self.scopes.append(selector)
+
+    def pop(self):
+        """Closes the innermost scope, removing its clauses and the learned clauses that depend on them."""
+        selector = self.scopes.pop()
+        self._cancel_until(0)
+        lit = 2 * selector + 1
+        if self.value[lit] is None:
+            self._enqueue(lit, None)
+            self.ok = self.ok and self._propagate() is None
+        self.clauses = [clause for clause in self.clauses if lit not in clause]
+        removed = set()
+        for clause in self.learnts:
+            if lit in clause:
+                removed.add(id(clause))
+                del self.lbd[id(clause)]
+        if removed:
+            self.learnts = [clause for clause in self.learnts if id(clause) not in removed]
+        self.watches = [[c for c in ws if lit not in c] for ws in self.watches]
+
+    def implied(self, literals):
+        """Returns the list of literals (DIMACS integers) that unit propagation assigns after the given literals
+        (integers, atoms or negated atoms), including them, apart from those that the clauses already fix by
+        themselves. Returns None if the literals lead to a conflict. The clauses learned so far take part in
+        the propagation, and the solver is left without decisions, as it was."""
+        if not self.ok or self._propagate() is not None:
+            self.ok = False
+            return None
+        self._cancel_until(0)
+        start = len(self.trail)
+        conflict = None
+        for literal in literals:
+            literal = self.literal(literal)
+            lit = 2 * literal if literal > 0 else -2 * literal + 1
+            if self.value[lit] is False:
+                conflict = True
+                break
+            if self.value[lit] is None:
+                self.trail_lim.append(len(self.trail))
+                self._enqueue(lit, None)
+                conflict = self._propagate()
+                if conflict is not None:
+                    break
+        result = None if conflict is not None else [-(lit >> 1) if lit & 1 else lit >> 1
+                                                     for lit in self.trail[start:]]
+        self._cancel_until(0)
+        return result
+
+    def solve(self, assumptions=()):
+        """Returns True if the clauses added so far are satisfiable and False otherwise.
+        When it returns True, self.model maps every variable to its truth value in a satisfying assignment.
+        assumptions is a list of literals (integers, atoms or negated atoms) that must hold in that assignment;
+        they only constrain this call, and the clauses learned under them remain valid afterwards.
+        When it returns False, self.core is a subset of the assumptions that cannot hold together
+        (empty if the clauses are unsatisfiable by themselves).
+        If self.on_restart is set, it is called with the solver at every restart, when no decision is made
+        (it may add clauses then); if it returns True, the search stops and solve returns None."""
+        start = time.perf_counter()
+        self.solves += 1
+        try:
+            return self._solve(assumptions)
+        finally:
+            self.solve_seconds += time.perf_counter() - start
+
+    def _solve(self, assumptions):
+        self.model = {}
+        self.core = []
+        if not self.ok:
+            return False
+        self.next_progress = self.conflicts + self.progress_interval
+        self.assumptions = []
+        for literal in self.scopes + [self.literal(literal) for literal in assumptions]:
+            while abs(literal) > self.num_vars:
+                self.new_var()
+            self.assumptions.append(2 * literal if literal > 0 else -2 * literal + 1)
+        if self._propagate() is not None:
+            self.ok = False
+            return False
+        self.max_learnts = max(len(self.clauses) * self.learnt_ratio, 1000)
+        restart = 0
+        while True:
+            status = self._search(self.restart_base * luby(restart))
+            if status is not None:
+                self._cancel_until(0)
+                return status
+            restart += 1
+            self.restarts += 1
+            if self.on_restart is not None and self.on_restart(self):
+                return None
+            if not self.ok:
+                return False
+
+    def _search(self, conflict_budget):
+        """Runs CDCL until it finds an answer (True or False) or exceeds the conflict budget (None)."""
+        conflicts = 0
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if not self.trail_lim:
+                    self.ok = False
+                    return False
+                if self.on_progress is not None and self.conflicts >= self.next_progress:
+                    self.next_progress = self.conflicts + self.progress_interval
+                    self.on_progress(self)
+                learnt, backtrack_level, lbd = self._analyze(conflict)
+                self._cancel_until(backtrack_level)
+                self.learned += 1
+                if len(learnt) == 1:
+                    self._enqueue(learnt[0], None)
+                else:
+                    self.watches[learnt[0]].append(learnt)
+                    self.watches[learnt[1]].append(learnt)
+                    self.learnts.append(learnt)
+                    self.lbd[id(learnt)] = lbd
+                    self._enqueue(learnt[0], learnt)
+                self.var_inc /= self.var_decay
+            else:
+                if conflicts >= conflict_budget:
+                    self._cancel_until(0)
+                    return None
+                if len(self.learnts) - len(self.trail) >= self.max_learnts:
+                    self._reduce_db()
+                decision = None
+                while len(self.trail_lim) < len(self.assumptions):
+                    assumption = self.assumptions[len(self.trail_lim)]
+                    if self.value[assumption] is False:
+                        self.core = self._analyze_final(assumption)
+                        return False
+                    if self.value[assumption] is None:
+                        decision = assumption
+                        break
+                    self.trail_lim.append(len(self.trail))
+                if decision is None:
+                    v = self._pick_branch_var()
+                    if v is None:
+                        value = self.value
+                        self.model = {var: value[2 * var] is True for var in range(1, self.num_vars + 1)}
+                        return True
+                    decision = 2 * v if self.polarity[v] else 2 * v + 1
+                self.decisions += 1
+                self.trail_lim.append(len(self.trail))
+                self._enqueue(decision, None)
+
+    def _enqueue(self, lit, reason):
+        self.value[lit] = True
+        self.value[lit ^ 1] = False
+        v = lit >> 1
+        self.level[v] = len(self.trail_lim)
+        self.reason[v] = reason
+        self.trail.append(lit)
+
+    def _propagate(self):
+        """Propagates all enqueued literals. Returns a conflicting clause, or None if there is no conflict."""
+        value = self.value
+        watches = self.watches
+        trail = self.trail
+        while self.qhead < len(trail):
+            false_lit = trail[self.qhead] ^ 1
+            self.qhead += 1
+            self.propagations += 1
+            watchers = watches[false_lit]
+            watches[false_lit] = kept = []
+            size = len(watchers)
+            i = 0
+            while i < size:
+                clause = watchers[i]
+                i += 1
+                if clause[0] == false_lit:
+                    clause[0] = clause[1]
+                    clause[1] = false_lit
+                first = clause[0]
+                if value[first] is True:
+                    kept.append(clause)
+                    continue
+                for k in range(2, len(clause)):
+                    lit = clause[k]
+                    if value[lit] is not False:
+                        clause[1] = lit
+                        clause[k] = false_lit
+                        watches[lit].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if value[first] is False:
+                        kept.extend(watchers[i:])
+                        self.qhead = len(trail)
+                        return clause
+                    self._enqueue(first, clause)
+        return None
+
+    def _analyze(self, conflict):
+        """Derives the first-UIP clause from a conflict.
+        Returns the learned clause (asserting literal first), the backtrack level and the clause LBD."""
+        seen = self.seen
+        level = self.level
+        reason = self.reason
+        trail = self.trail
+        current_level = len(self.trail_lim)
+        learnt = [0]
+        pending = 0
+        lit = None
+        index = len(trail) - 1
+        clause = conflict
+        while True:
+            for k in range(0 if lit is None else 1, len(clause)):
+                q = clause[k]
+                v = q >> 1
+                if not seen[v] and level[v] > 0:
+                    self._bump_var(v)
+                    seen[v] = True
+                    if level[v] >= current_level:
+                        pending += 1
+                    else:
+                        learnt.append(q)
+            while not seen[trail[index] >> 1]:
+                index -= 1
+            lit = trail[index]
+            index -= 1
+            clause = reason[lit >> 1]
+            seen[lit >> 1] = False
+            pending -= 1
+            if pending == 0:
+                break
+        learnt[0] = lit ^ 1
+
+        # drop literals implied by other literals of the clause
+        minimized = [learnt[0]]
+        for q in learnt[1:]:
+            why = reason[q >> 1]
+            if why is None or any(not seen[r >> 1] and level[r >> 1] > 0 for r in why[1:]):
+                minimized.append(q)
+        for q in learnt:
+            seen[q >> 1] = False
+        learnt = minimized
+
+        backtrack_level = 0
+        if len(learnt) > 1:
+            best = 1
+            for k in range(2, len(learnt)):
+                if level[learnt[k] >> 1] > level[learnt[best] >> 1]:
+                    best = k
+            learnt[1], learnt[best] = learnt[best], learnt[1]
+            backtrack_level = level[learnt[1] >> 1]
+        lbd = len({level[q >> 1] for q in learnt})
+        return learnt, backtrack_level, lbd
+
+    def _analyze_final(self, assumption):
+        """Returns the assumptions (as DIMACS literals) that imply the negation of a false assumption,
+        together with that assumption. Scope selectors are left out."""
+        core = [assumption]
+        seen = self.seen
+        if self.trail_lim:
+            seen[assumption >> 1] = True
+            for k in range(len(self.trail) - 1, self.trail_lim[0] - 1, -1):
+                lit = self.trail[k]
+                v = lit >> 1
+                if seen[v]:
+                    reason = self.reason[v]
+                    if reason is None:
+                        core.append(lit)
+                    else:
+                        for q in reason[1:]:
+                            if self.level[q >> 1] > 0:
+                                seen[q >> 1] = True
+                    seen[v] = False
+            seen[assumption >> 1] = False
+        return [lit >> 1 if not lit & 1 else -(lit >> 1) for lit in core if lit >> 1 not in self.selectors]
+
+    def _bump_var(self, v):
+        activity = self.activity
+        activity[v] += self.var_inc
+        if activity[v] > 1e100:
+            for var in range(1, self.num_vars + 1):
+                activity[var] *= 1e-100
+            self.var_inc *= 1e-100
+            self._rebuild_order()
+        elif self.value[2 * v] is None:
+            heapq.heappush(self.order, (-activity[v], v))
+
+    def _rebuild_order(self):
+        self.order = [(-self.activity[v], v) for v in range(1, self.num_vars + 1) if self.value[2 * v] is None]
+        heapq.heapify(self.order)
+
+    def _pick_branch_var(self):
+        """Returns the unassigned variable with the highest activity, or None if all variables are assigned."""
+        order = self.order
+        value = self.value
+        activity = self.activity
+        while order:
+            negative_activity, v = heapq.heappop(order)
+            if value[2 * v] is None and -negative_activity == activity[v]:
+                return v
+        return None
+
+    def _cancel_until(self, level):
+        """Undoes all assignments made above the given decision level, saving their phases."""
+        if len(self.trail_lim) <= level:
+            return
+        value = self.value
+        activity = self.activity
+        order = self.order
+        limit = self.trail_lim[level]
+        for k in range(len(self.trail) - 1, limit - 1, -1):
+            lit = self.trail[k]
+            v = lit >> 1
+            value[lit] = value[lit ^ 1] = None
+            self.reason[v] = None
+            self.polarity[v] = not lit & 1
+            heapq.heappush(order, (-activity[v], v))
+        del self.trail[limit:]
+        del self.trail_lim[level:]
+        self.qhead = limit
+        if len(order) > 10 * self.num_vars + 100:
+            self._rebuild_order()
+
+    def _reduce_db(self):
+        """Removes about half of the learned clauses, keeping glue clauses (LBD <= 2) and reasons."""
+        lbd = self.lbd
+        self.learnts.sort(key=lambda c: (lbd[id(c)], len(c)))
+        half = len(self.learnts) // 2
+        kept = self.learnts[:half]
+        removed = set()
+        for clause in self.learnts[half:]:
+            locked = self.reason[clause[0] >> 1] is clause and self.value[clause[0]] is True
+            if locked or lbd[id(clause)] <= 2:
+                kept.append(clause)
+            else:
+                removed.add(id(clause))
+                del lbd[id(clause)]
+        self.learnts = kept
+        if removed:
+            self.watches = [[c for c in ws if id(c) not in removed] for ws in self.watches]
+        self.max_learnts *= 1.1
+        self.reductions += 1
+        self.deleted += len(removed)
+
 
-formula = Not(And(Atom('p'), Or(Atom('q'), Not(Atom('r'))))) 
-print(cnf_tseitin_transform(formula))
+def satisfiability_cdcl(formula):
+    """Checks whether formula is satisfiable with the CDCL solver.
+    If the input formula is satisfiable, it returns an interpretation (a dictionary from atoms
+    to truth values) that assigns true to the formula, as satisfiability_brute_force does.
+    Otherwise, it returns False."""
+    cnf = tseitin_cnf(formula)
+    solver = Solver()
+    solver.add_cnf(cnf)
+    if not solver.solve():
+        return False
+    return cnf.interpretation(solver.model)
@@ -6,6 +6,7 @@ David só pode na Quinta ou na Sexta.
 Existe um dia que eles possam se reunir satisfazendo todas as demandas?"""
 
 from semantics import *
+from dpll import satisfiability_cdcl
 
 meeting_monday = Atom('reuniao na segunda')
 meeting_tuesday = Atom('reuniao na terca')
@@ -36,4 +37,4 @@ david = And(
 
 all_requirements = And(And(And(adam, bridget), charles), david)
 
-print(satisfiability_brute_force(all_requirements))
+print(satisfiability_cdcl(all_requirements))
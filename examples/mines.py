@@ -1,4 +1,6 @@
 from semantics import *
+from cnf import CNF
+from cardinality import exactly_k
 from typing import List
 from typing import Union
 
@@ -62,54 +64,26 @@ def no_mines(grid):
     return premises
 
 
-# if a square (i, j) has number k, there is exactly k mines adjacent to (i, j):
+# if a square (i, j) has number k, there is exactly k mines adjacent to (i, j).
+# The constraints are written as clauses by cardinality.exactly_k, all into the same CNF, so that the auxiliary
+# atoms of the encoding (x_1, x_2, ...) are not shared by different squares:
 
-def mines_neighborhood(grid):
-    premises = []
+def mines_neighborhood(grid, encoding='sequential'):
+    cnf = CNF()
     for i in range(len(grid)):
         for j in range(len(grid[i])):
-            if grid[i][j] == 1:
-                premises = premises + at_least_one(i, j)
-                premises = premises + at_most_one(i, j)
-            if grid[i][j] == 2:
-                pass
-                # ======== YOUR CODE HERE ========
-            if grid[i][j] == 3:
-                pass
-                # ======== YOUR CODE HERE ========
-
-    return premises
-
-
-# at most one mine is adjacent to (i, j):
-
-def at_most_one(i, j):
-    neighbors = get_adjacent_cells(i, j)
-    neighbors.remove((i, j))
-    neighbors.sort()
-    formulas = []
-    for neighbor1 in neighbors:
-        for neighbor2 in neighbors:
-            if neighbor1 < neighbor2:
-                formulas = formulas + [Not(And(Atom(str(neighbor1[0]) + '_' + str(neighbor1[1])),
-                                               Atom(str(neighbor2[0]) + '_' + str(neighbor2[1]))))]
-    return formulas
+            if grid[i][j] in (1, 2, 3):
+                exactly_k(neighbors(i, j), grid[i][j], cnf, encoding)
+    return [cnf.clause_formula(k) for k in range(len(cnf))]
 
 
-# at least one mine is adjacent to (i, j):
+# atoms of the squares adjacent to (i, j):
 
-def at_least_one(i, j):  # -> List[Formula]
-    neighbors = get_adjacent_cells(i, j)
-    neighbors.remove((i, j))
-    neighbors.sort()
-    atoms = []
-    for neighbor in neighbors:
-        atoms.append(Atom(str(neighbor[0]) + '_' + str(neighbor[1])))
-    final_formula = atoms[0]
-    for atom in atoms:
-        if atom != atoms[0]:
-            final_formula = Or(atom, final_formula)
-    return [final_formula]
+def neighbors(i, j):
+    adjacent_cells = get_adjacent_cells(i, j)
+    adjacent_cells.remove((i, j))
+    adjacent_cells.sort()
+    return [Atom(str(cell[0]) + '_' + str(cell[1])) for cell in adjacent_cells]
 
 
 def get_adjacent_cells(i, j):
@@ -127,12 +101,9 @@ for premise in mines_neighborhood(my_grid):
     print(premise)
 
 
-print(is_logical_consequence(no_mines(my_grid) + mines_neighborhood(my_grid), Atom('1_2')))
-print(is_logical_consequence(no_mines(my_grid) + mines_neighborhood(my_grid), Not(Atom('1_2'))))
-print(is_logical_consequence(no_mines(my_grid) + mines_neighborhood(my_grid), Atom('1_3')))
-print(is_logical_consequence(no_mines(my_grid) + mines_neighborhood(my_grid), Not(Atom('1_3'))))
-print(is_logical_consequence(no_mines(my_grid) + mines_neighborhood(my_grid), Atom('2_0')))
-print(is_logical_consequence(no_mines(my_grid) + mines_neighborhood(my_grid), Not(Atom('2_0'))))
-print(is_logical_consequence(no_mines(my_grid) + mines_neighborhood(my_grid), Atom('3_0')))
-print(is_logical_consequence(no_mines(my_grid) + mines_neighborhood(my_grid), Not(Atom('3_0'))))
+# the premises are encoded once and each question is answered by the same solver:
+questions = [Atom('1_2'), Not(Atom('1_2')), Atom('1_3'), Not(Atom('1_3')),
+             Atom('2_0'), Not(Atom('2_0')), Atom('3_0'), Not(Atom('3_0'))]
+for answer in entails_many(no_mines(my_grid) + mines_neighborhood(my_grid), questions):
+    print(answer)
 # ======== YOUR CODE HERE ========
@@ -1,4 +1,7 @@
 from semantics import *
+from dpll import satisfiability_cdcl
+from cnf import CNF
+from cardinality import at_most_k
 import time
 
 '''
@@ -104,22 +107,22 @@ def rows_constraints(grid):
 
 
 # each cell cannot have two different numbers:
-def cells_constraints(grid):
+def cells_constraints(grid, encoding='sequential'):
     """
     Returns a formula requiring that each cell cannot be filled with more than one number.
-    For example, the final formula is of the form ... ∧ ¬(Atom('2_3_1') ∧ Atom('2_2_4')) ∧ ...,
-    which represents that cell 2,3 cannot be filled with 1 and 4.
+    The constraint of each cell is written as clauses by cardinality.at_most_k, so with the default
+    sequential counter it has O(n) clauses instead of the n(n-1)/2 pairs ¬(Atom('2_3_1') ∧ Atom('2_3_4')), ...
+    All cells share one CNF, whose auxiliary atoms are named x_1, x_2, ...
     :param grid: sudoku grid
+    :param encoding: one of cardinality.ENCODINGS
     :return: And formula
     """
-    formulas_cells = []
+    cnf = CNF()
     for i in range(len(grid)):
         for j in range(len(grid)):
-            for n1 in range(len(grid) - 1):
-                for n2 in range(n1 + 1, len(grid)):
-                    formulas_cells.append(Not(And(Atom(str(i + 1) + '_' + str(j + 1) + '_' + str(n1 + 1)),
-                                                  Atom(str(i + 1) + '_' + str(j + 1) + '_' + str(n2 + 1)))))
-    return and_all(formulas_cells)
+            at_most_k([Atom(str(i + 1) + '_' + str(j + 1) + '_' + str(n + 1)) for n in range(len(grid))], 1,
+                      cnf, encoding)
+    return cnf.to_formula()
 
 
 # each column has all digits:
@@ -186,13 +189,13 @@ def sudoku_solution(grid):
         ),
         subgrids_constrains(grid)
     )
-    solution = satisfiability_brute_force(final_formula)
+    solution = satisfiability_cdcl(final_formula)
     if solution:
         for i in range(len(grid)):
             for j in range(len(grid)):
                 if grid[i][j] == 0:
                     for n in range(len(grid)):
-                        if solution[str(i + 1) + '_' + str(j + 1) + '_' + str(n + 1)]:
+                        if solution[Atom(str(i + 1) + '_' + str(j + 1) + '_' + str(n + 1))]:
                             grid[i][j] = n + 1
                             break
         print(grid)
@@ -1,14 +1,51 @@
+def _structurally_equal(formula1, formula2):
+    # compares the two formulas node by node with an explicit stack of pairs, so that deep formulas
+    # do not hit the recursion limit; shared subformulas are skipped by identity
+    stack = [(formula1, formula2)]
+    while stack:
+        node1, node2 = stack.pop()
+        if node1 is node2:
+            continue
+        if type(node1) is not type(node2) or node1._hash != node2._hash:
+            return False
+        if isinstance(node1, Atom):
+            if node1.name != node2.name or len(node1.args) != len(node2.args) \
+                    or any(arg1 != arg2 for arg1, arg2 in zip(node1.args, node2.args)):
+                return False
+        elif isinstance(node1, Not):
+            stack.append((node1.inner, node2.inner))
+        elif isinstance(node1, (ForAll, Exists)):
+            if node1.var != node2.var:
+                return False
+            stack.append((node1.inner, node2.inner))
+        else:
+            stack.append((node1.right, node2.right))
+            stack.append((node1.left, node2.left))
+    return True
+
+
 class FormulaFOL:
+    """Base class of first-order formulas. Nodes use __slots__ and compute their hash, length
+    (as in fol_functions.length_fol) and depth (an atom has depth 0) once, at construction."""
+    __slots__ = ('_hash', 'length', 'depth')
+
     def __init__(self):
         pass
 
+    def __hash__(self):
+        return self._hash
+
 
 class Atom(FormulaFOL):
+    __slots__ = ('name', 'args')
 
     def __init__(self, name, args):
         super().__init__()
         self.name = name
         self.args = args
+        self._hash = hash(tuple(args) + (name, 'atom'))
+        self.length = 1
+        self.depth = 0
 
     def __repr__(self):
         printable_predicate = str(self.name) + "("
@@ -20,114 +57,132 @@ class Atom(FormulaFOL):
         return printable_predicate
 
     def __eq__(self, other):
-        is_equal = isinstance(other, Atom) and len(other.args) == len(self.args)
-        if not is_equal:
-            return False
-        for i in range(len(self.args)):
-            if self.args[i] != other.args[i]:
-                return False
-        return True
+        return self is other or _structurally_equal(self, other)
 
     def __hash__(self):
-        return hash(tuple(self.args) + (self.name, 'atom'))
+        return self._hash
 
 
 class Implies(FormulaFOL):
+    __slots__ = ('left', 'right')
 
     def __init__(self, left, right):
         super().__init__()
         self.left = left
         self.right = right
+        self._hash = hash((left._hash, right._hash, 'implies'))
+        self.length = left.length + right.length + 1
+        self.depth = max(left.depth, right.depth) + 1
 
     def __repr__(self):
         return "(" + self.left.__repr__() + " " + u"\u27F6" + " " + self.right.__repr__() + ")"
 
     def __eq__(self, other):
-        return isinstance(other, Implies) and other.left == self.left and other.right == self.right
+        return self is other or _structurally_equal(self, other)
 
     def __hash__(self):
-        return hash((hash(self.left), hash(self.right), 'implies'))
+        return self._hash
 
 
 class Not(FormulaFOL):
+    __slots__ = ('inner',)
 
     def __init__(self, inner):
         super().__init__()
         self.inner = inner
+        self._hash = hash((inner._hash, 'not'))
+        self.length = inner.length + 1
+        self.depth = inner.depth + 1
 
     def __repr__(self):
         return "(" + u"\u00ac" + str(self.inner) + ")"
 
     def __eq__(self, other):
-        return isinstance(other, Not) and other.inner == self.inner
+        return self is other or _structurally_equal(self, other)
 
     def __hash__(self):
-        return hash((hash(self.inner), 'not'))
+        return self._hash
 
 
 class And(FormulaFOL):
+    __slots__ = ('left', 'right')
 
     def __init__(self, left, right):
         super().__init__()
         self.left = left
         self.right = right
+        self._hash = hash((left._hash, right._hash, 'and'))
+        self.length = left.length + right.length + 1
+        self.depth = max(left.depth, right.depth) + 1
 
     def __repr__(self):
         return "(" + self.left.__repr__() + " " + u"\u2227" + " " + self.right.__repr__() + ")"
 
     def __eq__(self, other):
-        return isinstance(other, And) and other.left == self.left and other.right == self.right
+        return self is other or _structurally_equal(self, other)
 
     def __hash__(self):
-        return hash((hash(self.left), hash(self.right), 'and'))
+        return self._hash
 
 
 class Or(FormulaFOL):
+    __slots__ = ('left', 'right')
 
     def __init__(self, left, right):
         super().__init__()
         self.left = left
         self.right = right
+        self._hash = hash((left._hash, right._hash, 'or'))
+        self.length = left.length + right.length + 1
+        self.depth = max(left.depth, right.depth) + 1
 
     def __repr__(self):
         return "(" + self.left.__repr__() + " " + u"\u2228" + " " + self.right.__repr__() + ")"
 
     def __eq__(self, other):
-        return isinstance(other, Or) and other.left == self.left and other.right == self.right
+        return self is other or _structurally_equal(self, other)
 
     def __hash__(self):
-        return hash((hash(self.left), hash(self.right), 'or'))
+        return self._hash
 
 
 class ForAll(FormulaFOL):
+    __slots__ = ('var', 'inner')
 
     def __init__(self, var, inner):
         super().__init__()
         self.inner = inner
         self.var = var
+        self._hash = hash((inner._hash, 'all', hash(var)))
+        self.length = inner.length + 1
+        self.depth = inner.depth + 1
 
     def __repr__(self):
         return "(" + u"\u2200" + str(self.var) + str(self.inner) + ")"
 
     def __eq__(self, other):
-        return isinstance(other, ForAll) and other.inner == self.inner and other.var == self.var
+        return self is other or _structurally_equal(self, other)
 
     def __hash__(self):
-        return hash((hash(self.inner), 'all', hash(self.var)))
+        return self._hash
 
 
 class Exists(FormulaFOL):
+    __slots__ = ('var', 'inner')
 
     def __init__(self, var, inner):
         super().__init__()
         self.inner = inner
         self.var = var
+        self._hash = hash((inner._hash, 'exists', hash(var)))
+        self.length = inner.length + 1
+        self.depth = inner.depth + 1
 
     def __repr__(self):
         return "(" + u"\u2203" + str(self.var) + str(self.inner) + ")"
 
     def __eq__(self, other):
-        return isinstance(other, Exists) and other.var == self.var and other.inner == self.inner
+        return self is other or _structurally_equal(self, other)
 
     def __hash__(self):
-        return hash((hash(self.inner), 'exists', hash(self.var)))
+        return self._hash
@@ -1,15 +1,12 @@
-from fol_formula import Atom, Not, Implies, And, Or, ForAll, Exists
+from fol_formula import FormulaFOL, Atom, Not, Implies, And, Or, ForAll, Exists
 from term import Con, Var, Fun
 
 
 def length_fol(formula):
-    """Determines the length of a formula in first-order logic."""
-    if isinstance(formula, Atom):
-        return 1
-    if isinstance(formula, (Not, ForAll, Exists)):
-        return length_fol(formula.inner) + 1
-    if isinstance(formula, (Implies, And, Or)):
-        return length_fol(formula.left) + length_fol(formula.right) + 1
+    """Determines the length of a formula in first-order logic.
+    The length is computed when the formula is built, so this takes constant time."""
+    if isinstance(formula, FormulaFOL):
+        return formula.length
     return 0
 
 
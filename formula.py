@@ -7,13 +7,194 @@ formula1 = Or(Atom('p'), Atom('s'))
 As another example, the piece of code below creates an object that represents (p → (p v s)).
 
 formula2 = Implies(Atom('p'), Or(Atom('p'), Atom('s')))
+
+
+Formulas built inside an interning() block are hash-consed: structurally equal formulas are the same object.
+
+with interning():
+    formula3 = Not(And(Atom('p'), Atom('s')))
+    formula4 = Not(And(Atom('p'), Atom('s')))
+    # formula3 is formula4
+
+so repeated subformulas are stored once and comparing two of them is an identity check.
 """
 # from typeguard import typechecked
+import inspect
+import weakref
+from contextlib import contextmanager
+
+
+class UniqueTable:
+    """
+    Table of hash-consed formulas. Each node is stored under its class and the identities of its children
+    (or the name, for atoms). The table only keeps weak references, so a node is dropped when it is
+    no longer used anywhere else. If the table is dropped first, its nodes are ordinary formulas again.
+    """
+
+    def __init__(self):
+        self.nodes = weakref.WeakValueDictionary()
+    # end def
+
+    def __len__(self):
+        return len(self.nodes)
+    # end def
+
+    def __del__(self):
+        for node in list(self.nodes.values()):
+            _interned.pop(id(node), None)
+    # end def
+# end class UniqueTable
+
+
+class _InternedRef(weakref.ref):
+    # entry of _interned: the id of the table of a node, removed from _interned when the node is collected
+    __slots__ = ('node_id', 'table_id')
+
+    def __new__(cls, node, table):
+        return super().__new__(cls, node, _forget)
+    # end def
+
+    def __init__(self, node, table):
+        super().__init__(node, _forget)
+        self.node_id = id(node)
+        self.table_id = id(table)
+    # end def
+# end class _InternedRef
+
+
+def _forget(ref):
+    _interned.pop(ref.node_id, None)
+# end def
+
+
+def _table_id(node):
+    entry = _interned.get(id(node))
+    return None if entry is None else entry.table_id
+# end def
+
+
+_unique_tables = []
+_interned = {}  # id of an interned node -> _InternedRef, so that nodes need no slot for their table
+
+
+@contextmanager
+def interning(table=None):
+    """
+    Makes the formula constructors return hash-consed nodes from table (a new UniqueTable by default)
+    while the block runs. Since children are looked up by identity, only nodes whose children are all
+    in table are interned: a node built on a formula from outside the block (or from another table) is
+    an ordinary node, so formulas meant to be shared should be built inside the same block.
+    Interned formulas must not be modified in place.
+    """
+    if table is None:
+        table = UniqueTable()
+    _unique_tables.append(table)
+    try:
+        yield table
+    finally:
+        _unique_tables.pop()
+# end def
+
+
+def _interned_together(formula1, formula2):
+    # two nodes of the same table are equal only if they are the same object, since the children
+    # of an interned node are always interned in its table
+    if not _interned:
+        return False
+    table_id = _table_id(formula1)
+    return table_id is not None and table_id == _table_id(formula2)
+# end def
+
+
+def _structurally_equal(formula1, formula2):
+    # compares the two formulas node by node with an explicit stack of pairs, so that deep formulas
+    # do not hit the recursion limit; shared and interned subformulas are skipped by identity
+    stack = [(formula1, formula2)]
+    while stack:
+        node1, node2 = stack.pop()
+        if node1 is node2:
+            continue
+        if type(node1) is not type(node2) or node1._hash != node2._hash or _interned_together(node1, node2):
+            return False
+        if isinstance(node1, Atom):
+            if node1.name != node2.name:
+                return False
+        elif isinstance(node1, Not):
+            stack.append((node1.inner, node2.inner))
+        else:
+            stack.append((node1.right, node2.right))
+            stack.append((node1.left, node2.left))
+    return True
+# end def
+
+
+class _FormulaType(type):
+    """
+    Metaclass of the propositional formulas. Inside an interning() block, calling a formula class
+    looks the node up in the current UniqueTable before building it, so __init__ only runs for new nodes.
+    Keyword arguments are bound to the parameters of the class's __init__, so Atom(name='p') and Atom('p')
+    give the same node.
+    """
+
+    def __call__(cls, *args, **kwargs):
+        table = _unique_tables[-1] if _unique_tables else None
+        if table is None:
+            return super().__call__(*args, **kwargs)
+        if kwargs or len(args) != _parameter_count(cls):
+            args = _bind_arguments(cls, args, kwargs)
+        if not args or any(isinstance(arg, Formula) and _table_id(arg) != id(table) for arg in args):
+            return super().__call__(*args)
+        key = (cls,) + tuple(id(arg) if isinstance(arg, Formula) else arg for arg in args)
+        node = table.nodes.get(key)
+        if node is None:
+            node = super().__call__(*args)
+            table.nodes[key] = node
+            _interned[id(node)] = _InternedRef(node, table)
+        return node
+    # end def
+# end class _FormulaType
+
+
+_signatures = {}
+
+
+def _signature(cls):
+    signature = _signatures.get(cls)
+    if signature is None:
+        signature = _signatures[cls] = inspect.signature(cls.__init__)
+    return signature
+# end def
+
+
+def _parameter_count(cls):
+    return len(_signature(cls).parameters) - 1
+# end def
+
+
+def _bind_arguments(cls, args, kwargs):
+    # the positional arguments of __init__ (without self), in order, so that they make a canonical key
+    bound = _signature(cls).bind(None, *args, **kwargs)
+    bound.apply_defaults()
+    return tuple(bound.arguments.values())[1:]
+# end def
+
+
+class Formula(metaclass=_FormulaType):
+    """
+    Base class of propositional formulas. Nodes are immutable and use __slots__; each one computes
+    its hash, its length (number of symbols, as in functions.length) and its depth (an atom has depth 0)
+    once, from the values already cached in its children. Nodes also have a __weakref__ slot, so that
+    a UniqueTable does not keep them alive; the table of an interned node is kept in a side table.
+    """
+    __slots__ = ('_hash', 'length', 'depth', '__weakref__')
 
-class Formula:
     def __init__(self):
         pass
     # end def
+
+    def __hash__(self):
+        return self._hash
+    # end def
 # end class Formula
 
 
@@ -21,10 +202,14 @@ class Atom(Formula):
     """
     This class represents propositional logic variables.
     """
+    __slots__ = ('name',)
 
     def __init__(self, name: str):
         super().__init__()
         self.name = name
+        self._hash = hash((name, 'atom'))
+        self.length = 1
+        self.depth = 0
     # end def
 
     def __str__(self):
@@ -35,20 +220,29 @@ class Atom(Formula):
         return str(self)
 
     def __eq__(self, other: Formula):
-        return isinstance(other, Atom) and other.name == self.name
+        return self is other or _structurally_equal(self, other)
     # end def
 
     def __hash__(self):
-        return hash((self.name, 'atom'))
+        return self._hash
+    # end def
+
+    def __reduce__(self):
+        return Atom, (self.name,)
     # end def
 # end class Atom
 
 
 class Implies(Formula):
+    __slots__ = ('left', 'right')
+
     def __init__(self, left: Formula, right: Formula):
         super().__init__()
         self.left = left
         self.right = right
+        self._hash = hash((left._hash, right._hash, 'implies'))
+        self.length = left.length + right.length + 1
+        self.depth = max(left.depth, right.depth) + 1
     # end def
 
     def __str__(self):
@@ -59,20 +253,28 @@ class Implies(Formula):
         return str(self)
 
     def __eq__(self, other: Formula):
-        return isinstance(other, Implies) and other.left == self.left and other.right == self.right
+        return self is other or _structurally_equal(self, other)
     # end def
 
     def __hash__(self):
-        return hash((hash(self.left), hash(self.right), 'implies'))
+        return self._hash
+    # end def
+
+    def __reduce__(self):
+        return Implies, (self.left, self.right)
     # end def
 # end class Implies
 
 
 class Not(Formula):
+    __slots__ = ('inner',)
 
     def __init__(self, inner: Formula):
         super().__init__()
         self.inner = inner
+        self._hash = hash((inner._hash, 'not'))
+        self.length = inner.length + 1
+        self.depth = inner.depth + 1
     # end def
 
     def __str__(self):
@@ -83,20 +285,29 @@ class Not(Formula):
         return str(self)
 
     def __eq__(self, other: Formula):
-        return isinstance(other, Not) and other.inner == self.inner
+        return self is other or _structurally_equal(self, other)
     # end def
 
     def __hash__(self):
-        return hash((hash(self.inner), 'not'))
+        return self._hash
+    # end def
+
+    def __reduce__(self):
+        return Not, (self.inner,)
     # end def
 # end class Not
 
 
 class And(Formula):
+    __slots__ = ('left', 'right')
+
     def __init__(self, left: Formula, right: Formula):
         super().__init__()
         self.left = left
         self.right = right
+        self._hash = hash((left._hash, right._hash, 'and'))
+        self.length = left.length + right.length + 1
+        self.depth = max(left.depth, right.depth) + 1
     # end def
 
     def __str__(self):
@@ -107,21 +318,29 @@ class And(Formula):
         return str(self)
 
     def __eq__(self, other: Formula):
-        return isinstance(other, And) and other.left == self.left and other.right == self.right
+        return self is other or _structurally_equal(self, other)
     # end def
 
     def __hash__(self):
-        return hash((hash(self.left), hash(self.right), 'and'))
+        return self._hash
+    # end def
+
+    def __reduce__(self):
+        return And, (self.left, self.right)
     # end def
 # end class And
 
 
 class Or(Formula):
+    __slots__ = ('left', 'right')
 
     def __init__(self, left: Formula, right: Formula):
         super().__init__()
         self.left = left
         self.right = right
+        self._hash = hash((left._hash, right._hash, 'or'))
+        self.length = left.length + right.length + 1
+        self.depth = max(left.depth, right.depth) + 1
     # end def
 
     def __str__(self):
@@ -132,11 +351,15 @@ class Or(Formula):
         return str(self)
 
     def __eq__(self, other: Formula):
-        return isinstance(other, Or) and other.left == self.left and other.right == self.right
+        return self is other or _structurally_equal(self, other)
     # end def
 
     def __hash__(self):
-        return hash((hash(self.left), hash(self.right), 'or'))
+        return self._hash
+    # end def
+
+    def __reduce__(self):
+        return Or, (self.left, self.right)
     # end def
 # end class Or
 
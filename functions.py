@@ -1,18 +1,81 @@
 """The goal in this module is to define functions that take a formula as input and
-do some computation on its syntactic structure. """
+do some computation on its syntactic structure.
+
+All functions below are written on top of two traversals that use an explicit stack instead of
+recursion, so they work on formulas of any depth (for example, the long chains built by and_all):
+
+preorder(formula) yields every node before its children;
+postorder(formula, combine) computes a value for every node from the values of its children.
+
+With memo=True, both traversals handle each node object once, which makes them linear on
+formulas whose subformulas are shared (as the ones built with formula.interning()).
+"""
 
 
 from formula import * 
 
 
-def length(formula: Formula):
-    """Determines the length of a formula in propositional logic."""
-    if isinstance(formula, Atom):
-        return 1
+def children(formula: Formula):
+    """Returns the tuple of immediate subformulas of a formula."""
     if isinstance(formula, Not):
-        return length(formula.inner) + 1
-    if isinstance(formula, Implies) or isinstance(formula, And) or isinstance(formula, Or):
-        return length(formula.left) + length(formula.right) + 1
+        return (formula.inner,)
+    if isinstance(formula, (Implies, And, Or)):
+        return (formula.left, formula.right)
+    return ()
+
+
+def preorder(formula: Formula, descend=None, memo=False):
+    """Yields the nodes of a formula, each node before its children and left before right.
+    If descend is given, the children of a node are only visited when descend(node) is True.
+    If memo is True, a node object reached more than once is yielded only the first time."""
+    visited = set()
+    stack = [formula]
+    while stack:
+        node = stack.pop()
+        if memo:
+            if id(node) in visited:
+                continue
+            visited.add(id(node))
+        yield node
+        if descend is None or descend(node):
+            stack.extend(reversed(children(node)))
+
+
+def postorder(formula: Formula, combine, memo=False):
+    """Returns combine(formula, values), where values is the list of results of postorder on the
+    children of formula. Nodes are combined after their children, without recursion.
+    For example, postorder(formula, lambda node, values: 1 + sum(values)) is the length of formula.
+    If memo is True, the result of each node object is computed once and reused."""
+    results = {}
+    values = []
+    stack = [(formula, None)]
+    while stack:
+        node, nodes = stack.pop()
+        if nodes is not None:
+            args = values[-len(nodes):]
+            del values[-len(nodes):]
+        elif memo and id(node) in results:
+            values.append(results[id(node)])
+            continue
+        else:
+            nodes = children(node)
+            if nodes:
+                stack.append((node, nodes))
+                stack.extend((child, None) for child in reversed(nodes))
+                continue
+            args = []
+        value = combine(node, args)
+        if memo:
+            results[id(node)] = value
+        values.append(value)
+    return values[0]
+
+
+def length(formula: Formula):
+    """Determines the length of a formula in propositional logic.
+    The length is computed when the formula is built, so this takes constant time."""
+    if isinstance(formula, Formula):
+        return formula.length
     return 0
 
 
@@ -28,16 +91,7 @@ def subformulas(formula: Formula):
     This piece of code prints p, s, (p v s), (p → (p v s))
     (Note that there is no repetition of p)
     """
-
-    if isinstance(formula, Atom):
-        return {formula}
-    if isinstance(formula, Not):
-        return {formula}.union(subformulas(formula.inner))
-    if isinstance(formula, Implies) or isinstance(formula, And) or isinstance(formula, Or):
-        sub1 = subformulas(formula.left)
-        sub2 = subformulas(formula.right)
-        return {formula}.union(sub1).union(sub2)
-    return {}
+    return {node for node in preorder(formula, memo=True) if isinstance(node, Formula)}
 
 #  we have shown in class that, for all formula A, len(subformulas(A)) <= length(A).
 
@@ -54,15 +108,7 @@ def atoms(formula: Formula):
     This piece of code above prints: p, s
     (Note that there is no repetition of p)
     """
-    if isinstance(formula, Atom):
-        return {formula}
-    if isinstance(formula, Not):
-        return atoms(formula.inner)
-    if isinstance(formula, Implies) or isinstance(formula, And) or isinstance(formula, Or):
-        atoms1 = atoms(formula.left)
-        atoms2 = atoms(formula.right)
-        return (atoms1).union(atoms2)
-    return {}
+    return {node for node in preorder(formula, memo=True) if isinstance(node, Atom)}
 
 
 def number_of_atoms(formula: Formula):
@@ -72,94 +118,88 @@ def number_of_atoms(formula: Formula):
 
     must return 3 (Observe that this function counts the repetitions of atoms)
     """
-    if isinstance(formula, Atom):
-        return 1
-    if isinstance(formula, Not):
-        return number_of_atoms(formula.inner)
-    if isinstance(formula, Implies) or isinstance(formula, And) or isinstance(formula, Or):
-        num_of_atoms1 = number_of_atoms(formula.left)
-        num_of_atoms2 = number_of_atoms(formula.right)
-        return num_of_atoms1 + num_of_atoms2
+    return postorder(formula, lambda node, values: 1 if isinstance(node, Atom) else sum(values), memo=True)
 
 
 def number_of_connectives(formula: Formula):
     """Returns the number of connectives occurring in a formula."""
-    if isinstance(formula, Atom):
-        return 0
-    if isinstance(formula, Not):
-        num_of_conn = number_of_connectives(formula.inner)
-        return num_of_conn + 1
-    if isinstance(formula, Implies) or isinstance(formula, And) or isinstance(formula, Or):
-        num_of_conn1 = number_of_connectives(formula.left)
-        num_of_conn2 = number_of_connectives(formula.right)
-        return 1 + num_of_conn1 + num_of_conn2
+    return postorder(formula, lambda node, values: 0 if isinstance(node, Atom) else 1 + sum(values), memo=True)
+
 
 def is_literal(formula: Formula):
     """Returns True if formula is a literal. It returns False, otherwise"""
-    if isinstance(formula, Atom):
-        return True
-    if isinstance(formula, Not):
-        return is_literal(formula.inner)
-    if isinstance(formula, (Implies, And, Or)):
-        return False
+    while isinstance(formula, Not):
+        formula = formula.inner
+    return isinstance(formula, Atom)
+
 
 def substitution(formula: Formula, old_subformula: Formula, new_subformula: Formula):
     """Returns a new formula obtained by replacing all occurrences
     of old_subformula in the input formula by new_subformula."""
-    if isinstance(formula, Not):
-        formula.inner = substitution(formula.inner, old_subformula, new_subformula)
-    if isinstance(formula, (Or, Implies, And)):
-        formula.right = substitution(formula.right, old_subformula, new_subformula)
-        formula.left = substitution(formula.left, old_subformula, new_subformula)
-    if formula == old_subformula:
-        formula = new_subformula
-    return formula
+    def replace(node, values):
+        if isinstance(node, Not) and values[0] is not node.inner:
+            node = Not(values[0])
+        elif isinstance(node, (Or, Implies, And)) and (values[0] is not node.left or values[1] is not node.right):
+            node = type(node)(values[0], values[1])
+        if node == old_subformula:
+            return new_subformula
+        return node
+    return postorder(formula, replace, memo=True)
+
 
 def is_clause(formula: Formula):
     """Returns True if formula is a clause. It returns False, otherwise"""
-    if isinstance(formula, (Atom, Not)):
-        return is_literal(formula)
-    if isinstance(formula, Or):
-        return is_clause(formula.left) and is_clause(formula.right)
-    if isinstance(formula, (Implies, And)):
-        return False
+    return all(is_literal(node) for node in preorder(formula, descend=lambda node: isinstance(node, Or))
+               if not isinstance(node, Or))
+
 
 def is_negation_normal_form(formula: Formula):
     """Returns True if formula is in negation normal form.
     Returns False, otherwise."""
-    if isinstance(formula, Atom):
-        return True
-    if isinstance(formula, Not):
-        return is_negation_normal_form(formula.inner)
-    if isinstance(formula, Implies):
-        return False
-    if isinstance(formula, (And, Or)):
-        return is_negation_normal_form(formula.left) and is_negation_normal_form(formula.right)
+    return not any(isinstance(node, Implies) for node in preorder(formula, memo=True))
+
 
 def is_cnf(formula: Formula):
     """Returns True if formula is in conjunctive normal form.
     Returns False, otherwise."""
-    if isinstance(formula, (Atom, Not, Implies, Or)):
-        return is_clause(formula)
-    if isinstance(formula, And):
-        return is_cnf(formula.left) and is_cnf(formula.right)
+    return all(is_clause(node) for node in preorder(formula, descend=lambda node: isinstance(node, And))
+               if not isinstance(node, And))
+
 
 def is_term(formula: Formula):
     """Returns True if formula is a term. It returns False, otherwise"""
-    if isinstance(formula, (Atom, Not, Implies, Or)):
-        return is_literal(formula)
-    if isinstance(formula, And):
-        return is_term(formula.left) and is_term(formula.right)
+    return all(is_literal(node) for node in preorder(formula, descend=lambda node: isinstance(node, And))
+               if not isinstance(node, And))
+
 
 def is_dnf(formula: Formula):
     """Returns True if formula is in disjunctive normal form.
     Returns False, otherwise."""
-    if isinstance(formula, (Atom, Not, Implies, And)):
-        return is_term(formula)
-    if isinstance(formula, Or):
-        return is_dnf(formula.left) and is_dnf(formula.right)
+    return all(is_term(node) for node in preorder(formula, descend=lambda node: isinstance(node, Or))
+               if not isinstance(node, Or))
+
 
 def is_decomposable_negation_normal_form(formula: Formula):
     """Returns True if formula is in decomposable negation normal form.
-    Returns False, otherwise."""
-    pass  # ======== REMOVE THIS LINE AND INSERT YOUR CODE HERE ========
+    Returns False, otherwise.
+    That is, negations only apply to atoms, there is no implication and the two sides of every conjunction
+    have no atom in common.
+    The atoms below each node are kept as a bit set computed once per node object, so circuits whose
+    subformulas are shared (as the ones built by dnnf.DNNF.to_formula) are checked in a single pass."""
+    bits = {}
+
+    def combine(node, values):
+        if isinstance(node, Atom):
+            return bits.setdefault(node, 1 << len(bits))
+        if isinstance(node, Implies) or None in values:
+            return None
+        if isinstance(node, Not) and not isinstance(node.inner, Atom):
+            return None
+        if isinstance(node, And) and values[0] & values[1]:
+            return None
+        result = 0
+        for value in values:
+            result |= value
+        return result
+
+    return postorder(formula, combine, memo=True) is not None
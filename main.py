@@ -54,3 +54,5 @@ for subformula in subformulas(formula8):
 # for example, for formula8:
 print('number of subformulas of formula8:', len(subformulas(formula8)))
 print('len(subformulas(formula8)) <= length(formula8):', len(subformulas(formula8)) <= length(formula8))
+print('is formula5 in DNNF:', is_decomposable_negation_normal_form(formula5))  # False: ¬ over a conjunction
+print('is (p /\\ (¬q)) in DNNF:', is_decomposable_negation_normal_form(And(Atom('p'), Not(Atom('q')))))  # True
@@ -0,0 +1,154 @@
+"""The goal in this module is to count the models of a formula in conjunctive normal form without enumerating them.
+
+The counter is an exhaustive DPLL search (as in the #SAT solvers Relsat, Cachet and sharpSAT) with two additions:
+
+component decomposition: when the remaining clauses split into groups that share no variables, each group is
+counted on its own and the counts are multiplied;
+
+component cache: the count of every component is stored, keyed by its set of clauses, so a component reached
+again under a different partial assignment is not counted twice.
+
+The search keeps its decisions and component splits on an explicit stack, so the number of variables is not bounded
+by the recursion limit of Python.
+
+Clauses are tuples of DIMACS literals, for example (1, -2) for (x1 v ¬x2).
+"""
+
+import math
+from collections import Counter
+
+
+def condition(clauses, literals):
+    """Assigns the given literals and then every literal implied by unit propagation.
+    Returns the clauses that are not yet satisfied, without their false literals, together with the set of
+    assigned literals, or (None, None) if some clause becomes false."""
+    assigned = set()
+    pending = list(literals)
+    while True:
+        for lit in pending:
+            if -lit in assigned:
+                return None, None
+            assigned.add(lit)
+        pending = []
+        simplified = []
+        for clause in clauses:
+            if any(lit in assigned for lit in clause):
+                continue
+            reduced = tuple(lit for lit in clause if -lit not in assigned)
+            if not reduced:
+                return None, None
+            if len(reduced) == 1:
+                pending.append(reduced[0])
+            else:
+                simplified.append(reduced)
+        clauses = simplified
+        if not pending:
+            return clauses, assigned
+
+
+def variables_of(clauses):
+    """Returns the set of variables occurring in a list of clauses."""
+    return {abs(lit) for clause in clauses for lit in clause}
+
+
+def components(clauses):
+    """Splits a list of clauses into lists of clauses that share no variables."""
+    parent = {}
+
+    def find(v):
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    for clause in clauses:
+        first = find(parent.setdefault(abs(clause[0]), abs(clause[0])))
+        for lit in clause[1:]:
+            root = find(parent.setdefault(abs(lit), abs(lit)))
+            if root != first:
+                parent[root] = first
+    groups = {}
+    for clause in clauses:
+        groups.setdefault(find(abs(clause[0])), []).append(clause)
+    return list(groups.values())
+
+
+def branching_variable(clauses):
+    """Returns the variable with the most occurrences in the clauses."""
+    return Counter(abs(lit) for clause in clauses for lit in clause).most_common(1)[0][0]
+
+
+def component_key(clauses):
+    """Returns a key that identifies a component independently of the order of its clauses and literals."""
+    return frozenset(tuple(sorted(clause)) for clause in clauses)
+
+
+def count_clauses(clauses, variables, cache=None):
+    """Returns the number of assignments to variables (a set containing the variables of the clauses)
+    that satisfy all clauses."""
+    if cache is None:
+        cache = {}
+    clauses, assigned = condition(clauses, [])
+    if clauses is None:
+        return 0
+    free = variables - variables_of(clauses) - {abs(lit) for lit in assigned}
+    return search(clauses, assigned, free, cache, _multiply, sum, 0)
+
+
+def _multiply(assigned, free, values):
+    return 2 ** len(free) * math.prod(values)
+
+
+def search(clauses, assigned, free, cache, combine, decide, absorbing):
+    """Runs the exhaustive search on clauses already closed under unit propagation, and returns a value
+    built bottom-up from its trace (a count for count_clauses, a circuit node for dnnf.compile_clauses).
+    combine(assigned, free, values) gives the value of a branch that set the literals assigned, left the
+    variables free unconstrained, and split into components with the given values; decide(values) gives the value
+    of a component from those of its branches that did not fail, on var and then on -var. A component whose value
+    is absorbing makes its branch absorbing, and the remaining components of the branch are skipped.
+    The values are cached by component in cache. The top branch is given by assigned and free.
+
+    The search is driven by an explicit stack, so its depth is not bounded by the recursion limit of Python.
+    A branch frame [assigned, free, components, values] collects the values of its components, and a decision
+    frame [clauses, key, variables, literals, values] the values of its branches."""
+    stack = [[assigned, free, components(clauses), []]]
+    value = None  # value of the frame popped last, for the frame below it
+    while True:
+        frame = stack[-1]
+        if value is not None:
+            frame[-1].append(value)
+            value = None
+        if len(frame) == 4:
+            assigned, free, parts, values = frame
+            if values and values[-1] == absorbing:
+                value = absorbing
+            elif len(values) == len(parts):
+                value = combine(assigned, free, values)
+            else:
+                component = parts[len(values)]
+                key = component_key(component)
+                if key in cache:
+                    value = cache[key]
+                    continue
+                var = branching_variable(component)
+                stack.append([component, key, variables_of(component), [-var, var], []])
+                continue
+        else:
+            component, key, variables, literals, values = frame
+            if literals:
+                reduced, implied = condition(component, [literals.pop()])
+                if reduced is not None:
+                    free = variables - variables_of(reduced) - {abs(lit) for lit in implied}
+                    stack.append([implied, free, components(reduced), []])
+                continue
+            value = cache[key] = decide(values)
+        stack.pop()
+        if not stack:
+            return value
+
+
+def count_cnf_models(cnf):
+    """Returns the number of assignments to the variables 1, ..., cnf.num_vars of a CNF container (see cnf.py)
+    that satisfy all its clauses."""
+    clauses = [tuple(clause) for clause in cnf]
+    return count_clauses(clauses, set(range(1, cnf.num_vars + 1)))
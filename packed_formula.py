@@ -0,0 +1,226 @@
+"""The goal in this module is to store a propositional formula in a few flat arrays, so that it can be copied
+between processes without pickling its nodes and evaluated without building them.
+
+A packed formula lists its distinct nodes in postorder (children first, so the root is the last node):
+kinds[i] is the connective of node i (ATOM, NOT, AND, OR or IMPLIES) and children[2 * i], children[2 * i + 1]
+are the indices of its children (for an atom, children[2 * i] is the index of its name in symbols). A node
+shared by several parents is stored once, so the size is linear in the size of the formula DAG, and the
+format does not depend on the depth of the formula: the long chains of and_all are packed and rebuilt
+without recursion.
+
+The bytes of a packed formula (see to_bytes) are a header, the kinds (one byte per node), the children
+(32-bit integers) and the names of the atoms (UTF-8, separated by zero bytes). share_formula copies them into a
+multiprocessing.shared_memory block, and attach_formula reads a block without copying the arrays: the formula
+can then be evaluated directly from the shared memory (evaluate, count_models), and its Python nodes are only
+built if formula() is called. count_models_parallel uses this to split the truth table of a formula between
+processes: every worker attaches the same block and counts the models in its own range of valuations.
+"""
+
+import os
+import struct
+from array import array
+from contextlib import contextmanager
+from multiprocessing import get_context, shared_memory
+
+from formula import Atom, Not, And, Or, Implies
+from functions import postorder
+
+ATOM, NOT, AND, OR, IMPLIES = range(5)
+KINDS = {Not: NOT, And: AND, Or: OR, Implies: IMPLIES}
+CONSTRUCTORS = {NOT: Not, AND: And, OR: Or, IMPLIES: Implies}
+MAGIC = b'LCFORM01'
+HEADER = struct.Struct('<8sqq')  # magic, number of nodes, length of the names in bytes
+BLOCK_ATOMS = 16  # valuations are counted 2 ** BLOCK_ATOMS at a time, one bit each
+
+
+class PackedFormula:
+    """A formula stored as the arrays kinds and children and the list of atom names symbols
+    (see the module docstring)."""
+
+    def __init__(self, kinds, children, symbols):
+        self.kinds = kinds
+        self.children = children
+        self.symbols = symbols
+        self._formula = None
+
+    def __len__(self):
+        """Returns the number of distinct nodes."""
+        return len(self.kinds)
+
+    def to_bytes(self):
+        names = '\0'.join(self.symbols).encode('utf-8')
+        kinds = bytes(self.kinds)
+        children = array('i', self.children)
+        return b''.join([HEADER.pack(MAGIC, len(kinds), len(names)), kinds, b'\0' * (-len(kinds) % 4),
+                         children.tobytes(), names])
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        """Returns the packed formula stored in a bytes-like object (such as the buffer of a shared memory
+        block) by to_bytes. The arrays are memoryviews of the buffer, so nothing is copied but the names;
+        release them (see release) before the buffer is closed."""
+        view = memoryview(buffer)
+        magic, num_nodes, names_length = HEADER.unpack(view[:HEADER.size])
+        if magic != MAGIC:
+            raise ValueError('the buffer does not hold a packed formula')
+        start = HEADER.size
+        kinds = view[start:start + num_nodes]
+        start += num_nodes + -num_nodes % 4
+        children = view[start:start + 8 * num_nodes].cast('i')
+        start += 8 * num_nodes
+        names = bytes(view[start:start + names_length]).decode('utf-8')
+        return cls(kinds, children, names.split('\0') if num_nodes else [])
+
+    def release(self):
+        """Releases the memoryviews created by from_buffer."""
+        for data in (self.kinds, self.children):
+            if isinstance(data, memoryview):
+                data.release()
+
+    def formula(self):
+        """Returns the formula as Python nodes, built the first time this method is called. Shared nodes are
+        built once, and so are shared in the result."""
+        if self._formula is None:
+            kinds, children = self.kinds, self.children
+            nodes = []
+            for i in range(len(kinds)):
+                kind = kinds[i]
+                if kind == ATOM:
+                    nodes.append(Atom(self.symbols[children[2 * i]]))
+                elif kind == NOT:
+                    nodes.append(Not(nodes[children[2 * i]]))
+                else:
+                    nodes.append(CONSTRUCTORS[kind](nodes[children[2 * i]], nodes[children[2 * i + 1]]))
+            self._formula = nodes[-1]
+        return self._formula
+
+    def evaluate_bits(self, values, mask=1):
+        """Evaluates the formula on integers used as vectors of truth values: values[s] is the vector of the
+        atom named symbols[s] and mask has a bit set for every position in use. Returns the vector of the formula.
+        With mask=1 and values 0 or 1, this is the truth value of the formula in one interpretation."""
+        kinds, children = self.kinds, self.children
+        results = []
+        for i in range(len(kinds)):
+            kind = kinds[i]
+            first = children[2 * i]
+            if kind == ATOM:
+                results.append(values[first])
+            elif kind == NOT:
+                results.append(mask & ~results[first])
+            elif kind == AND:
+                results.append(results[first] & results[children[2 * i + 1]])
+            elif kind == OR:
+                results.append(results[first] | results[children[2 * i + 1]])
+            else:
+                results.append(mask & ~results[first] | results[children[2 * i + 1]])
+        return results[-1]
+
+    def evaluate(self, interpretation):
+        """Returns the truth value of the formula in an interpretation, a dictionary whose keys are atoms or
+        atom names (as in semantics.truth_value), without building its nodes."""
+        values = [int(bool(interpretation.get(name) or interpretation.get(Atom(name)))) for name in self.symbols]
+        return bool(self.evaluate_bits(values))
+
+    def count_models(self, start=0, stop=None):
+        """Returns the number of models among the valuations numbered start to stop - 1 (all of them,
+        by default), where atom symbols[s] is true in valuation k if bit s of k is set. Valuations are
+        evaluated 2 ** BLOCK_ATOMS at a time, as the bits of integers, so ranges aligned to that block size
+        are the cheapest."""
+        n = len(self.symbols)
+        if stop is None:
+            stop = 2 ** n
+        low = min(n, BLOCK_ATOMS)
+        size = 2 ** low
+        mask = (1 << size) - 1
+        patterns = []
+        for s in range(low):
+            half = 1 << s
+            unit = ((1 << half) - 1) << half  # half zeros and then half ones
+            patterns.append(unit * (mask // ((1 << 2 * half) - 1)))
+        total = 0
+        for base in range(start - start % size, stop, size):
+            values = patterns + [mask if base >> s & 1 else 0 for s in range(low, n)]
+            bits = self.evaluate_bits(values, mask)
+            if base < start:
+                bits &= mask ^ ((1 << start - base) - 1)
+            if base + size > stop:
+                bits &= (1 << stop - base) - 1
+            total += bits.bit_count()
+        return total
+
+
+def pack(formula):
+    """Returns the PackedFormula of a formula. Node objects reached more than once are stored once,
+    and so are atoms with the same name."""
+    kinds = array('B')
+    children = array('i')
+    symbols = []
+    index = {}
+
+    def combine(node, values):
+        if isinstance(node, Atom):
+            name = str(node.name)
+            if name not in index:
+                index[name] = len(symbols)
+                symbols.append(name)
+            kinds.append(ATOM)
+            children.extend((index[name], -1))
+        else:
+            kinds.append(KINDS[type(node)])
+            children.extend((values[0], values[1] if len(values) > 1 else -1))
+        return len(kinds) - 1
+
+    postorder(formula, combine, memo=True)
+    return PackedFormula(kinds, children, symbols)
+
+
+def share_formula(formula):
+    """Copies a formula (or a PackedFormula) into a new shared memory block and returns the block."""
+    packed = formula if isinstance(formula, PackedFormula) else pack(formula)
+    data = packed.to_bytes()
+    block = shared_memory.SharedMemory(create=True, size=len(data))
+    block.buf[:len(data)] = data
+    return block
+
+
+@contextmanager
+def attach_formula(name):
+    """Attaches the shared memory block created by share_formula and gives its PackedFormula, whose arrays
+    are views of the block, to a with block. For example,
+
+    with attach_formula(name) as packed:
+        packed.evaluate({'p': True})
+    """
+    block = shared_memory.SharedMemory(name=name)
+    packed = PackedFormula.from_buffer(block.buf)
+    try:
+        yield packed
+    finally:
+        packed.release()
+        block.close()
+
+
+def _count_range(name, start, stop):
+    with attach_formula(name) as packed:
+        return packed.count_models(start, stop)
+
+
+def count_models_parallel(formula, workers=None):
+    """Returns the number of models of formula over its atoms by splitting its truth table between worker
+    processes, which read the formula from one shared memory block."""
+    packed = pack(formula)
+    total = 2 ** len(packed.symbols)
+    workers = workers or os.cpu_count() or 1
+    size = 2 ** min(len(packed.symbols), BLOCK_ATOMS)
+    blocks = total // size
+    bounds = [size * (blocks * k // workers) for k in range(workers + 1)]
+    ranges = [(bounds[k], bounds[k + 1]) for k in range(workers) if bounds[k] < bounds[k + 1]]
+    if len(ranges) <= 1:
+        return packed.count_models()
+    block = share_formula(packed)
+    try:
+        with get_context().Pool(len(ranges)) as pool:
+            return sum(pool.starmap(_count_range, [(block.name, start, stop) for start, stop in ranges]))
+    finally:
+        block.close()
+        block.unlink()
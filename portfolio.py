@@ -0,0 +1,246 @@
+"""The goal in this module is to use several cores on one satisfiability problem with a portfolio of solvers.
+
+portfolio_solve(cnf, workers=4) runs four differently configured CDCL solvers (see dpll.Solver) on the same CNF,
+each in its own process, and returns the answer of the first one to finish. The others are stopped at their next
+restart. Solvers with different seeds, default phases, restart intervals and activity decays often take very
+different times on the same problem, so the portfolio is usually faster than any single configuration.
+
+The CNF is copied once into a shared memory block, from which every worker builds its solver, instead of being
+pickled for each process. A formula is shipped the same way, packed by packed_formula.py: every worker
+rebuilds it and writes its own Tseitin encoding, which is the same in all workers. With share=True, the workers
+also exchange short learned clauses at their restarts, through an append-only buffer in shared memory: each
+worker writes the clauses it learned and reads the ones written by the others since its last restart.
+"""
+
+import os
+import queue
+from array import array
+from multiprocessing import get_context, shared_memory
+
+from cnf import CNF
+from dpll import Solver, tseitin_cnf
+from formula import Formula
+from packed_formula import share_formula, attach_formula
+
+DECAYS = (0.95, 0.9, 0.99, 0.85)
+RESTART_BASES = (100, 50, 300, 1000)
+
+
+def configurations(count):
+    """Returns count diversified keyword arguments for Solver."""
+    return [dict(seed=k if k else None, phase=k % 2 == 1, var_decay=DECAYS[k % len(DECAYS)],
+                 restart_base=RESTART_BASES[k // 2 % len(RESTART_BASES)]) for k in range(count)]
+
+
+def share_cnf(cnf):
+    """Copies a CNF into a new shared memory block and returns the block. The block holds three 64-bit
+    integers (number of variables, clauses and literals), the clause offsets and then the literals."""
+    header = array('q', [cnf.num_vars, len(cnf), len(cnf.literals)])
+    offsets = cnf.offsets.tobytes()
+    literals = cnf.literals.tobytes()
+    block = shared_memory.SharedMemory(create=True, size=max(1, len(header) * 8 + len(offsets) + len(literals)))
+    start = len(header) * 8
+    block.buf[:start] = header.tobytes()
+    block.buf[start:start + len(offsets)] = offsets
+    block.buf[start + len(offsets):start + len(offsets) + len(literals)] = literals
+    return block
+
+
+def attach_cnf(name):
+    """Returns a CNF built from the shared memory block created by share_cnf."""
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        header = array('q')
+        header.frombytes(block.buf[:24])
+        num_vars, num_clauses, num_literals = header
+        cnf = CNF()
+        end = 24 + 8 * (num_clauses + 1)
+        cnf.offsets = array('q')
+        cnf.offsets.frombytes(block.buf[24:end])
+        cnf.literals.frombytes(block.buf[end:end + 4 * num_literals])
+        cnf.num_vars = num_vars
+        cnf.atoms = [None] * (num_vars + 1)
+        return cnf
+    finally:
+        block.close()
+
+
+class ClauseBuffer:
+    """An append-only buffer of clauses in shared memory, written and read by several processes.
+    A record is [worker, length, literal_1, ..., literal_length]. The number of integers written so far
+    is a shared counter; records are only appended under its lock, and when the buffer is full,
+    new clauses are dropped."""
+
+    def __init__(self, name, position, capacity):
+        self.name = name
+        self.position = position
+        self.capacity = capacity
+        self.block = None
+        self.data = None
+
+    @classmethod
+    def create(cls, context, capacity=1 << 20):
+        block = shared_memory.SharedMemory(create=True, size=4 * capacity)
+        buffer = cls(block.name, context.Value('q', 0), capacity)
+        buffer.block = block
+        return buffer
+
+    def __getstate__(self):
+        return self.name, self.position, self.capacity
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def open(self):
+        if self.block is None:
+            self.block = shared_memory.SharedMemory(name=self.name)
+        self.data = self.block.buf.cast('i')
+
+    def close(self, unlink=False):
+        if self.data is not None:
+            self.data.release()
+            self.data = None
+        if self.block is not None:
+            self.block.close()
+            if unlink:
+                self.block.unlink()
+            self.block = None
+
+    def write(self, worker, clauses):
+        records = []
+        for clause in clauses:
+            records += [worker, len(clause)] + clause
+        if not records:
+            return
+        with self.position.get_lock():
+            start = self.position.value
+            if start + len(records) > self.capacity:
+                return
+            self.data[start:start + len(records)] = array('i', records)
+            self.position.value = start + len(records)
+
+    def read(self, worker, start):
+        """Returns the clauses written by other workers from position start on, and the new position."""
+        with self.position.get_lock():
+            end = self.position.value
+        clauses = []
+        data = self.data
+        k = start
+        while k < end:
+            length = data[k + 1]
+            if data[k] != worker:
+                clauses.append(list(data[k + 2:k + 2 + length]))
+            k += 2 + length
+        return clauses, end
+
+
+def _exchange(worker, buffer, max_length):
+    # on_restart hook that writes the new short learned clauses and units of a solver and adds the ones of others
+    exported = set()
+    state = {'units': 0, 'read': 0}
+
+    def dimacs(lit):
+        return -(lit >> 1) if lit & 1 else lit >> 1
+
+    def on_restart(solver):
+        clauses = [[dimacs(lit)] for lit in solver.trail[state['units']:]]
+        state['units'] = len(solver.trail)
+        for clause in solver.learnts:
+            if len(clause) <= max_length:
+                # keyed on the literals, since the solver reorders them and the id of a deleted clause is reused
+                key = frozenset(clause)
+                if key not in exported:
+                    exported.add(key)
+                    clauses.append([dimacs(lit) for lit in clause])
+        buffer.write(worker, clauses)
+        imported, state['read'] = buffer.read(worker, state['read'])
+        for clause in imported:
+            if not solver.add_clause(clause):
+                break
+        state['units'] = len(solver.trail)
+        return False
+
+    return on_restart
+
+
+def _work(worker, name, packed, configuration, buffer, max_length, stop, results):
+    # packed tells whether the block holds a packed formula (see packed_formula.py) or a CNF
+    if packed:
+        with attach_formula(name) as formula:
+            cnf = tseitin_cnf(formula.formula())
+    else:
+        cnf = attach_cnf(name)
+    solver = Solver(**configuration)
+    solver.add_cnf(cnf)
+    exchange = None
+    if buffer is not None:
+        buffer.open()
+        exchange = _exchange(worker, buffer, max_length)
+
+    def on_restart(solver):
+        if stop.is_set():
+            return True
+        return exchange is not None and exchange(solver)
+
+    solver.on_restart = on_restart
+    try:
+        result = solver.solve()
+    finally:
+        if buffer is not None:
+            buffer.close()
+    if result is not None:
+        model = None
+        if result:
+            model = cnf.interpretation(solver.model) if packed else solver.model
+        results.put((worker, result, model))
+
+
+def portfolio_solve(cnf, workers=None, settings=None, share=True, max_length=8, timeout=None):
+    """Solves a CNF container (see cnf.py) or a formula with a portfolio of solvers in parallel processes.
+    Returns a model if the problem is satisfiable (for a CNF, a dictionary from variables to truth values,
+    as Solver.model; for a formula, from atoms to truth values, as satisfiability_cdcl), False if it is
+    unsatisfiable, or None if no worker answered within timeout seconds. Raises RuntimeError if every worker
+    exits without an answer before then.
+
+    workers is the number of processes (by default, the number of cores) and settings a list of
+    keyword arguments for Solver, one per worker (by default, configurations(workers)). With share=True,
+    learned clauses with at most max_length literals are exchanged between the workers."""
+    if settings is None:
+        settings = configurations(workers or os.cpu_count() or 1)
+    context = get_context()
+    packed = isinstance(cnf, Formula)
+    block = share_formula(cnf) if packed else share_cnf(cnf)
+    buffer = ClauseBuffer.create(context) if share and len(settings) > 1 else None
+    stop = context.Event()
+    results = context.Queue()
+    processes = [context.Process(target=_work, daemon=True,
+                                 args=(k, block.name, packed, configuration, buffer, max_length, stop, results))
+                 for k, configuration in enumerate(settings)]
+    answer = None
+    try:
+        for process in processes:
+            process.start()
+        waited = 0.0
+        while timeout is None or waited < timeout:
+            try:
+                worker, result, model = results.get(timeout=0.05)
+                answer = model if result else False
+                break
+            except queue.Empty:
+                waited += 0.05
+                if not any(process.is_alive() for process in processes) and results.empty():
+                    exit_codes = [process.exitcode for process in processes]
+                    raise RuntimeError(f'all portfolio workers exited without an answer (exit codes {exit_codes})')
+    finally:
+        stop.set()
+        for process in processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        results.close()
+        block.close()
+        block.unlink()
+        if buffer is not None:
+            buffer.close(unlink=True)
+    return answer
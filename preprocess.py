@@ -0,0 +1,343 @@
+"""The goal in this module is to simplify a CNF before it is given to the SAT solver.
+
+Tseitin encodings (see dpll.tseitin_cnf) and cardinality encodings (see cardinality.py) introduce many auxiliary
+variables and clauses that can be removed cheaply. The Preprocessor applies, until nothing changes or a number of
+rounds is reached:
+
+unit propagation: clauses satisfied by a unit literal are removed and its negation is removed from the others;
+pure literals: a variable that occurs with only one sign is set to satisfy all its clauses;
+subsumption: a clause that contains another clause is removed, and a clause C ∨ ¬l is strengthened to C when
+C ∨ l subsumes it (self-subsuming resolution); both use occurrence lists;
+equivalent literals: literals on a cycle of binary implications are replaced by one representative;
+bounded variable elimination: a variable is removed by replacing its clauses with all their resolvents on it,
+when that does not increase the number of clauses;
+failed-literal probing: if propagating a literal ends in a conflict, its negation is a unit, and literals implied
+by both values of a variable are units too.
+
+Variables keep their numbers, so a model of the simplified CNF is a model of the original one after extend,
+which replays a stack of removed clauses backwards and flips eliminated variables where needed. For example:
+
+preprocessor = Preprocessor(cnf)
+simplified = preprocessor.run()
+solver = Solver()
+solver.add_cnf(simplified)
+if solver.solve():
+    interpretation = preprocessor.interpretation(solver.model)   # over the atoms of cnf
+"""
+
+from collections import Counter, defaultdict
+
+from cnf import CNF
+from dpll import Solver
+
+
+class Preprocessor:
+    def __init__(self, cnf, frozen=()):
+        """Reads the clauses of a CNF container. The variables in frozen are neither eliminated nor replaced,
+        so they keep their meaning in the simplified CNF (for example, variables that will be assumed)."""
+        self.num_vars = cnf.num_vars
+        self.atoms = list(cnf.atoms)
+        self.frozen = set(frozen)
+        self.clauses = {}
+        self.occurrences = defaultdict(set)
+        self.values = {}  # variables fixed by units
+        self.eliminated = set()
+        self.stack = []  # (witness literal, clause), replayed backwards by extend
+        self.pending = []  # units not yet propagated
+        self.unsatisfiable = False
+        self.stats = Counter()
+        self.next_id = 0
+        for clause in cnf:
+            self._add(list(clause))
+
+    def _add(self, clause):
+        # adds a clause, dropping tautologies and repeated literals; units are queued for propagation
+        literals = set(clause)
+        if any(-lit in literals for lit in literals):
+            return None
+        if any(self._false(lit) is False for lit in literals):
+            return None  # satisfied by a unit
+        literals = [lit for lit in literals if abs(lit) not in self.values]
+        if not literals:
+            self.unsatisfiable = True
+            return None
+        if len(literals) == 1:
+            self._assign(literals[0])
+            return None
+        cid = self.next_id
+        self.next_id += 1
+        self.clauses[cid] = literals
+        for lit in literals:
+            self.occurrences[lit].add(cid)
+        return cid
+
+    def _false(self, lit):
+        # True if lit is false under the units, False if it is true, None if its variable is free
+        value = self.values.get(abs(lit))
+        return None if value is None else value != (lit > 0)
+
+    def _remove(self, cid):
+        for lit in self.clauses.pop(cid):
+            self.occurrences[lit].discard(cid)
+
+    def _assign(self, lit):
+        if abs(lit) in self.values:
+            if self._false(lit):
+                self.unsatisfiable = True
+            return
+        self.values[abs(lit)] = lit > 0
+        self.stack.append((lit, [lit]))
+        self.pending.append(lit)
+
+    def propagate(self):
+        """Top-level unit propagation."""
+        while self.pending and not self.unsatisfiable:
+            lit = self.pending.pop()
+            for cid in list(self.occurrences[lit]):
+                self._remove(cid)
+                self.stats['satisfied clauses'] += 1
+            for cid in list(self.occurrences[-lit]):
+                clause = self.clauses[cid]
+                self._remove(cid)
+                self._add([other for other in clause if other != -lit])
+        return not self.unsatisfiable
+
+    def pure_literals(self):
+        """Sets every variable that occurs with a single sign so that all its clauses are satisfied."""
+        for v in range(1, self.num_vars + 1):
+            if v in self.values or v in self.eliminated or v in self.frozen:
+                continue
+            positive, negative = self.occurrences[v], self.occurrences[-v]
+            if bool(positive) != bool(negative):
+                self._assign(v if positive else -v)
+                self.stats['pure literals'] += 1
+        return self.propagate()
+
+    def subsume(self, max_length=64):
+        """Removes subsumed clauses and strengthens clauses by self-subsuming resolution,
+        trying every clause with at most max_length literals from the shortest to the longest."""
+        for cid in sorted(self.clauses, key=lambda cid: len(self.clauses[cid])):
+            clause = self.clauses.get(cid)
+            if clause is None or len(clause) > max_length:
+                continue
+            literals = set(clause)
+            best = min(clause, key=lambda lit: len(self.occurrences[lit]))
+            for other in list(self.occurrences[best]):
+                if other != cid and len(self.clauses[other]) >= len(clause) and literals.issubset(self.clauses[other]):
+                    self._remove(other)
+                    self.stats['subsumed clauses'] += 1
+            for lit in clause:
+                rest = literals - {lit}
+                for other in list(self.occurrences[-lit]):
+                    target = self.clauses[other]
+                    if len(target) >= len(clause) and rest.issubset(target):
+                        self._remove(other)
+                        self._add([x for x in target if x != -lit])
+                        self.stats['strengthened clauses'] += 1
+            if self.unsatisfiable or not self.propagate():
+                return False
+        return True
+
+    def equivalent_literals(self):
+        """Finds the strongly connected components of the binary implication graph and replaces each literal by
+        the representative of its component (the literal with the smallest variable, preferring frozen ones)."""
+        graph = defaultdict(list)
+        for clause in self.clauses.values():
+            if len(clause) == 2:
+                a, b = clause
+                graph[-a].append(b)
+                graph[-b].append(a)
+        representative = {}
+        for component in _components(graph):
+            variables = {abs(lit) for lit in component}
+            if len(variables) < len(component):
+                self.unsatisfiable = True  # l and ¬l are equivalent
+                return False
+            if len(component) < 2:
+                continue
+            rep = min(component, key=lambda lit: (abs(lit) not in self.frozen, abs(lit)))
+            for lit in component:
+                if lit != rep and abs(lit) not in self.frozen:
+                    representative[lit] = rep
+        for v in range(1, self.num_vars + 1):
+            if v in representative:
+                self._replace(v, representative[v])
+            if self.unsatisfiable:
+                return False
+        return self.propagate()
+
+    def _replace(self, v, rep):
+        # replaces variable v by literal rep (v ↔ rep) in all clauses
+        self.stack.append((v, [v, -rep]))
+        self.stack.append((-v, [-v, rep]))
+        self.eliminated.add(v)
+        self.stats['equivalent literals'] += 1
+        for lit, image in ((v, rep), (-v, -rep)):
+            for cid in list(self.occurrences[lit]):
+                clause = self.clauses[cid]
+                self._remove(cid)
+                self._add([image if x == lit else x for x in clause])
+
+    def eliminate(self, max_resolvent=16, max_occurrences=16):
+        """Bounded variable elimination: removes each variable whose resolvents (without tautologies, with at most
+        max_resolvent literals) are no more than its clauses. Variables in more than max_occurrences clauses
+        of each sign are skipped."""
+        order = sorted((v for v in range(1, self.num_vars + 1)
+                        if v not in self.values and v not in self.eliminated and v not in self.frozen),
+                       key=lambda v: len(self.occurrences[v]) * len(self.occurrences[-v]))
+        for v in order:
+            positive, negative = list(self.occurrences[v]), list(self.occurrences[-v])
+            if not positive and not negative or v in self.values:
+                continue
+            if len(positive) > max_occurrences and len(negative) > max_occurrences:
+                continue
+            resolvents = []
+            for p in positive:
+                left = [lit for lit in self.clauses[p] if lit != v]
+                for n in negative:
+                    resolvent = set(left)
+                    resolvent.update(lit for lit in self.clauses[n] if lit != -v)
+                    if any(-lit in resolvent for lit in resolvent):
+                        continue
+                    resolvents.append(resolvent)
+                    if len(resolvent) > max_resolvent or len(resolvents) > len(positive) + len(negative):
+                        break
+                else:
+                    continue
+                break
+            else:
+                for cid in positive:
+                    self.stack.append((v, self.clauses[cid]))
+                    self._remove(cid)
+                for cid in negative:
+                    self.stack.append((-v, self.clauses[cid]))
+                    self._remove(cid)
+                self.eliminated.add(v)
+                self.stats['eliminated variables'] += 1
+                for resolvent in resolvents:
+                    self._add(list(resolvent))
+                if not self.propagate():
+                    return False
+        return True
+
+    def probe(self, limit=1000):
+        """Failed-literal probing on at most limit variables, those in the most binary clauses first."""
+        solver = Solver()
+        for _ in range(self.num_vars):
+            solver.new_var()
+        for clause in self.clauses.values():
+            solver.add_clause(clause)
+        binary = Counter(abs(lit) for clause in self.clauses.values() if len(clause) == 2 for lit in clause)
+        for v, _ in binary.most_common(limit):
+            if v in self.values:
+                continue
+            positive, negative = solver.implied([v]), solver.implied([-v])
+            if positive is None and negative is None:
+                self.unsatisfiable = True
+                return False
+            if positive is None or negative is None:
+                units = [-v if positive is None else v]
+                self.stats['failed literals'] += 1
+            else:
+                units = list(set(positive) & set(negative))
+                self.stats['necessary assignments'] += len(units)
+            for unit in units:
+                self._assign(unit)
+                solver.add_clause([unit])
+        return self.propagate()
+
+    def run(self, rounds=4):
+        """Applies all simplifications until nothing changes (or for the given number of rounds)
+        and returns the simplified CNF."""
+        steps = (self.propagate, self.pure_literals, self.subsume, self.equivalent_literals,
+                 self.eliminate, self.probe)
+        for _ in range(rounds):
+            size = (len(self.clauses), len(self.values), len(self.eliminated))
+            for step in steps:
+                if not step():
+                    return self.to_cnf()
+            if size == (len(self.clauses), len(self.values), len(self.eliminated)):
+                break
+        return self.to_cnf()
+
+    def to_cnf(self):
+        """Returns the current clauses as a CNF container with the variables (and atoms) of the original one."""
+        cnf = CNF()
+        cnf.num_vars = self.num_vars
+        cnf.atoms = list(self.atoms)
+        cnf.variables = {atom: v for v, atom in enumerate(self.atoms) if atom is not None}
+        if self.unsatisfiable:
+            cnf.add_clause([])
+            return cnf
+        for clause in self.clauses.values():
+            cnf.add_clause(clause)
+        for v in sorted(self.frozen):
+            if v in self.values:
+                cnf.add_clause([v if self.values[v] else -v])  # so that assuming the other value fails
+        return cnf
+
+    def extend(self, model):
+        """Turns a model of the simplified CNF (a dictionary from variables to truth values) into a model of
+        the original CNF."""
+        model = {v: model.get(v, False) for v in range(1, self.num_vars + 1)}
+        for witness, clause in reversed(self.stack):
+            if not any(model[abs(lit)] == (lit > 0) for lit in clause):
+                model[abs(witness)] = witness > 0
+        return model
+
+    def interpretation(self, model):
+        """Returns extend(model) as a dictionary from the atoms of the original CNF to truth values."""
+        model = self.extend(model)
+        return {atom: model[v] for v, atom in enumerate(self.atoms) if atom is not None}
+
+
+def _components(graph):
+    # strongly connected components of a graph given as a dictionary of successor lists (Tarjan, without recursion)
+    index, low, on_stack = {}, {}, set()
+    stack, components = [], []
+    counter = 0
+    for root in list(graph):
+        if root in index:
+            continue
+        work = [(root, iter(graph[root]))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in index:
+                    index[successor] = low[successor] = counter
+                    counter += 1
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(graph.get(successor, ()))))
+                    break
+                if successor in on_stack:
+                    low[node] = min(low[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    low[work[-1][0]] = min(low[work[-1][0]], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+
+def preprocess_and_solve(cnf, frozen=()):
+    """Simplifies a CNF with a Preprocessor, solves it with the CDCL solver and returns a model of the original
+    CNF (a dictionary from variables to truth values) or False if it is unsatisfiable."""
+    preprocessor = Preprocessor(cnf, frozen)
+    solver = Solver()
+    solver.add_cnf(preprocessor.run())
+    if not solver.solve():
+        return False
+    return preprocessor.extend(solver.model)
@@ -0,0 +1,164 @@
+"""The goal in this module is to learn interpretable classification rules from the binarized datasets of the
+project (such as iris_features_binarized_setosa_others.csv) with a SAT solver.
+
+A rule is a conjunction of feature literals, such as (petal length (cm) <= 1.5) ∧ ¬(sepal width (cm) <= 2.7),
+and a set of k rules classifies a sample as positive when at least one rule covers it, that is, it is the DNF
+formula rule_1 ∨ ... ∨ rule_k over atoms named after the features. The learner looks for a set of rules that
+classifies every sample of the dataset correctly. For rule j and feature f, the variable uses(j, f) means that
+f is a literal of the rule and uses_negation(j, f) that ¬f is; then
+
+every negative sample is not covered by any rule: for each rule, some literal of the rule is false in the sample;
+every positive sample is covered by some rule: covers(j, e) for some j, and covers(j, e) forbids the literals
+that are false in the sample.
+
+The number of rules is searched incrementally, from 1 on, with one incremental solver (see dpll.Solver):
+the variables and the clauses of rule j are added once and kept, while the coverage clauses of the positive
+samples, which depend on k, are added in a scope (see Solver.push) that is closed before the next rule is added.
+
+The rows are loaded as bit columns by datasets.load, and equal rows are merged before encoding, so the number of
+clauses depends on the number of distinct samples and not on the number of rows.
+"""
+
+from functools import reduce
+
+from formula import Atom, Not, And, Or
+from dpll import Solver
+from cardinality import at_most_k
+from cnf import CNF
+from datasets import load
+
+try:
+    import numpy as np
+except ImportError:  # samples are then read from the Python integer columns
+    np = None
+
+
+def unique_samples(dataset, positive=None):
+    """Returns the distinct samples of a dataset (see datasets.load) as a list of pairs (bits, label), where bits
+    is an integer whose bit f is feature f and label tells whether the sample is of the positive class (by default,
+    the class of the first row). Raises ValueError if two equal rows have different labels, since no set of rules
+    can then classify both."""
+    if positive is None and dataset.classes:
+        positive = dataset.classes[0]
+    num_features = len(dataset.features)
+    rows = dataset.all_rows()
+    labels = dataset.class_column(positive) if positive in dataset.classes else rows & 0
+    # the label is read as feature num_features, so that equal rows are merged with their labels
+    columns = list(dataset.columns) + [labels]
+    if np is not None and not isinstance(rows, int):
+        words = np.array(columns, dtype='<u8').reshape(len(columns), -1)
+        bits = np.unpackbits(words.view(np.uint8), axis=1, count=dataset.num_rows, bitorder='little')
+        distinct = [sum(1 << f for f, bit in enumerate(row) if bit) for row in np.unique(bits.T, axis=0)]
+    else:
+        distinct = [0] * dataset.num_rows
+        for f, column in enumerate(columns):
+            while column:
+                lowest = column & -column
+                distinct[lowest.bit_length() - 1] |= 1 << f
+                column ^= lowest
+    samples = {}
+    for row in distinct:
+        bits, label = row & ~(1 << num_features), bool(row >> num_features & 1)
+        if samples.setdefault(bits, label) != label:
+            raise ValueError('the dataset has equal rows with different classes')
+    return list(samples.items())
+
+
+class RuleLearner:
+    """Incremental SAT encoding of the rules of a dataset. add_rule adds a rule to the search and solve
+    checks whether the current number of rules can classify every sample. For example,
+
+    learner = RuleLearner(features, samples)
+    learner.add_rule()
+    learner.solve()   # True if one rule is enough
+    learner.rules()   # the rules found, as lists of literals (atoms or negated atoms)
+
+    If max_literals is given, every rule has at most that many literals."""
+
+    def __init__(self, features, samples, max_literals=None):
+        self.features = list(features)
+        self.positives = [bits for bits, label in samples if label]
+        self.negatives = [bits for bits, label in samples if not label]
+        self.max_literals = max_literals
+        self.solver = Solver()
+        self.uses = []  # uses[j][f] and uses[j][f] + 1 are the variables of f and of ¬f in rule j
+        self.covers = []  # covers[j][e] is the variable of "rule j covers positive sample e"
+        self.model = None
+
+    def add_rule(self):
+        """Adds the variables and the clauses of one more rule."""
+        solver = self.solver
+        num_features = len(self.features)
+        uses = []
+        for _ in range(num_features):
+            uses.append(solver.new_var())
+            solver.new_var()
+        covers = [solver.new_var() for _ in self.positives]
+        for v in uses:
+            solver.add_clause([-v, -(v + 1)])
+        for bits in self.negatives:
+            # some literal of the rule is false in the sample
+            solver.add_clause([v + 1 if bits >> f & 1 else v for f, v in enumerate(uses)])
+        for e, bits in enumerate(self.positives):
+            for f, v in enumerate(uses):
+                solver.add_clause([-covers[e], -(v + 1) if bits >> f & 1 else -v])
+        if self.max_literals is not None:
+            cnf = CNF()
+            for _ in range(solver.num_vars):
+                cnf.new_variable()
+            at_most_k([lit for v in uses for lit in (v, v + 1)], self.max_literals, cnf)
+            solver.add_cnf(cnf)
+        self.uses.append(uses)
+        self.covers.append(covers)
+
+    def solve(self):
+        """Returns True if the rules added so far can classify every sample, and False otherwise."""
+        solver = self.solver
+        solver.push()
+        for e in range(len(self.positives)):
+            solver.add_clause([covers[e] for covers in self.covers])
+        result = solver.solve()
+        self.model = dict(solver.model) if result else None
+        solver.pop()
+        return result
+
+    def rules(self):
+        """Returns the rules of the last solution as lists of literals, leaving out the rules that cover
+        no positive sample."""
+        if self.model is None:
+            return None
+        rules = []
+        for uses, covers in zip(self.uses, self.covers):
+            if self.positives and not any(self.model[c] for c in covers):
+                continue
+            rule = []
+            for f, v in enumerate(uses):
+                if self.model[v]:
+                    rule.append(Atom(self.features[f]))
+                elif self.model[v + 1]:
+                    rule.append(Not(Atom(self.features[f])))
+            rules.append(rule)
+        return rules
+
+
+def rules_formula(rules):
+    """Returns the DNF formula rule_1 ∨ ... ∨ rule_k of a list of rules (see RuleLearner.rules)."""
+    if not rules or not all(rules):
+        raise ValueError('a DNF formula needs at least one rule, and every rule at least one literal')
+    return reduce(Or, [reduce(And, rule) for rule in rules])
+
+
+def learn_rules(path, positive=None, max_rules=None, max_literals=None):
+    """Learns the smallest set of rules (with at most max_rules rules, if given) that classifies every sample
+    of a binarized CSV file (see datasets.load). Returns the list of rules (see RuleLearner.rules), or None
+    if there is no such set."""
+    dataset = load(path)
+    learner = RuleLearner(dataset.features, unique_samples(dataset, positive), max_literals)
+    if not learner.positives:
+        return []
+    # one rule per positive sample is enough if any set of rules is, so the search stops there
+    for _ in range(len(learner.positives) if max_rules is None else min(max_rules, len(learner.positives))):
+        learner.add_rule()
+        if learner.solve():
+            return learner.rules()
+    return None
@@ -1,8 +1,16 @@
 """The goal in this module is to define functions associated with the semantics of formulas in propositional logic. """
 
 from formula import *
+from functions import atoms, postorder
+from dpll import Solver, tseitin_cnf
+from model_counting import count_cnf_models
 from itertools import product
 
+try:
+    import numpy as np
+except ImportError:  # truth tables are then evaluated one row at a time
+    np = None
+
 def truth_value(formula, interpretation):
     """Determines the truth value of a formula in an interpretation (valuation).
     An interpretation may be defined as dictionary. For example, {'p': True, 'q': False}.
@@ -18,22 +26,103 @@ def truth_value(formula, interpretation):
     if isinstance(formula, Or):
         return truth_value(formula.left, interpretation) or truth_value(formula.right, interpretation)
 
+def compile_formula(formula):
+    """Returns a function that computes the truth value of formula in an interpretation, accepting the same
+    interpretations as truth_value. For example,
+
+    evaluate = compile_formula(Implies(Atom('p'), Atom('q')))
+    evaluate({'p': True, 'q': False})  # returns False
+
+    The formula is compiled once into straight-line Python code with one statement per distinct subformula,
+    so repeated evaluations neither walk the tree nor evaluate shared subformulas twice.
+    """
+    return _compile(formula, _BOOLEAN_OPERATORS, 'interpretation', 'bool(get(a{0}.name) or get(a{0}))',
+                    prologue='get = interpretation.get')
+
+_BOOLEAN_OPERATORS = {Not: 'not {0}', And: '{0} and {1}', Or: '{0} or {1}', Implies: 'not {0} or {1}'}
+_BITWISE_OPERATORS = {Not: '~{0}', And: '{0} & {1}', Or: '{0} | {1}', Implies: '~{0} | {1}'}
+
+def _compile(formula, operators, parameter, atom_template, prologue=None, release=False):
+    """Compiles formula into a Python function of one parameter. Subformulas are numbered in topological
+    order (children first) and equal subformulas get the same slot; atom i is computed by
+    atom_template.format(i), where a{i} names the atom, and connectives by the templates in operators.
+    If release is True, each slot is deleted after its last use, which bounds the memory held by large values."""
+    slots = {}
+    statements = []
+    namespace = {}
+
+    def assign(node, operands):
+        if node in slots:
+            return slots[node]
+        if isinstance(node, Atom):
+            namespace[f'a{len(namespace)}'] = node
+            code = atom_template.format(len(namespace) - 1)
+        else:
+            code = operators[type(node)].format(*operands)
+        slots[node] = f'v{len(statements)}'
+        statements.append((slots[node], code, operands))
+        return slots[node]
+
+    result = postorder(formula, assign, memo=True)
+    last_use = {}
+    for position, (slot, code, operands) in enumerate(statements):
+        for operand in operands:
+            last_use[operand] = position
+    lines = [f'def evaluate({parameter}):']
+    if prologue:
+        lines.append('    ' + prologue)
+    for position, (slot, code, operands) in enumerate(statements):
+        lines.append(f'    {slot} = {code}')
+        if release:
+            dead = [operand for operand in set(operands) if last_use[operand] == position]
+            if dead:
+                lines.append('    del ' + ', '.join(dead))
+    lines.append(f'    return {result}')
+    exec(compile('\n'.join(lines) + '\n', '<compiled formula>', 'exec'), namespace)
+    return namespace['evaluate']
+
 def is_logical_consequence(premises, conclusion):  # function TT-Entails? in the book AIMA.
-    """Returns True if the conclusion is a logical consequence of the set of premises. Otherwise, it returns False."""
-    pass
-    # ======== YOUR CODE HERE ========
+    """Returns True if the conclusion is a logical consequence of the set of premises. Otherwise, it returns False.
+    It checks with a SAT solver that the premises together with the negation of the conclusion are unsatisfiable."""
+    return entails_many(premises, [conclusion])[0]
 
 
 def is_logical_equivalence(formula1, formula2):
     """Checks whether formula1 and formula2 are logically equivalent."""
-    pass
-    # ======== YOUR CODE HERE ========
+    return all(entails_many([], [Implies(formula1, formula2), Implies(formula2, formula1)]))
+
+
+def entails_many(premises, conclusions):
+    """Returns a list that tells, for each conclusion, whether it is a logical consequence of the premises.
+    For example, entails_many([Implies(Atom('p'), Atom('q')), Atom('p')], [Atom('q'), Not(Atom('q'))])
+    returns [True, False].
+
+    The premises are encoded and given to a single SAT solver once. The negation of each conclusion is then
+    added in its own scope (see Solver.push), so the clauses learned from the premises while answering
+    a query are kept for the following ones."""
+    solver = Solver()
+    for premise in premises:
+        solver.add_formula(premise)
+    answers = []
+    for conclusion in conclusions:
+        solver.push()
+        solver.add_formula(Not(conclusion))
+        answers.append(not solver.solve())
+        solver.pop()
+    return answers
 
 
 def is_valid(formula):
     """Returns True if formula is a logically valid (tautology). Otherwise, it returns False"""
-    for row in truth_table(formula):
-        if not row[formula]:
+    if np is None:
+        for row in truth_table(formula):
+            if not row[formula]:
+                return False
+        return True
+    list_atoms = list(atoms(formula))
+    full = _valuations_mask(len(list_atoms))
+    for first, bits in truth_columns(formula, list_atoms):
+        if np.any(bits != full):
             return False
     return True
 
@@ -41,22 +130,115 @@ def satisfiability_brute_force(formula):
     """Checks whether formula is satisfiable.
     In other words, if the input formula is satisfiable, it returns an interpretation that assigns true to the formula.
     Otherwise, it returns False."""
-    for row in truth_table(formula):
-        if row[formula]:
+    if np is None:
+        for row in truth_table(formula):
+            if row[formula]:
+                return row
+        return False
+    list_atoms = list(atoms(formula))
+    for first, bits in truth_columns(formula, list_atoms):
+        nonzero = np.flatnonzero(bits)
+        if len(nonzero):
+            word = int(bits[nonzero[0]])
+            row = _valuation(list_atoms, first + 64 * int(nonzero[0]) + (word & -word).bit_length() - 1)
+            row[formula] = True
             return row
     return False
 
 def all_models(formula):
+    """Returns the list of all models of formula, as truth table rows (see truth_table) in which formula is true.
+    The models are enumerated by iter_models, so only the satisfying rows are ever built."""
     models = []
-    for row in truth_table(formula):
-        if row[formula]:
-            models.append(row)
+    for model in iter_models(formula):
+        model[formula] = True
+        models.append(model)
     return models
 
+
+def iter_models(formula, limit=None, project=None):
+    """Yields the models of formula one at a time, as dictionaries from atoms to truth values,
+    stopping after limit models if limit is given.
+
+    With project, a list of atoms, each model only assigns those atoms and every assignment to them that
+    can be extended to a model of formula is yielded exactly once. By default, all atoms of formula are used.
+
+    A SAT solver finds a model, which is then excluded with a blocking clause over the projected atoms before
+    the solver is called again. The solver keeps its learned clauses between calls, so the cost of each model
+    does not depend on the number of assignments that falsify formula."""
+    list_atoms = list(atoms(formula)) if project is None else list(project)
+    solver = Solver()
+    solver.add_formula(formula)
+    variables = [solver.literal(atom) for atom in list_atoms]
+    count = 0
+    while (limit is None or count < limit) and solver.solve():
+        model = solver.model
+        yield {atom: model[v] for atom, v in zip(list_atoms, variables)}
+        count += 1
+        solver.add_clause([-v if model[v] else v for v in variables])
+
+
+def count_models(formula):
+    """Returns the number of models of formula over its atoms, without enumerating them.
+    The formula is encoded with a Tseitin encoding in which every auxiliary variable is defined by an equivalence
+    (so each model of formula has exactly one extension), and the clauses are counted by model_counting."""
+    return count_cnf_models(tseitin_cnf(formula, polarity=False))
+
+
 def truth_table(formula):
-    list_atoms = atoms(formula)
-    valuations = list(product([True, False], repeat=len(list_atoms)))
-    for v in valuations:
-        row = {atom: value for atom, value in zip(list_atoms, v)}
-        row[formula] = truth_value(formula, row)
-        yield row
+    list_atoms = list(atoms(formula))
+    valuations = product([True, False], repeat=len(list_atoms))
+    if np is None:
+        evaluate = compile_formula(formula)
+        for v in valuations:
+            row = {atom: value for atom, value in zip(list_atoms, v)}
+            row[formula] = evaluate(row)
+            yield row
+        return
+    rows_per_word = min(64, 2 ** len(list_atoms))
+    for first, bits in truth_columns(formula, list_atoms):
+        for word in bits.tolist():
+            for j in range(rows_per_word):
+                row = {atom: value for atom, value in zip(list_atoms, next(valuations))}
+                row[formula] = bool(word >> j & 1)
+                yield row
+
+
+# Bit-parallel evaluation: the 2^n valuations of the atoms a_0, ..., a_{n-1} are numbered in the order of
+# truth_table, so in valuation k the atom a_i is true iff bit n - 1 - i of k is 0. A column is a numpy array
+# of uint64 words where bit j of word w is the truth value of valuation 64 * w + j (relative to a chunk).
+# Connectives are then bitwise operations on whole columns.
+
+CHUNK_WORDS = 1 << 12  # 2^18 valuations (32 KiB per column) are evaluated at a time
+
+_PERIODIC_COLUMNS = [0x5555555555555555, 0x3333333333333333, 0x0F0F0F0F0F0F0F0F,
+                     0x00FF00FF00FF00FF, 0x0000FFFF0000FFFF, 0x00000000FFFFFFFF]
+
+def _valuations_mask(n):
+    """Returns the word with one bit set for every valuation of n atoms (all 64 bits when n >= 6)."""
+    return np.uint64((1 << min(64, 2 ** n)) - 1)
+
+def _valuation(list_atoms, k):
+    n = len(list_atoms)
+    return {atom: not (k >> (n - 1 - i)) & 1 for i, atom in enumerate(list_atoms)}
+
+def truth_columns(formula, list_atoms):
+    """Evaluates formula in all valuations of list_atoms (which must contain the atoms of formula),
+    CHUNK_WORDS * 64 valuations at a time. Yields pairs (first, bits), where bits is a uint64 column
+    whose bit j of word w is the truth value of formula in valuation first + 64 * w + j."""
+    n = len(list_atoms)
+    position = {atom: i for i, atom in enumerate(list_atoms)}
+    mask = _valuations_mask(n)
+    total_words = max(1, 2 ** n // 64)
+    evaluate = _compile(formula, _BITWISE_OPERATORS, 'column', 'column(a{0})', release=True)
+    for first_word in range(0, total_words, CHUNK_WORDS):
+        words = min(CHUNK_WORDS, total_words - first_word)
+        word_index = np.arange(first_word, first_word + words, dtype=np.uint64)
+
+        def column(atom):
+            shift = n - 1 - position[atom]
+            if shift < 6:
+                return np.full(words, _PERIODIC_COLUMNS[shift], dtype=np.uint64)
+            odd = (word_index >> np.uint64(shift - 6)) & np.uint64(1)
+            return odd - np.uint64(1)
+
+        yield 64 * first_word, evaluate(column) & mask
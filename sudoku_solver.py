@@ -0,0 +1,109 @@
+"""The goal in this module is to solve sudoku puzzles of any size with the CDCL solver of dpll.py.
+
+A puzzle is an n x n grid (a list of lists) with n = box * box, in which 0 is an empty cell and 1, ..., n are the
+given digits. For example, solve(grid) returns the solved grid, or None if the puzzle has no solution.
+
+Unlike examples/sudoku.py, no formula is built: (row, col, digit) is mapped to the integer variable
+(row * n + col) * n + digit + 1 and the clauses are written straight into a CNF container (see cnf.py).
+The givens are propagated while encoding: a digit that is given in a row, column or box is removed from the
+candidates of the other cells of that unit, and so are the digits of cells left with a single candidate,
+so only the clauses over the remaining candidates are written.
+"""
+
+from math import isqrt
+
+from cnf import CNF
+from cardinality import at_most_k
+from dpll import Solver
+
+
+def variable(row, col, digit, n):
+    """Returns the variable of 'cell (row, col) has digit + 1' (all 0-based) in a grid of size n."""
+    return (row * n + col) * n + digit + 1
+
+
+def units(n):
+    """Returns the rows, columns and boxes of a grid of size n, each as a list of (row, col) cells."""
+    box = isqrt(n)
+    rows = [[(r, c) for c in range(n)] for r in range(n)]
+    columns = [[(r, c) for r in range(n)] for c in range(n)]
+    boxes = [[(br + r, bc + c) for r in range(box) for c in range(box)]
+             for br in range(0, n, box) for bc in range(0, n, box)]
+    return rows + columns + boxes
+
+
+def candidates(grid):
+    """Returns a dictionary from each cell to the set of digits (0-based) it can still take once the givens
+    and the cells with a single candidate are propagated, or None if some cell is left without candidates."""
+    n = len(grid)
+    peers = {(r, c): set() for r in range(n) for c in range(n)}
+    for unit in units(n):
+        for cell in unit:
+            peers[cell].update(unit)
+    for cell in peers:
+        peers[cell].discard(cell)
+    result = {(r, c): {grid[r][c] - 1} if grid[r][c] else set(range(n)) for r in range(n) for c in range(n)}
+    pending = [cell for cell, digits in result.items() if len(digits) == 1]
+    while pending:
+        cell = pending.pop()
+        digit = next(iter(result[cell]))
+        for peer in peers[cell]:
+            digits = result[peer]
+            if digit in digits:
+                digits.discard(digit)
+                if not digits:
+                    return None
+                if len(digits) == 1:
+                    pending.append(peer)
+    return result
+
+
+def encode(grid, encoding='pairwise'):
+    """Returns a CNF container whose models are the solutions of the puzzle.
+    Every cell takes at least one and at most one of its candidates, and every digit that is not yet placed
+    in a unit appears in at least one and at most one of its cells. The 'at most one' constraints are written
+    by cardinality.at_most_k with the given encoding."""
+    n = len(grid)
+    if isqrt(n) ** 2 != n or any(len(row) != n for row in grid):
+        raise ValueError('the grid must be n x n, with n a perfect square')
+    cnf = CNF()
+    for _ in range(n ** 3):
+        cnf.new_variable()
+    digits = candidates(grid)
+    if digits is None:
+        cnf.add_clause([])
+        return cnf
+    for (r, c), options in digits.items():
+        literals = [variable(r, c, d, n) for d in sorted(options)]
+        cnf.add_clause(literals)
+        at_most_k(literals, 1, cnf, encoding)
+    for unit in units(n):
+        for d in range(n):
+            cells = [(r, c) for r, c in unit if d in digits[(r, c)]]
+            if len(cells) == 1 and len(digits[cells[0]]) == 1:
+                continue
+            literals = [variable(r, c, d, n) for r, c in cells]
+            cnf.add_clause(literals)
+            at_most_k(literals, 1, cnf, encoding)
+    return cnf
+
+
+def solve(grid, encoding='pairwise', **options):
+    """Returns the solved grid (a new list of lists), or None if the puzzle has no solution.
+    The options are passed to Solver (for example, seed or phase)."""
+    n = len(grid)
+    solver = Solver(**options)
+    solver.add_cnf(encode(grid, encoding))
+    if not solver.solve():
+        return None
+    model = solver.model
+    return [[next(d + 1 for d in range(n) if model[variable(r, c, d, n)]) for c in range(n)] for r in range(n)]
+
+
+def is_solution(grid, solution):
+    """Returns True if solution is a complete grid that agrees with the givens of grid and has every digit
+    exactly once in each row, column and box."""
+    n = len(grid)
+    if any(grid[r][c] and grid[r][c] != solution[r][c] for r in range(n) for c in range(n)):
+        return False
+    return all(sorted(solution[r][c] for r, c in unit) == list(range(1, n + 1)) for unit in units(n))
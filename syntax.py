@@ -0,0 +1,360 @@
+"""The goal in this module is to read formulas from text and to write them back, so that large instances can be
+stored in files instead of being built with constructor calls.
+
+The syntax is the one printed by the formulas themselves, for example ((p ∧ (¬q)) → r) for propositional logic
+(formula.py) and (∀x (P(x, f(a)) ⟶ Q(x))) for first-order logic (fol_formula.py), with ASCII aliases for the
+connectives: ~ or ! for ¬, & or /\\ for ∧, | or \\/ for ∨, -> or => for →, and, in first-order formulas,
+forall and exists for ∀ and ∃. Parentheses may be left out: ¬ and the quantifiers bind tighter than ∧, which
+binds tighter than ∨, which binds tighter than →; ∧ and ∨ group to the left, as the chains built by and_all,
+and → groups to the right. A quantified variable may be followed by a dot, as in ∀x. P(x), and must be
+separated from a name that follows it (str writes (∀xP(x)), which reads as a variable named xP; format_formula
+writes (∀x P(x))).
+
+Names are sequences of letters, digits, underscores and primes; any other name (such as the feature
+'petal length (cm) <= 1.5') is written between double quotes, with \\" and \\\\ for a quote and a backslash
+inside it. In a first-order formula, a name applied to arguments is a predicate (at the top of an atom) or a
+function (inside a term), a name bound by an enclosing quantifier is a variable, and any other name is a
+constant, unless it is listed in the variables argument of the parser.
+
+The parser is a table-driven operator-precedence (shunting-yard) parser: it keeps explicit stacks of operators
+and operands, so formulas of any depth are parsed without recursion, and it can be fed one piece of text at
+a time. iter_formulas streams the formulas of a file: formulas are separated by semicolons or by line breaks
+that are not inside parentheses. format_formula writes formulas without recursion either, in the format of
+str, so parse_formula(format_formula(formula)) == formula.
+"""
+
+import re
+
+import formula as prop
+import fol_formula as fol
+from term import Con, Var, Fun
+
+_NAME = re.compile(r"[A-Za-z0-9_']+\Z")
+_TOKENS = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<name>[A-Za-z0-9_']+)
+  | (?P<quoted>"(?:[^"\\]|\\.)*")
+  | (?P<not>¬|~|!)
+  | (?P<and>∧|&|/\\)
+  | (?P<or>∨|\||\\/)
+  | (?P<implies>→|⟶|->|=>)
+  | (?P<forall>∀)
+  | (?P<exists>∃)
+  | (?P<open>\()
+  | (?P<close>\))
+  | (?P<comma>,)
+  | (?P<dot>\.)
+  | (?P<end>;)
+  | (?P<error>.)
+''', re.VERBOSE)
+
+# binding power and associativity of the operators; prefix operators bind tightest
+_PRECEDENCE = {'not': 4, 'forall': 4, 'exists': 4, 'and': 3, 'or': 2, 'implies': 1}
+_RIGHT = {'implies'}
+_KEYWORDS = {'forall', 'exists'}
+
+
+class ParseError(ValueError):
+    """Raised on text that is not a formula."""
+
+
+def tokenize(text):
+    """Yields the pairs (kind, text) of the tokens of text, leaving out spaces. Raises ParseError on a character
+    that does not start any token."""
+    for match in _TOKENS.finditer(text):
+        kind = match.lastgroup
+        if kind == 'space':
+            continue
+        if kind == 'error':
+            raise ParseError(f'unexpected character {match.group()!r} at position {match.start()}')
+        yield kind, match.group()
+
+
+class Parser:
+    """Incremental operator-precedence parser. feed gives it text (a whole file, a line or any piece that
+    does not split a token), and formulas returns the formulas completed so far. For example,
+
+    parser = Parser()
+    parser.feed('(p ∧ q); ¬')
+    parser.feed('r')
+    parser.finish()
+    parser.formulas  # [(p ∧ q), (¬r)]
+
+    With fol=True, the formulas are first-order formulas of fol_formula.py, and the names in variables
+    are variables even when they are not bound by a quantifier."""
+
+    def __init__(self, fol=False, variables=(), line_breaks=False):
+        self.fol = fol
+        self.free = set(variables)
+        self.line_breaks = line_breaks
+        self.formulas = []
+        self._atoms = {}
+        self._reset()
+
+    def _reset(self):
+        self.operators = []  # operators and '(' markers; a quantifier is (kind, variable name)
+        self.operands = []
+        self.expect_operand = True
+        self.bound = {}  # name -> number of enclosing quantifiers that bind it
+        self.frames = []  # [name, arguments] of the predicate and functions being read, outermost first
+        self.after_comma = False  # the last token of the innermost frame was a comma
+        self.pending = None  # a name whose role depends on whether '(' follows it
+        self.quantifier = None  # kind of a quantifier waiting for its variable
+        self.depth = 0
+
+    def feed(self, text):
+        for kind, value in tokenize(text):
+            self._token(kind, value)
+        if self.line_breaks and self.depth == 0:
+            self._end_of_line()
+
+    def finish(self):
+        """Completes the last formula; raises ParseError if it is incomplete."""
+        self._finish_formula(required=False)
+
+    def _end_of_line(self):
+        if self.pending is not None and not self.frames:
+            self._resolve_pending()
+        if not self.expect_operand and not self.frames and self.quantifier is None:
+            self._finish_formula(required=False)
+
+    def _error(self, message):
+        self._reset()
+        raise ParseError(message)
+
+    def _token(self, kind, value):
+        if self.pending is not None:
+            if kind == 'open' and self.fol:
+                self.frames.append([self.pending, []])
+                self.pending = None
+                return
+            self._resolve_pending()
+        if kind == 'name' and self.fol and value in _KEYWORDS:
+            kind = value
+        if self.quantifier is not None:
+            if kind != 'name':
+                self._error(f'a quantifier must be followed by a variable, not {value!r}')
+            self.operators.append((self.quantifier, value))
+            self.bound[value] = self.bound.get(value, 0) + 1
+            self.quantifier = None
+            return
+        if self.frames:
+            self._term_token(kind, value)
+        elif self.expect_operand:
+            self._operand_token(kind, value)
+        else:
+            self._operator_token(kind, value)
+
+    def _operand_token(self, kind, value):
+        if kind == 'name' or kind == 'quoted':
+            name = _unquote(value) if kind == 'quoted' else value
+            if self.fol:
+                self.pending = name
+            else:
+                atom = self._atoms.get(name)
+                if atom is None:
+                    atom = self._atoms[name] = prop.Atom(name)
+                self._push_operand(atom)
+        elif kind == 'not':
+            self.operators.append('not')
+        elif kind in ('forall', 'exists'):
+            if not self.fol:
+                self._error('quantifiers are only allowed in first-order formulas')
+            self.quantifier = kind
+        elif kind == 'open':
+            self.operators.append('(')
+            self.depth += 1
+        elif kind == 'dot' and self.operators and isinstance(self.operators[-1], tuple):
+            pass  # the optional dot after a quantified variable
+        elif kind == 'end':
+            if self.operators or self.operands:
+                self._error('incomplete formula before ;')
+        else:
+            self._error(f'expected a formula, found {value!r}')
+
+    def _operator_token(self, kind, value):
+        if kind in ('and', 'or', 'implies'):
+            self._reduce(kind)
+            self.operators.append(kind)
+            self.expect_operand = True
+        elif kind == 'close':
+            self._reduce(None)
+            if not self.operators:
+                self._error('unbalanced )')
+            self.operators.pop()
+            self.depth -= 1
+        elif kind == 'end':
+            self._finish_formula(required=True)
+        else:
+            self._error(f'expected a connective, found {value!r}')
+
+    def _term_token(self, kind, value):
+        frame = self.frames[-1]
+        after_comma, self.after_comma = self.after_comma, False
+        if kind in ('name', 'quoted'):
+            self.pending = _unquote(value) if kind == 'quoted' else value
+        elif kind == 'comma':
+            if not frame[1] or after_comma:
+                self._error('an argument is missing before ,')
+            self.after_comma = True
+        elif kind == 'close':
+            if after_comma:
+                self._error('an argument is missing before )')
+            self.frames.pop()
+            name, arguments = frame
+            if self.frames:
+                self.frames[-1][1].append(Fun(name, arguments))
+            else:
+                self._push_operand(fol.Atom(name, arguments))
+        else:
+            self._error(f'expected a term, found {value!r}')
+
+    def _resolve_pending(self):
+        name, self.pending = self.pending, None
+        if self.frames:
+            term = Var(name) if self.bound.get(name) or name in self.free else Con(name)
+            self.frames[-1][1].append(term)
+        else:
+            self._push_operand(fol.Atom(name, []))
+
+    def _push_operand(self, node):
+        if not self.expect_operand:
+            self._error(f'expected a connective before {node}')
+        self.operands.append(node)
+        self.expect_operand = False
+
+    def _reduce(self, incoming):
+        # applies the operators on the stack that bind tighter than incoming (all of them, up to the
+        # innermost '(', if incoming is None)
+        operators = self.operators
+        operands = self.operands
+        logic = fol if self.fol else prop
+        limit = 0 if incoming is None else _PRECEDENCE[incoming] + (incoming in _RIGHT)
+        while operators and operators[-1] != '(':
+            top = operators[-1]
+            kind = top[0] if isinstance(top, tuple) else top
+            if _PRECEDENCE[kind] < limit:
+                break
+            operators.pop()
+            if kind == 'not':
+                operands[-1] = logic.Not(operands[-1])
+            elif kind in ('forall', 'exists'):
+                variable = top[1]
+                self.bound[variable] -= 1
+                quantifier = fol.ForAll if kind == 'forall' else fol.Exists
+                operands[-1] = quantifier(Var(variable), operands[-1])
+            else:
+                right = operands.pop()
+                connective = {'and': logic.And, 'or': logic.Or, 'implies': logic.Implies}[kind]
+                operands[-1] = connective(operands[-1], right)
+
+    def _finish_formula(self, required):
+        if self.pending is not None:
+            self._resolve_pending()
+        if not self.operators and not self.operands and self.quantifier is None and not self.frames:
+            if required:
+                self._error('empty formula before ;')
+            return
+        if self.expect_operand or self.frames or self.quantifier is not None:
+            self._error('incomplete formula')
+        self._reduce(None)
+        if self.operators:
+            self._error('unbalanced (')
+        self.formulas.append(self.operands.pop())
+        self._reset()
+
+
+def _unquote(text):
+    return re.sub(r'\\(.)', r'\1', text[1:-1])
+
+
+def parse_formula(text):
+    """Returns the propositional formula written in text."""
+    return _parse_one(Parser(), text)
+
+
+def parse_fol(text, variables=()):
+    """Returns the first-order formula written in text. The names in variables are variables even when they
+    are free in the formula."""
+    return _parse_one(Parser(fol=True, variables=variables), text)
+
+
+def _parse_one(parser, text):
+    parser.feed(text)
+    parser.finish()
+    if len(parser.formulas) != 1:
+        raise ParseError(f'expected one formula, found {len(parser.formulas)}')
+    return parser.formulas[0]
+
+
+def iter_formulas(file, fol=False, variables=()):
+    """Yields the formulas of a text file (an open file or any iterable of lines) one at a time.
+    Formulas are separated by semicolons or line breaks; a formula spans several lines when they are inside
+    parentheses or when a line ends with a connective."""
+    parser = Parser(fol, variables, line_breaks=True)
+    for line in file:
+        parser.feed(line)
+        if parser.formulas:
+            yield from parser.formulas
+            parser.formulas.clear()
+    parser.finish()
+    yield from parser.formulas
+
+
+def _name(name):
+    name = str(name)
+    if _NAME.match(name):
+        return name
+    return '"' + name.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+_SYMBOLS = {prop.And: ' ∧ ', prop.Or: ' ∨ ', prop.Implies: ' → ',
+            fol.And: ' ∧ ', fol.Or: ' ∨ ', fol.Implies: ' ⟶ '}
+
+
+def format_formula(formula):
+    """Returns the text of a propositional or first-order formula, as str does (with quotes around the names
+    that need them and a space after quantified variables), without recursion."""
+    pieces = []
+    stack = [formula]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            pieces.append(node)
+        elif isinstance(node, prop.Atom):
+            pieces.append(_name(node.name))
+        elif isinstance(node, (prop.Not, fol.Not)):
+            stack += [')', node.inner]
+            pieces.append('(¬')
+        elif isinstance(node, (fol.ForAll, fol.Exists)):
+            stack += [')', node.inner]
+            pieces.append(('(∀' if isinstance(node, fol.ForAll) else '(∃') + _name(node.var.name) + ' ')
+        elif isinstance(node, fol.Atom):
+            pieces.append(_name(node.name))
+            if node.args:
+                stack.append(('term', node.args))
+        elif isinstance(node, tuple):
+            _format_terms(node[1], pieces)
+        else:
+            stack += [')', node.right, _SYMBOLS[type(node)], node.left]
+            pieces.append('(')
+    return ''.join(pieces)
+
+
+def _format_terms(arguments, pieces):
+    # writes (t_1, ..., t_n), without recursion
+    stack = [')'] + [item for term in reversed(arguments) for item in (term, ', ')][:-1] + ['(']
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            pieces.append(item)
+        elif isinstance(item, Fun):
+            pieces.append(_name(item.name))
+            stack.append(')')
+            for k in range(len(item.args) - 1, -1, -1):
+                stack.append(item.args[k])
+                if k:
+                    stack.append(', ')
+            stack.append('(')
+        else:
+            pieces.append(_name(item.name))
@@ -0,0 +1,66 @@
+import random
+from itertools import product
+
+from bdd import BDD, TRUE, FALSE
+from formula import Atom, Not, And, Or, Implies
+from semantics import truth_value
+
+ATOMS = [Atom(name) for name in 'pqrst']
+
+
+def random_formula(rng, depth):
+    if depth == 0 or rng.random() < 0.2:
+        return rng.choice(ATOMS)
+    if rng.random() < 0.2:
+        return Not(random_formula(rng, depth - 1))
+    return rng.choice([And, Or, Implies])(random_formula(rng, depth - 1), random_formula(rng, depth - 1))
+
+
+def models(formula):
+    rows = [dict(zip(ATOMS, values)) for values in product([False, True], repeat=len(ATOMS))]
+    return [row for row in rows if truth_value(formula, row)]
+
+
+def test_satcount_and_models_agree_with_the_truth_table():
+    rng = random.Random(1)
+    for _ in range(150):
+        formula = random_formula(rng, 4)
+        manager = BDD(ATOMS)
+        f = manager.from_formula(formula)
+        expected = models(formula)
+        assert manager.satcount(f) == len(expected)
+        assert manager.satcount(f ^ 1) == 2 ** len(ATOMS) - len(expected)
+        found = list(manager.iter_models(f))
+        assert len(found) == len(expected)
+        assert all(row in found for row in expected)
+
+
+def test_equivalent_formulas_have_the_same_edge():
+    rng = random.Random(2)
+    manager = BDD(ATOMS)
+    for _ in range(150):
+        formula = random_formula(rng, 4)
+        f = manager.from_formula(formula)
+        rebuilt = manager.to_formula(f)
+        if isinstance(rebuilt, bool):
+            assert f == (TRUE if rebuilt else FALSE)
+        else:
+            assert manager.from_formula(rebuilt) == f
+        assert manager.from_formula(Not(Not(formula))) == f
+        assert manager.is_equivalent(Implies(formula, ATOMS[0]), Or(Not(formula), ATOMS[0]))
+    assert manager.is_valid(Or(ATOMS[0], Not(ATOMS[0])))
+    assert not manager.is_valid(ATOMS[0])
+
+
+def test_restrict_and_exists_agree_with_the_truth_table():
+    rng = random.Random(3)
+    p = ATOMS[0]
+    for _ in range(100):
+        formula = random_formula(rng, 4)
+        manager = BDD(ATOMS)
+        f = manager.from_formula(formula)
+        expected = models(formula)
+        restricted = manager.restrict(f, {p: True})
+        assert manager.satcount(restricted) == 2 * sum(row[p] for row in expected)
+        projected = {tuple(row[a] for a in ATOMS[1:]) for row in expected}
+        assert manager.satcount(manager.exists(f, [p])) == 2 * len(projected)
@@ -0,0 +1,37 @@
+from itertools import product
+
+import pytest
+
+from cardinality import ENCODINGS, at_least_k, at_most_k, exactly_k
+from cnf import CNF
+from dpll import Solver
+
+
+def check(constraint, holds, n, k, encoding):
+    # for every assignment to the n literals, the clauses must be satisfiable exactly when holds(count) is True
+    cnf = CNF()
+    for _ in range(n):
+        cnf.new_variable()
+    constraint(list(range(1, n + 1)), k, cnf, encoding)
+    solver = Solver()
+    solver.add_cnf(cnf)
+    for values in product([False, True], repeat=n):
+        assumptions = [v if value else -v for v, value in enumerate(values, 1)]
+        assert solver.solve(assumptions) == holds(sum(values)), (constraint.__name__, encoding, n, k, values)
+
+
+@pytest.mark.parametrize('encoding', ENCODINGS)
+def test_encodings_agree_with_every_assignment(encoding):
+    for n in range(1, 7):
+        for k in range(0, n + 1):
+            if encoding != 'product' or k <= 1:
+                check(at_most_k, lambda count: count <= k, n, k, encoding)
+                check(exactly_k, lambda count: count == k, n, k, encoding)
+            check(at_least_k, lambda count: count >= k, n, k, encoding)
+
+
+def test_unknown_encodings_and_product_bounds_are_rejected():
+    with pytest.raises(ValueError):
+        at_least_k([1, 2], 1, encoding='bogus')
+    with pytest.raises(ValueError):
+        at_most_k([1, 2, 3], 2, encoding='product')
@@ -0,0 +1,32 @@
+import pytest
+
+from cnf import CNF
+from formula import Atom
+
+
+def test_read_dimacs_closes_unterminated_last_clause(tmp_path):
+    path = tmp_path / 'unterminated.cnf'
+    path.write_text('p cnf 3 2\n1 -2 0\n2 3\n')
+    cnf = CNF.read_dimacs(path)
+    assert [list(clause) for clause in cnf] == [[1, -2], [2, 3]]
+    cnf.add_clause([-1])
+    assert [list(clause) for clause in cnf] == [[1, -2], [2, 3], [-1]]
+
+
+def test_dimacs_keeps_names_with_spaces_quotes_and_line_breaks(tmp_path):
+    cnf = CNF()
+    names = ['p', 'petal length (cm) <= 1.5', 'say "hi"', 'two\nlines', '12']
+    cnf.add_clause([cnf.literal(Atom(name)) for name in names])
+    cnf.add_clause([-cnf.literal(Atom(names[3])), cnf.new_variable()])
+    path = tmp_path / 'names.cnf'
+    cnf.write_dimacs(path)
+    read = CNF.read_dimacs(path)
+    assert read.atoms == cnf.atoms
+    assert [list(clause) for clause in read] == [list(clause) for clause in cnf]
+
+
+def test_write_dimacs_rejects_names_that_are_not_strings(tmp_path):
+    cnf = CNF()
+    cnf.add_clause([cnf.literal(Atom(3))])
+    with pytest.raises(ValueError):
+        cnf.write_dimacs(tmp_path / 'numbers.cnf')
@@ -0,0 +1,24 @@
+import datasets
+
+
+def test_load_file_without_features(tmp_path):
+    path = tmp_path / 'classes_only.csv'
+    path.write_text('class\n' + 'a\n' * 70 + 'b\n')
+    for cache in (False, True):
+        dataset = datasets.load(str(path), cache=cache)
+        assert dataset.features == []
+        assert len(dataset.columns) == 0
+        assert dataset.classes == ['a', 'b']
+        assert dataset.num_rows == 71
+        assert datasets.count(dataset.class_column('a')) == 70
+        assert datasets.count(dataset.class_column('b')) == 1
+
+
+def test_load_when_the_sidecar_cannot_be_written(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_text('x,class\n1,a\n0,b\n')
+    (tmp_path / 'data.csv.bits').mkdir()
+    dataset = datasets.load(str(path))
+    assert dataset.classes == ['a', 'b']
+    assert datasets.count(dataset.column('x')) == 1
+    assert sorted(entry.name for entry in tmp_path.iterdir()) == ['data.csv', 'data.csv.bits']
@@ -0,0 +1,55 @@
+import random
+from itertools import product
+
+from dnnf import compile_clauses, from_formula
+from formula import Atom, Not, And, Or, Implies
+from functions import atoms, is_decomposable_negation_normal_form
+from semantics import truth_value
+
+ATOMS = [Atom(name) for name in 'pqrst']
+
+
+def random_formula(rng, depth):
+    if depth == 0 or rng.random() < 0.2:
+        return rng.choice(ATOMS)
+    if rng.random() < 0.2:
+        return Not(random_formula(rng, depth - 1))
+    return rng.choice([And, Or, Implies])(random_formula(rng, depth - 1), random_formula(rng, depth - 1))
+
+
+def models(formula):
+    names = sorted(atoms(formula), key=str)
+    return [dict(zip(names, values)) for values in product([False, True], repeat=len(names))
+            if truth_value(formula, dict(zip(names, values)))]
+
+
+def test_count_models_agrees_with_the_truth_table():
+    rng = random.Random(1)
+    for _ in range(150):
+        formula = random_formula(rng, 4)
+        circuit = from_formula(formula)
+        expected = models(formula)
+        assert circuit.count_models() == len(expected)
+        assert circuit.is_satisfiable() == bool(expected)
+        atom = next(iter(atoms(formula)))
+        assert circuit.entails(atom) == all(model[atom] for model in expected)
+        assert circuit.count_models([Not(atom)]) == sum(not model[atom] for model in expected)
+
+
+def test_compile_clauses_counts_models_of_random_cnfs():
+    rng = random.Random(2)
+    for _ in range(150):
+        num_vars = rng.randint(1, 7)
+        clauses = [tuple(rng.choice([1, -1]) * rng.randint(1, num_vars) for _ in range(rng.randint(1, 3)))
+                   for _ in range(rng.randint(0, 12))]
+        expected = sum(all(any(values[abs(lit) - 1] == (lit > 0) for lit in clause) for clause in clauses)
+                       for values in product([False, True], repeat=num_vars))
+        assert compile_clauses(clauses, num_vars).count_models() == expected
+
+
+def test_circuits_are_written_as_dnnf_formulas():
+    rng = random.Random(3)
+    for _ in range(100):
+        compiled = from_formula(random_formula(rng, 4)).to_formula()
+        assert isinstance(compiled, bool) or is_decomposable_negation_normal_form(compiled)
+    assert not is_decomposable_negation_normal_form(And(Atom('p'), Or(Atom('p'), Atom('q'))))
@@ -0,0 +1,13 @@
+import gc
+
+from formula import And, Atom, interning
+
+
+def test_unique_table_does_not_keep_dropped_formulas_alive():
+    with interning() as table:
+        formula = And(Atom('p'), Atom('q'))
+        assert len(table) == 3
+        del formula
+        gc.collect()
+        assert len(table) == 0
+        assert And(Atom('p'), Atom('q')) is And(Atom('p'), Atom('q'))
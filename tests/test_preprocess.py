@@ -0,0 +1,61 @@
+import random
+from itertools import product
+
+from cnf import CNF
+from dpll import Solver, tseitin_cnf
+from formula import Atom, Not, And, Or, Implies
+from preprocess import Preprocessor, preprocess_and_solve
+
+
+def satisfies(model, clauses):
+    return all(any(model[abs(lit)] == (lit > 0) for lit in clause) for clause in clauses)
+
+
+def random_cnf(rng, num_vars, num_clauses):
+    cnf = CNF()
+    for _ in range(num_vars):
+        cnf.new_variable()
+    for _ in range(num_clauses):
+        cnf.add_clause([rng.choice([1, -1]) * rng.randint(1, num_vars) for _ in range(rng.randint(1, 3))])
+    return cnf
+
+
+def test_extended_models_satisfy_the_original_cnf():
+    rng = random.Random(1)
+    for _ in range(300):
+        num_vars = rng.randint(1, 8)
+        cnf = random_cnf(rng, num_vars, rng.randint(0, 30))
+        clauses = [list(clause) for clause in cnf]
+        satisfiable = any(satisfies(dict(enumerate(values, 1)), clauses)
+                          for values in product([False, True], repeat=num_vars))
+        preprocessor = Preprocessor(cnf)
+        solver = Solver()
+        solver.add_cnf(preprocessor.run())
+        assert solver.solve() == satisfiable
+        if satisfiable:
+            assert satisfies(preprocessor.extend(solver.model), clauses)
+
+
+def test_frozen_variables_keep_their_meaning():
+    rng = random.Random(2)
+    for _ in range(200):
+        num_vars = rng.randint(2, 7)
+        cnf = random_cnf(rng, num_vars, rng.randint(0, 20))
+        clauses = [list(clause) for clause in cnf]
+        frozen = {1, 2}
+        solver = Solver()
+        solver.add_cnf(Preprocessor(cnf, frozen).run())
+        for values in product([False, True], repeat=2):
+            assumptions = [1 if values[0] else -1, 2 if values[1] else -2]
+            expected = any(satisfies(dict(enumerate(rest, 1)), clauses + [[lit] for lit in assumptions])
+                           for rest in product([False, True], repeat=num_vars))
+            assert solver.solve(assumptions) == expected
+
+
+def test_tseitin_encodings_are_simplified_and_solved():
+    p, q, r = Atom('p'), Atom('q'), Atom('r')
+    formula = And(Implies(p, Or(q, r)), And(Not(And(q, r)), Or(p, Not(q))))
+    cnf = tseitin_cnf(formula)
+    model = preprocess_and_solve(cnf)
+    assert model is not False and satisfies(model, [list(clause) for clause in cnf])
+    assert preprocess_and_solve(tseitin_cnf(And(p, Not(p)))) is False
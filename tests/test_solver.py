@@ -0,0 +1,120 @@
+import random
+from itertools import product
+
+import pytest
+
+from cnf import CNF
+from dpll import Solver, satisfiability_cdcl
+from formula import Atom, Not, And, Or, Implies
+from semantics import satisfiability_brute_force, truth_value
+
+
+def satisfies(model, clauses):
+    return all(any(model[abs(lit)] == (lit > 0) for lit in clause) for clause in clauses)
+
+
+def brute_force(clauses, num_vars):
+    return any(satisfies(dict(enumerate(values, 1)), clauses) for values in product([False, True], repeat=num_vars))
+
+
+def random_clauses(rng, num_vars, num_clauses):
+    return [[rng.choice([1, -1]) * rng.randint(1, num_vars) for _ in range(rng.randint(1, 3))]
+            for _ in range(num_clauses)]
+
+
+def test_solve_agrees_with_brute_force():
+    rng = random.Random(1)
+    for _ in range(300):
+        num_vars = rng.randint(1, 8)
+        clauses = random_clauses(rng, num_vars, rng.randint(0, 40))
+        solver = Solver()
+        for _ in range(num_vars):
+            solver.new_var()
+        for clause in clauses:
+            solver.add_clause(clause)
+        result = solver.solve()
+        assert result == brute_force(clauses, num_vars)
+        if result:
+            assert satisfies(solver.model, clauses)
+
+
+def test_pigeonhole_is_unsatisfiable():
+    # 5 pigeons in 4 holes; variable 4 * i + j + 1 puts pigeon i in hole j
+    cnf = CNF()
+    for i in range(5):
+        cnf.add_clause([4 * i + j + 1 for j in range(4)])
+    for j in range(4):
+        for i in range(5):
+            for k in range(i):
+                cnf.add_clause([-(4 * i + j + 1), -(4 * k + j + 1)])
+    solver = Solver()
+    solver.add_cnf(cnf)
+    assert solver.solve() is False
+
+
+def test_satisfiability_cdcl_returns_models_of_the_formula():
+    p, q, r = Atom('p'), Atom('q'), Atom('r')
+    formulas = [And(Implies(p, q), And(p, Not(r))), Or(And(p, Not(p)), q), And(p, Not(p)),
+                And(Or(p, q), And(Or(Not(p), r), Or(Not(q), Not(r))))]
+    for formula in formulas:
+        model = satisfiability_cdcl(formula)
+        assert (model is False) == (satisfiability_brute_force(formula) is False)
+        if model is not False:
+            assert truth_value(formula, model)
+
+
+def test_assumption_cores_are_unsatisfiable_subsets():
+    rng = random.Random(2)
+    for _ in range(300):
+        num_vars = rng.randint(2, 8)
+        clauses = random_clauses(rng, num_vars, rng.randint(0, 25))
+        assumptions = list({rng.randint(1, num_vars): rng.choice([1, -1]) for _ in range(3)}.items())
+        assumptions = [sign * v for v, sign in assumptions]
+        solver = Solver()
+        for _ in range(num_vars):
+            solver.new_var()
+        for clause in clauses:
+            solver.add_clause(clause)
+        result = solver.solve(assumptions)
+        assert result == brute_force(clauses + [[lit] for lit in assumptions], num_vars)
+        if result:
+            assert satisfies(solver.model, clauses)
+            assert all(solver.model[abs(lit)] == (lit > 0) for lit in assumptions)
+        else:
+            assert set(solver.core) <= set(assumptions)
+            assert not brute_force(clauses + [[lit] for lit in solver.core], num_vars)
+
+
+def test_push_and_pop_remove_the_clauses_of_a_scope():
+    rng = random.Random(3)
+    for _ in range(200):
+        num_vars = rng.randint(2, 7)
+        base = random_clauses(rng, num_vars, rng.randint(0, 15))
+        scoped = random_clauses(rng, num_vars, rng.randint(1, 15))
+        solver = Solver()
+        for _ in range(num_vars):
+            solver.new_var()
+        for clause in base:
+            solver.add_clause(clause)
+        solver.push()
+        for clause in scoped:
+            solver.add_clause(clause)
+        assert solver.solve() == brute_force(base + scoped, num_vars)
+        solver.pop()
+        result = solver.solve()
+        assert result == brute_force(base, num_vars)
+        if result:
+            assert satisfies(solver.model, base)
+
+
+def test_selectors_cannot_be_used_as_literals():
+    solver = Solver()
+    solver.push()
+    selector = solver.num_vars
+    for use in (lambda: solver.add_clause([selector]), lambda: solver.solve([-selector, selector]),
+                lambda: solver.implied([-selector])):
+        with pytest.raises(ValueError):
+            use()
+    solver.pop()
+    with pytest.raises(ValueError):
+        solver.add_clause([-selector])
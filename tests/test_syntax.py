@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+import fol_formula as fol
+from formula import Atom, Not, And, Or, Implies
+from syntax import ParseError, format_formula, iter_formulas, parse_fol, parse_formula
+from term import Con, Fun, Var
+
+ATOMS = [Atom('p'), Atom('q2'), Atom("r'"), Atom('petal length (cm) <= 1.5'), Atom('say "hi" \\ bye')]
+
+
+def random_formula(rng, depth, atoms=ATOMS):
+    if depth == 0 or rng.random() < 0.2:
+        return rng.choice(atoms)
+    if rng.random() < 0.2:
+        return Not(random_formula(rng, depth - 1, atoms))
+    return rng.choice([And, Or, Implies])(random_formula(rng, depth - 1, atoms),
+                                          random_formula(rng, depth - 1, atoms))
+
+
+def test_formulas_round_trip():
+    rng = random.Random(1)
+    for _ in range(300):
+        formula = random_formula(rng, 5)
+        assert parse_formula(format_formula(formula)) == formula
+
+
+def test_str_is_parsed_back():
+    # str writes names as they are, so only names that need no quotes are read back
+    rng = random.Random(2)
+    for _ in range(100):
+        formula = random_formula(rng, 5, ATOMS[:3])
+        assert parse_formula(str(formula)) == formula
+
+
+def test_precedence_and_aliases():
+    p, q, r = Atom('p'), Atom('q'), Atom('r')
+    assert parse_formula('~p & q | r -> p') == Implies(Or(And(Not(p), q), r), p)
+    assert parse_formula('p -> q => r') == Implies(p, Implies(q, r))
+    assert parse_formula('p /\\ q /\\ r') == And(And(p, q), r)
+
+
+def test_first_order_formulas_round_trip():
+    x, y, a = Var('x'), Var('y'), Con('a')
+    formulas = [fol.ForAll(x, fol.Implies(fol.Atom('P', [x, Fun('f', [a])]), fol.Atom('Q', [x]))),
+                fol.Exists(y, fol.And(fol.Atom('R', [y, Fun('g', [Fun('h', [y, a])])]), fol.Not(fol.Atom('S', [])))),
+                fol.Or(fol.Atom('P', [a]), fol.ForAll(x, fol.Exists(y, fol.Atom('E', [x, y]))))]
+    for formula in formulas:
+        assert parse_fol(format_formula(formula)) == formula
+    assert parse_fol('P(x)', variables=['x']) == fol.Atom('P', [x])
+    assert parse_fol('P(x)') == fol.Atom('P', [Con('x')])
+
+
+def test_iter_formulas_splits_lines_and_semicolons():
+    lines = ['p & q; r\n', '(p |\n', ' q) ->\n', 'r\n']
+    p, q, r = Atom('p'), Atom('q'), Atom('r')
+    assert list(iter_formulas(lines)) == [And(p, q), r, Implies(Or(p, q), r)]
+
+
+@pytest.mark.parametrize('text', ['p &', '(p', 'p)', 'p q', '& p', 'p $ q', ''])
+def test_malformed_text_is_rejected(text):
+    with pytest.raises(ParseError):
+        parse_formula(text)
+
+
+@pytest.mark.parametrize('text', ['P(x,)', 'P(x,,y)', 'P(,x)', 'P(f(a,), b)'])
+def test_missing_arguments_are_rejected(text):
+    with pytest.raises(ParseError, match='an argument is missing'):
+        parse_fol(text)
+
+
+def test_format_formula_writes_connectives_as_str_does():
+    for formula in (parse_fol('P(a) -> Q(a) & ~R(f(a))'), parse_formula('p -> q & ~r')):
+        assert format_formula(formula) == str(formula)